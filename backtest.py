@@ -0,0 +1,229 @@
+"""Walk-forward backtest over seasons.
+
+For every season S in range, each model is trained on the seasons before S
+and scored on S, using the feature store as already built. Folds run in a
+process pool and each one appends its metrics to a JSONL file as soon as
+it finishes, so a long backtest can be watched (or resumed) while it runs.
+
+Two things keep the cost from growing with the square of the number of
+seasons: --window trains on at most the last N seasons, and --warm-start
+runs each model's folds in order, refitting the previous fold's model
+(see BasePredictor.refit) instead of starting from scratch.
+
+    python backtest.py --first-season 2010 --last-season 2024
+    python backtest.py --models NB,MLP --window 10 --warm-start
+    python backtest.py --models NB --features ewm0.2 --out out/backtest/ewm0.2.jsonl
+"""
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from sklearn.metrics import accuracy_score, roc_auc_score, log_loss, brier_score_loss
+from models import MODEL_NAMES, BEST_PARAMS_PATH, get_model, parse_model_names, tuned_params
+from data_prep import FEATURE_STORE_PATH, MODEL_FEATURE_COLS, TARGET_COL, N_GAMES, FEATURE_FAMILIES, feature_family
+from feature_store import FeatureStore
+from feature_matrix import FeatureMatrix
+
+METRICS_PATH = "out/backtest/metrics.jsonl"
+# a season is labelled by the year it starts in and runs from August to July
+SEASON_START = "{}-08-01T00:00:00Z"
+
+
+def season_rows(store, season):
+    """Row slice of the games in season (rows are stored in date order)."""
+    return slice(store.row_index(SEASON_START.format(season)), store.row_index(SEASON_START.format(season + 1)))
+
+
+def folds(store, seasons, window=None):
+    """(season, train_rows, test_rows) for every season with both history and games."""
+    out = []
+    for season in seasons:
+        test_rows = season_rows(store, season)
+        start = season_rows(store, season - window).start if window else 0
+        if test_rows.start > start and test_rows.stop > test_rows.start:
+            out.append((season, slice(start, test_rows.start), test_rows))
+    return out
+
+
+def fold_metrics(y_true, probas):
+    metrics = {
+        "accuracy": accuracy_score(y_true, probas > 0.5),
+        "brier": brier_score_loss(y_true, probas),
+        "log_loss": log_loss(y_true, np.clip(probas, 1e-15, 1 - 1e-15), labels=[0, 1]),
+    }
+    # a season of one outcome only has no AUC
+    metrics["auc"] = roc_auc_score(y_true, probas) if len(np.unique(y_true)) == 2 else None
+    return metrics
+
+
+def _append(path, record):
+    # opened per record so every worker can append to the same file
+    with open(path, "a") as f:
+        f.write(json.dumps(record) + "\n")
+
+
+def thread_budget(workers):
+    """Threads each of workers parallel fits may use."""
+    # spare cores only help when there are fewer tasks than cores
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def _run_folds(name, fold_list, store_path, feature_cols, out, warm_start, n_threads, recorded=(), params=None):
+    """Worker task: fit and score one model on fold_list in order, appending a record per fold.
+
+    Seasons in recorded are still fitted, to carry a warm-started model
+    forward, but not scored again. params are get_model() keyword arguments.
+    """
+    params = params or {}
+    store = FeatureStore(store_path)
+    y = store.columns[TARGET_COL]
+    model = get_model(name, **params)
+    model.set_n_threads(n_threads)
+
+    records = []
+    with threadpool_limits(limits=n_threads):
+        for season, train_rows, test_rows in fold_list:
+            if not warm_start:
+                model = get_model(name, **params)
+                model.set_n_threads(n_threads)
+
+            X_train = FeatureMatrix.build(store.feature_matrix(feature_cols, train_rows.start, train_rows.stop), feature_cols)
+            X_test = FeatureMatrix.build(store.feature_matrix(feature_cols, test_rows.start, test_rows.stop), feature_cols,
+                                         scaler=X_train.scaler)
+            y_train = pd.Series(y[train_rows], name=TARGET_COL, copy=False)
+            y_test = np.asarray(y[test_rows])
+
+            start = time.perf_counter()
+            if warm_start:
+                model.refit(X_train, y_train)
+            else:
+                model.fit(X_train, y_train)
+            fit_time = time.perf_counter() - start
+            if season in recorded:
+                continue
+
+            start = time.perf_counter()
+            probas = model.predict_proba(X_test)
+            predict_time = time.perf_counter() - start
+
+            record = {
+                "model": name,
+                "season": season,
+                "train_rows": train_rows.stop - train_rows.start,
+                "test_rows": test_rows.stop - test_rows.start,
+                **fold_metrics(y_test, np.asarray(probas, dtype=np.float64)),
+                "fit_time": round(fit_time, 4),
+                "predict_time": round(predict_time, 4),
+                "warm_start": warm_start,
+            }
+            _append(out, record)
+            records.append(record)
+    return records
+
+
+def completed_folds(path) -> set:
+    """(model, season) pairs already recorded in path."""
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {(r["model"], r["season"]) for r in map(json.loads, f) if r.get("model") is not None}
+
+
+def backtest(model_names, seasons, store_path=FEATURE_STORE_PATH, feature_cols=MODEL_FEATURE_COLS, out=METRICS_PATH,
+             window=None, warm_start=False, max_workers=None, resume=False, params=None) -> pd.DataFrame:
+    """Run the walk-forward backtest and return every fold's metrics.
+
+    Without warm_start every (model, season) fold is its own task. With it
+    each model's folds form one task run in season order, since each fold
+    starts from the one before. resume skips folds already in out. params
+    maps model names to get_model() keyword arguments.
+    """
+    params = params or {}
+    store = FeatureStore(store_path)
+    fold_list = folds(store, seasons, window)
+
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    if not resume and os.path.exists(out):
+        os.remove(out)
+    done = completed_folds(out)
+
+    if warm_start:
+        # a warm-started chain can't skip a fold, so an unfinished model reruns from its first season
+        tasks = [(name, fold_list) for name in model_names
+                 if not all((name, season) in done for season, _, _ in fold_list)]
+    else:
+        tasks = [(name, [fold]) for name in model_names for fold in fold_list if (name, fold[0]) not in done]
+
+    n_cores = os.cpu_count() or 1
+    max_workers = max_workers if max_workers is not None else min(len(tasks), n_cores) or 1
+    n_threads = thread_budget(max_workers)
+
+    def task_args(name, task_folds):
+        recorded = {season for model, season in done if model == name}
+        return name, task_folds, store_path, feature_cols, out, warm_start, n_threads, recorded, params.get(name)
+
+    def report(records):
+        for r in records:
+            print(f"{r['model']} {r['season']}: accuracy {r['accuracy']:.4f} on {r['test_rows']} games, fit {r['fit_time']:.2f}s")
+
+    if max_workers == 1:
+        for name, task_folds in tasks:
+            report(_run_folds(*task_args(name, task_folds)))
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [pool.submit(_run_folds, *task_args(name, task_folds)) for name, task_folds in tasks]
+            for future in as_completed(futures):
+                report(future.result())
+
+    if not os.path.exists(out):
+        return pd.DataFrame()
+    with open(out) as f:
+        return pd.DataFrame([json.loads(line) for line in f])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest: train on the seasons before S, test on S.")
+    parser.add_argument("--first-season", type=int, default=2010, help="first test season (the year it starts in)")
+    parser.add_argument("--last-season", type=int, default=2024, help="last test season")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="comma-separated models to backtest")
+    parser.add_argument("--features", default=f"w{N_GAMES}", choices=FEATURE_FAMILIES,
+                        help="feature family the models use: a rolling window (w5) or an EWMA (ewm0.2)")
+    parser.add_argument("--window", type=int, help="train on at most this many seasons before each test season")
+    parser.add_argument("--warm-start", action="store_true", help="refit each model from its previous fold")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--out", default=METRICS_PATH, help="JSONL file the per-fold metrics are appended to")
+    parser.add_argument("--resume", action="store_true", help="keep the folds already in --out and run the rest")
+    parser.add_argument("--tuned", action="store_true",
+                        help="build the models with the hyperparameters tune.py saved in " + BEST_PARAMS_PATH)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        model_names = parse_model_names(args.models)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    feature_cols = feature_family(args.features)
+    results = backtest(model_names, range(args.first_season, args.last_season + 1),
+                       feature_cols=feature_cols, out=args.out,
+                       window=args.window, warm_start=args.warm_start, max_workers=args.workers, resume=args.resume,
+                       params=tuned_params(feature_cols) if args.tuned else None)
+
+    if results.empty:
+        print("No season had both training history and games to test on")
+        return
+
+    summary = results.groupby("model")[["accuracy", "auc", "log_loss", "brier", "fit_time"]].mean()
+    print(f"\nMean over {results['season'].nunique()} seasons:")
+    print(summary.loc[[name for name in model_names if name in summary.index]].round(4).to_string())
+    print(f"\nPer-fold metrics in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Compare a fitted random forest with its CompactForest exports.
+
+Fits RFClassifier on the most recent rows of a feature store (or loads a
+saved one) and reports, for the sklearn forest and each compact variant:
+node memory, file size, batch and single-row latency, and the largest
+probability difference from sklearn on the held-out rows.
+
+    python -m benchmarks.compact_rf --store data/feature_store
+    python -m benchmarks.compact_rf --model data/models/RandomForest.pkl --max-depth 12
+"""
+import os
+import json
+import time
+import pickle
+import argparse
+import tempfile
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from data_prep import FEATURE_STORE_PATH, MODEL_FEATURE_COLS, TARGET_COL
+from feature_store import FeatureStore
+from models import RFClassifier
+from benchmarks.run import current_commit, RESULTS_DIR, DEFAULT_MAX_TRAIN_ROWS
+
+TEST_ROWS = 2000
+SINGLE_ROW_CALLS = 200
+
+
+def forest_nbytes(forest) -> int:
+    """Bytes of sklearn's node and value arrays over all trees."""
+    total = 0
+    for estimator in forest.estimators_:
+        state = estimator.tree_.__getstate__()
+        total += state["nodes"].nbytes + state["values"].nbytes
+    return total
+
+
+def latency(fn, calls):
+    """Median seconds per call."""
+    times = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def measure(name, model, X_test, reference, work_dir):
+    path = os.path.join(work_dir, name)
+    if isinstance(model.model, RandomForestClassifier):
+        path += ".pkl"
+        with open(path, "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        nbytes = forest_nbytes(model.model)
+    else:
+        path += ".npz"
+        model.model.save(path)
+        nbytes = model.model.nbytes
+
+    start = time.perf_counter()
+    probas = model.predict_proba(X_test)
+    batch_seconds = time.perf_counter() - start
+
+    row = X_test.iloc[[0]]
+    record = {
+        "variant": name,
+        "node_mb": round(nbytes / 2**20, 3),
+        "file_mb": round(os.path.getsize(path) / 2**20, 3),
+        "batch_us_per_row": round(batch_seconds / len(X_test) * 1e6, 3),
+        "single_row_ms": round(latency(lambda: model.predict_proba(row), SINGLE_ROW_CALLS) * 1e3, 4),
+        "max_abs_diff": float(np.abs(probas - reference).max()) if reference is not None else 0.0,
+    }
+    if name != "sklearn":
+        values = row.to_numpy()[0]
+        record["single_row_fast_ms"] = round(latency(lambda: model.model.predict_proba_one(values), SINGLE_ROW_CALLS) * 1e3, 4)
+    return record, probas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark compact random forest exports against sklearn.")
+    parser.add_argument("--store", default=FEATURE_STORE_PATH, help="feature store to train and test on")
+    parser.add_argument("--model", help="saved RFClassifier pickle to use instead of fitting one")
+    parser.add_argument("--max-train-rows", type=int, default=DEFAULT_MAX_TRAIN_ROWS)
+    parser.add_argument("--max-depth", type=int, default=12, help="depth of the depth-pruned variant")
+    parser.add_argument("--min-samples-leaf", type=int, default=5, help="leaf size of the leaf-pruned variant")
+    parser.add_argument("--out", help="results JSON path (default: out/benchmarks/compact_rf_<commit>.json)")
+    args = parser.parse_args()
+
+    store = FeatureStore(args.store)
+    split = len(store) - TEST_ROWS
+    X_test = store.feature_frame(MODEL_FEATURE_COLS, split, len(store))
+
+    if args.model:
+        with open(args.model, "rb") as f:
+            rf = pickle.load(f)
+    else:
+        start = max(0, split - args.max_train_rows)
+        rf = RFClassifier()
+        print(f"Fitting RandomForest on {split - start} rows...")
+        rf.fit(store.feature_frame(MODEL_FEATURE_COLS, start, split), store.columns[TARGET_COL][start:split])
+    # sklearn's single-row latency is dominated by thread dispatch otherwise
+    rf.set_n_threads(1)
+
+    variants = {
+        "sklearn": rf,
+        "compact": rf.compact(),
+        "compact_f32": rf.compact(leaf_dtype=np.float32),
+        f"depth{args.max_depth}": rf.compact(max_depth=args.max_depth),
+        f"leaf{args.min_samples_leaf}": rf.compact(min_samples_leaf=args.min_samples_leaf),
+    }
+
+    records = []
+    reference = None
+    with tempfile.TemporaryDirectory(prefix="compact-rf-") as work_dir:
+        for name, model in variants.items():
+            record, probas = measure(name, model, X_test, reference, work_dir)
+            reference = probas if reference is None else reference
+            records.append(record)
+            print(f"{name:<12} {record['node_mb']:>8.2f} MB nodes {record['file_mb']:>8.2f} MB file "
+                  f"{record['batch_us_per_row']:>8.2f} us/row {record['single_row_ms']:>8.3f} ms/single "
+                  f"{record.get('single_row_fast_ms', float('nan')):>8.3f} ms/fast  max diff {record['max_abs_diff']:.2e}")
+
+    commit = current_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"compact_rf_{(commit or 'nocommit')[:8]}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"commit": commit, "test_rows": len(X_test), "variants": records}, f, indent=2)
+    print(f"Wrote results to {out}")
+
+
+if __name__ == "__main__":
+    main()
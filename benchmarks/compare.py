@@ -0,0 +1,59 @@
+"""Compare two benchmark result files stage by stage.
+
+    python -m benchmarks.compare out/benchmarks/x1_old.json out/benchmarks/x1_new.json
+
+Exits with status 1 if any stage got slower than --threshold times the
+baseline, so it can gate a CI job.
+"""
+import sys
+import json
+import argparse
+
+DEFAULT_THRESHOLD = 1.25
+# stages this short are mostly noise
+MIN_SECONDS = 0.05
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="flag stages slower than this multiple of the baseline")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    if baseline["scale"] != candidate["scale"]:
+        print(f"Warning: comparing scale x{baseline['scale']} against x{candidate['scale']}")
+
+    old = {stage["stage"]: stage for stage in baseline["stages"]}
+    regressions = []
+
+    print(f"{'stage':<28} {'base s':>10} {'new s':>10} {'ratio':>7} {'base MB':>10} {'new MB':>10}")
+    for stage in candidate["stages"]:
+        name = stage["stage"]
+        if name not in old:
+            print(f"{name:<28} {'-':>10} {stage['seconds']:>10.3f} {'-':>7} {'-':>10} {stage['peak_mb']:>10.1f}")
+            continue
+
+        before = old[name]
+        ratio = stage["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        flag = ""
+        if ratio > args.threshold and stage["seconds"] >= MIN_SECONDS:
+            regressions.append(name)
+            flag = "  <-- slower"
+        print(f"{name:<28} {before['seconds']:>10.3f} {stage['seconds']:>10.3f} {ratio:>7.2f} "
+              f"{before['peak_mb']:>10.1f} {stage['peak_mb']:>10.1f}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} stage(s) slower than {args.threshold}x: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
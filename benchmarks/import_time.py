@@ -0,0 +1,114 @@
+"""Import-time regression check for the entry points.
+
+Each scenario runs in a fresh interpreter under `python -X importtime`,
+which records the total import time and the set of modules loaded. A
+scenario fails when it imports a module it has no use for: another
+model's wrapper, or plotly outside of plotting. Given a --baseline from an
+earlier run, it also fails when its import time grew by more than
+--threshold times.
+
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --baseline out/benchmarks/imports_1a2b3c4d.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+from models import MODEL_PATHS, canonical_name
+from benchmarks.run import current_commit, RESULTS_DIR
+
+DEFAULT_REPEATS = 5
+DEFAULT_THRESHOLD = 1.25
+# import times are noisy below this many milliseconds
+MIN_MS = 50
+
+MODEL_MODULES = {name: "models" + module for name, (module, _) in MODEL_PATHS.items()}
+PLOT_MODULES = ["plotly"]
+
+
+def _except(*names):
+    """Model modules other than those of names."""
+    keep = {canonical_name(name) for name in names}
+    return [module for name, module in MODEL_MODULES.items() if name not in keep]
+
+
+# scenario -> (code run in a fresh interpreter, modules it must not import)
+SCENARIOS = {
+    "models": ("import models", _except() + PLOT_MODULES),
+    "score_rf": ("from models import get_model; get_model('RF')", _except("RF") + PLOT_MODULES),
+    "score_nb": ("from models import get_model; get_model('NB')", _except("NB") + PLOT_MODULES),
+    "predict": ("import predict", _except() + PLOT_MODULES),
+    "update_models": ("import update_models", _except() + PLOT_MODULES),
+    "evaluate_predictor": ("import evaluate_predictor", _except() + PLOT_MODULES),
+    "backtest": ("import backtest", _except() + PLOT_MODULES),
+}
+
+
+def import_profile(code: str) -> dict:
+    """{module: cumulative microseconds} of every module imported by running code in a new interpreter."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # nesting is shown by indentation; top-level modules' cumulative times add up to the total
+        modules[name.strip()] = (int(cumulative), len(name) - len(name.lstrip()) <= 1)
+    return modules
+
+
+def measure(code: str, forbidden: list, repeats: int) -> dict:
+    """Best-of-repeats total import time of code, and which forbidden modules it loaded."""
+    totals = []
+    for _ in range(repeats):
+        modules = import_profile(code)
+        totals.append(sum(cumulative for cumulative, top_level in modules.values() if top_level))
+    loaded = [name for name in forbidden if any(module == name or module.startswith(name + ".") for module in modules)]
+    return {"total_ms": round(min(totals) / 1000, 1), "modules": len(modules), "forbidden": loaded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the import time and import graph of the entry points.")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="runs per scenario, the fastest is kept")
+    parser.add_argument("--baseline", help="earlier results JSON to compare import times against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="flag scenarios slower than this multiple of the baseline")
+    parser.add_argument("--out", help="results JSON path (default: out/benchmarks/imports_<commit>.json)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["scenarios"]
+
+    results, failures = {}, []
+    print(f"{'scenario':<20} {'import ms':>10} {'base ms':>10} {'modules':>8}")
+    for name, (code, forbidden) in SCENARIOS.items():
+        record = results[name] = measure(code, forbidden, args.repeats)
+        before = baseline.get(name, {}).get("total_ms")
+        flags = []
+        if record["forbidden"]:
+            flags.append(f"imports {', '.join(record['forbidden'])}")
+        if before and record["total_ms"] > args.threshold * before and record["total_ms"] >= MIN_MS:
+            flags.append(f"{record['total_ms'] / before:.2f}x slower")
+        if flags:
+            failures.append(name)
+        print(f"{name:<20} {record['total_ms']:>10.1f} {before if before else '-':>10} {record['modules']:>8}"
+              f"{'  <-- ' + '; '.join(flags) if flags else ''}")
+
+    commit = current_commit()
+    out = args.out or os.path.join(RESULTS_DIR, f"imports_{(commit or 'nocommit')[:8]}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump({"commit": commit, "python": sys.version.split()[0], "scenarios": results}, f, indent=2)
+    print(f"Wrote import times to {out}")
+
+    if failures:
+        print(f"\n{len(failures)} scenario(s) failed: {', '.join(failures)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+"""Time each stage of the pipeline on a synthetic dataset.
+
+Every stage is timed on its own and its peak traced allocation is recorded
+with tracemalloc. Results go to a JSON file tagged with the current commit,
+which benchmarks.compare diffs against another run. Everything runs
+offline against a generated dataset and a temporary feature store.
+
+    python -m benchmarks.run --scale 1
+    python -m benchmarks.run --scale 10 --models NB,RandomForest
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import numpy as np
+import data_prep
+from data_prep import RecommenderDataPrep, MODEL_FEATURE_COLS, STORE_FEATURE_COLS
+from dataset_cache import DatasetCache, DATASET_FILES, PLAYER_STATS_FILE
+from feature_store import write_feature_store
+from models import MODEL_NAMES, get_model, parse_model_names
+from benchmarks.synthetic import generate, DEFAULT_SEED
+
+# kernel SVM and friends can't fit 100x the history, so models train on the most recent rows
+DEFAULT_MAX_TRAIN_ROWS = 50_000
+EQUIVALENCE_SAMPLE = 200
+BOOTSTRAP_SAMPLES = 200
+RESULTS_DIR = "out/benchmarks"
+
+
+def current_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    """Collects wall time and peak traced memory per named stage."""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, **attrs):
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        record = {"stage": name, **attrs}
+        try:
+            yield record
+        finally:
+            record["seconds"] = round(time.perf_counter() - start, 6)
+            record["peak_mb"] = round((tracemalloc.get_traced_memory()[1] - baseline) / 2**20, 3)
+            self.stages.append(record)
+            print(f"{name:<28} {record['seconds']:>10.3f}s {record['peak_mb']:>10.1f} MB")
+
+
+def run_pipeline(timer, data_dir, work_dir, model_names, max_train_rows):
+    dataset = DatasetCache(data_dir, offline=True)
+    prep = RecommenderDataPrep(True, dataset)
+
+    with timer.stage("read_games"):
+        games = prep.read_games(data_dir)
+    with timer.stage("read_team_stats") as record:
+        team_stats = prep.read_team_stats(data_dir)
+        record["rows"] = len(team_stats)
+    with timer.stage("rolling_features", rows=len(games)):
+        games = prep.add_features(games, team_stats)
+    if os.path.exists(os.path.join(data_dir, PLAYER_STATS_FILE)):
+        with timer.stage("player_stats") as record:
+            prep.stream_player_stats(data_dir)
+            record.update(rows=prep.player_stream_stats["rows"],
+                          rows_per_sec=round(prep.player_stream_stats["rows_per_sec"]))
+    with timer.stage("store_write", rows=len(games)):
+        write_feature_store(games, data_prep.FEATURE_STORE_PATH, STORE_FEATURE_COLS)
+
+    with timer.stage("rolling_equivalence", rows=EQUIVALENCE_SAMPLE) as record:
+        sample = games.sample(min(EQUIVALENCE_SAMPLE, len(games)), random_state=DEFAULT_SEED)
+        home_stats = team_stats[team_stats["home"] == 1].sort_values("gameDate", ascending=False, kind="mergesort")
+        fast = prep.get_rolling_stats(sample, home_stats, True)
+        slow = prep.get_rolling_stats_loop(sample, home_stats, True)
+        record["max_abs_diff"] = float(np.abs(fast.to_numpy() - slow.to_numpy()).max())
+
+    with timer.stage("load_and_prepare"):
+        prep.load_and_prepare(create_csv=False)
+
+    train_rows = prep.train_rows
+    if max_train_rows is not None and train_rows.stop - train_rows.start > max_train_rows:
+        train_rows = slice(train_rows.stop - max_train_rows, train_rows.stop)
+    prep.train_rows = train_rows
+
+    _, y_train = prep.get_training_data(MODEL_FEATURE_COLS)
+    y_test = prep.get_test_results()
+    with timer.stage("feature_matrix", rows=train_rows.stop - train_rows.start):
+        X_train = prep.get_feature_matrix(MODEL_FEATURE_COLS, "train")
+        X_test = prep.get_feature_matrix(MODEL_FEATURE_COLS, "test")
+
+    probas, predictions = {}, {}
+    for name in model_names:
+        model = get_model(name)
+        with timer.stage(f"fit:{name}", model=name, rows=len(X_train), features=X_train.shape[1]):
+            model.fit(X_train, y_train)
+        with timer.stage(f"predict:{name}", model=name, rows=len(X_test)):
+            predictions[name] = model.predict(X_test)
+        with timer.stage(f"predict_proba:{name}", model=name, rows=len(X_test)):
+            probas[name] = model.predict_proba(X_test)
+
+    from evaluation import evaluate_scores, bootstrap_intervals
+    with timer.stage("evaluate", models=len(probas), rows=len(y_test)):
+        reports = {name: evaluate_scores(y_test, probas[name], predictions[name]) for name in probas}
+    with timer.stage("bootstrap", models=len(probas), rows=len(y_test), samples=BOOTSTRAP_SAMPLES):
+        bootstrap_intervals(y_test, probas, predictions, n_samples=BOOTSTRAP_SAMPLES)
+
+    # plotting needs plotly's static image renderer, which may not be installed
+    from evaluate_predictor import plot_reports
+    with timer.stage("plot", models=len(probas)) as record:
+        try:
+            plot_reports(reports, os.path.join(work_dir, "roc.png"), os.path.join(work_dir, "pr.png"))
+        except Exception as e:
+            record["error"] = f"{type(e).__name__}: {e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline on a synthetic dataset.")
+    parser.add_argument("--scale", type=int, default=1, help="multiple of the real league size (1, 10, 100)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--data-dir", help="synthetic dataset directory, generated if missing (default: data/synthetic/x<scale>)")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="comma-separated models to time")
+    parser.add_argument("--max-train-rows", type=int, default=DEFAULT_MAX_TRAIN_ROWS,
+                        help="train models on at most this many of the most recent rows (0 for all)")
+    parser.add_argument("--out", help="results JSON path (default: out/benchmarks/x<scale>_<commit>.json)")
+    args = parser.parse_args()
+
+    try:
+        model_names = parse_model_names(args.models)
+    except ValueError as e:
+        parser.error(str(e))
+
+    data_dir = args.data_dir or os.path.join("data", "synthetic", f"x{args.scale}")
+    commit = current_commit()
+
+    tracemalloc.start()
+    timer = StageTimer()
+
+    if not all(os.path.exists(os.path.join(data_dir, name)) for name in DATASET_FILES):
+        with timer.stage("generate", scale=args.scale):
+            generate(data_dir, args.scale, args.seed)
+
+    work_dir = tempfile.mkdtemp(prefix="nba-bench-")
+    data_prep.FEATURE_STORE_PATH = os.path.join(work_dir, "feature_store")
+    try:
+        run_pipeline(timer, data_dir, work_dir, model_names, args.max_train_rows or None)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        tracemalloc.stop()
+
+    results = {
+        "commit": commit,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "scale": args.scale,
+        "seed": args.seed,
+        "max_train_rows": args.max_train_rows or None,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "stages": timer.stages,
+    }
+
+    out = args.out or os.path.join(RESULTS_DIR, f"x{args.scale}_{(commit or 'nocommit')[:8]}.json")
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Wrote benchmark results to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Synthetic NBA dataset in the schema of the Kaggle files data_prep.py reads.
+
+Writes Games.csv, TeamStatistics.csv, PlayerStatistics.csv and
+LeagueSchedule25_26.csv for REAL_SEASONS seasons ending with 2025-26. The scale factor multiplies the
+number of teams, so 1x has about as many games as the real history and 10x
+or 100x keep the same seasons and dates with proportionally more games.
+Files are written one season at a time so memory stays flat at any scale.
+
+    python -m benchmarks.synthetic --scale 10 --out data/synthetic/x10
+"""
+import os
+import argparse
+import numpy as np
+import pandas as pd
+from dataset_cache import GAMES_FILE, TEAM_STATS_FILE, SCHEDULE_FILE, PLAYER_STATS_FILE
+
+REAL_SEASONS = 42
+TEAMS_PER_SCALE = 30
+GAMES_PER_TEAM = 82
+SEASON_DAYS = 170
+PLAYOFF_DAYS = 60
+FIRST_TEAM_ID = 1610612737
+ROSTER_SIZE = 15
+PLAYERS_PER_GAME = 11
+# roster spots turned over between seasons
+ROSTER_TURNOVER = 4
+FIRST_PERSON_ID = 200_000
+DEFAULT_SEED = 42
+
+LAST_SEASON = 2025
+
+
+def _season_games(rng, n_teams, season_start):
+    """Regular season and playoff matchups, with no team playing twice on one day."""
+    n_games = n_teams * GAMES_PER_TEAM // 2
+    per_day = min(max(1, n_games // SEASON_DAYS), n_teams // 2)
+    # the top quarter of teams keeps playing in the playoffs, a handful of games a day
+    playoff_pool = max(2, n_teams // 4)
+    playoff_per_day = max(1, playoff_pool // 8)
+
+    parts = []
+    for first_day, days, pool, count, game_type in (
+        (0, SEASON_DAYS, n_teams, per_day, "Regular Season"),
+        (SEASON_DAYS, PLAYOFF_DAYS, playoff_pool, playoff_per_day, "Playoffs"),
+    ):
+        # each row is one day: a shuffled pool, paired off front to back
+        teams = rng.permuted(np.tile(np.arange(pool), (days, 1)), axis=1)[:, :2 * count]
+        day = np.repeat(np.arange(first_day, first_day + days), count)
+        minutes = np.sort(rng.integers(0, 6 * 60, (days, count)), axis=1).ravel()
+        parts.append(pd.DataFrame({
+            "home": teams[:, :count].ravel(),
+            "away": teams[:, count:].ravel(),
+            "gameDate": season_start + pd.Timedelta(hours=17) + pd.to_timedelta(day * 24 * 60 + minutes, unit="min"),
+            "gameType": game_type,
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+def _box_scores(rng, team_idx, strength, home):
+    """One team's box score per game; stronger teams shoot better and turn it over less."""
+    n = len(team_idx)
+    edge = strength[team_idx] + (0.01 if home else 0.0)
+
+    fga = rng.normal(88, 6, n).round().clip(60, 120).astype(int)
+    fgm = rng.binomial(fga, (0.46 + edge).clip(0.3, 0.6))
+    tpa = rng.binomial(fga, 0.35)
+    tpm = np.minimum(rng.binomial(tpa, (0.35 + edge / 2).clip(0.2, 0.5)), fgm)
+    fta = rng.poisson(22, n)
+    ftm = rng.binomial(fta, 0.77)
+    return pd.DataFrame({
+        "assists": rng.binomial(fgm, 0.6),
+        "blocks": rng.poisson(5, n),
+        "steals": rng.poisson(7.5, n),
+        "fieldGoalsAttempted": fga,
+        "fieldGoalsMade": fgm,
+        "fieldGoalsPercentage": (fgm / fga).round(3),
+        "threePointersAttempted": tpa,
+        "threePointersMade": tpm,
+        "threePointersPercentage": (tpm / np.maximum(tpa, 1)).round(3),
+        "freeThrowsAttempted": fta,
+        "freeThrowsMade": ftm,
+        "freeThrowsPercentage": (ftm / np.maximum(fta, 1)).round(3),
+        "reboundsDefensive": rng.poisson(33, n),
+        "reboundsOffensive": rng.poisson(10, n),
+        "foulsPersonal": rng.poisson(20, n),
+        "turnovers": rng.poisson((14 - 40 * edge).clip(8, 20)),
+        "teamScore": 2 * fgm + tpm + ftm,
+    })
+
+
+def _player_box_scores(rng, team_idx, rosters, skill, team_box):
+    """PLAYERS_PER_GAME rows per team-game splitting the team's box score by minutes and skill."""
+    n = len(team_idx)
+    slots = rng.permuted(np.tile(np.arange(ROSTER_SIZE), (n, 1)), axis=1)[:, :PLAYERS_PER_GAME]
+    players = rosters[team_idx[:, None], slots]
+    minutes = rng.gamma(4.0, 1.0, slots.shape)
+    minutes = (240 * minutes / minutes.sum(axis=1, keepdims=True)).round(2)
+    share = minutes * np.exp(skill[team_idx[:, None], slots])
+    share /= share.sum(axis=1, keepdims=True)
+
+    def split(col):
+        return rng.binomial(team_box[col].to_numpy()[:, None], share).ravel()
+
+    fgm, fga = split("fieldGoalsMade"), split("fieldGoalsAttempted")
+    tpm, ftm = split("threePointersMade"), split("freeThrowsMade")
+    fga, tpm = np.maximum(fga, fgm), np.minimum(tpm, fgm)
+    rows = pd.DataFrame({
+        "personId": players.ravel(),
+        "numMinutes": minutes.ravel(),
+        "points": 2 * fgm + tpm + ftm,
+        "assists": split("assists"),
+        "blocks": split("blocks"),
+        "steals": split("steals"),
+        "fieldGoalsAttempted": fga,
+        "fieldGoalsMade": fgm,
+        "threePointersMade": tpm,
+        "freeThrowsAttempted": np.maximum(split("freeThrowsAttempted"), ftm),
+        "freeThrowsMade": ftm,
+        "reboundsDefensive": split("reboundsDefensive"),
+        "reboundsOffensive": split("reboundsOffensive"),
+        "foulsPersonal": split("foulsPersonal"),
+        "turnovers": split("turnovers"),
+    })
+    rows["reboundsTotal"] = rows["reboundsDefensive"] + rows["reboundsOffensive"]
+    return rows
+
+
+def generate(out_dir: str, scale: int = 1, seed: int = DEFAULT_SEED, n_seasons: int = REAL_SEASONS):
+    """Write the dataset files for scale x the real league size to out_dir."""
+    rng = np.random.default_rng(seed)
+    n_teams = TEAMS_PER_SCALE * scale
+    team_ids = np.arange(FIRST_TEAM_ID, FIRST_TEAM_ID + n_teams)
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {name: os.path.join(out_dir, name) for name in (GAMES_FILE, TEAM_STATS_FILE, PLAYER_STATS_FILE, SCHEDULE_FILE)}
+    for path in paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+    # players draw from their own stream, so the game and team files don't change with them
+    player_rng = np.random.default_rng([seed, 1])
+    rosters = FIRST_PERSON_ID + np.arange(n_teams * ROSTER_SIZE).reshape(n_teams, ROSTER_SIZE)
+    skill = player_rng.normal(0, 0.3, rosters.shape)
+    next_person_id = FIRST_PERSON_ID + rosters.size
+
+    next_game_id = 1
+    for season in range(LAST_SEASON - n_seasons + 1, LAST_SEASON + 1):
+        games = _season_games(rng, n_teams, pd.Timestamp(f"{season}-10-21"))
+        games["gameId"] = np.arange(next_game_id, next_game_id + len(games)) + season * 10**7
+        next_game_id += len(games)
+
+        strength = rng.normal(0, 0.02, n_teams)
+        home = _box_scores(rng, games["home"].to_numpy(), strength, True)
+        away = _box_scores(rng, games["away"].to_numpy(), strength, False)
+        # break ties in favor of the home team
+        home["teamScore"] += (home["teamScore"] == away["teamScore"]).astype(int)
+
+        home_ids, away_ids = team_ids[games["home"]], team_ids[games["away"]]
+        home_won = (home["teamScore"] > away["teamScore"]).to_numpy()
+        dates = games["gameDate"].dt.strftime("%Y-%m-%d %H:%M:%S")
+
+        games_out = pd.DataFrame({
+            "gameId": games["gameId"],
+            "gameDate": dates,
+            "hometeamId": home_ids,
+            "awayteamId": away_ids,
+            "homeScore": home["teamScore"],
+            "awayScore": away["teamScore"],
+            "winner": np.where(home_won, home_ids, away_ids),
+            "gameType": games["gameType"],
+        })
+
+        # a few players on every team leave and are replaced by new ones each season
+        leaving = player_rng.permuted(np.tile(np.arange(ROSTER_SIZE), (n_teams, 1)), axis=1)[:, :ROSTER_TURNOVER]
+        rows = np.repeat(np.arange(n_teams), ROSTER_TURNOVER)
+        rosters[rows, leaving.ravel()] = next_person_id + np.arange(rows.size)
+        skill[rows, leaving.ravel()] = player_rng.normal(0, 0.3, rows.size)
+        next_person_id += rows.size
+
+        stats_out, players_out = [], []
+        for side, own, opp, won, own_ids, opp_ids, own_idx in (
+            (1, home, away, home_won, home_ids, away_ids, games["home"].to_numpy()),
+            (0, away, home, ~home_won, away_ids, home_ids, games["away"].to_numpy()),
+        ):
+            stats_out.append(pd.concat([pd.DataFrame({
+                "gameId": games["gameId"],
+                "gameDate": dates,
+                "teamId": own_ids,
+                "opponentTeamId": opp_ids,
+                "home": side,
+                "win": won.astype(int),
+                "opponentScore": opp["teamScore"],
+            }), own], axis=1))
+
+            players = _player_box_scores(player_rng, own_idx, rosters, skill, own)
+            game_rows = np.repeat(np.arange(len(games)), PLAYERS_PER_GAME)
+            players_out.append(pd.concat([pd.DataFrame({
+                "firstName": "Player",
+                "lastName": players["personId"].astype(str),
+                "gameId": games["gameId"].to_numpy()[game_rows],
+                "gameDateTimeEst": dates.to_numpy()[game_rows],
+                "playerteamName": own_ids[game_rows].astype(str),
+                "opponentteamName": opp_ids[game_rows].astype(str),
+                "gameType": games["gameType"].to_numpy()[game_rows],
+                "win": won.astype(int)[game_rows],
+                "home": side,
+            }), players], axis=1))
+
+        header = season == LAST_SEASON - n_seasons + 1
+        games_out.to_csv(paths[GAMES_FILE], mode="a", header=header, index=False)
+        pd.concat(stats_out).to_csv(paths[TEAM_STATS_FILE], mode="a", header=header, index=False)
+        pd.concat(players_out).to_csv(paths[PLAYER_STATS_FILE], mode="a", header=header, index=False)
+
+        if season == LAST_SEASON:
+            schedule = games_out[games_out["gameType"] == "Regular Season"]
+            schedule = schedule.rename(columns={"gameDate": "gameDateTimeEst"})
+            schedule[["gameId", "gameDateTimeEst", "hometeamId", "awayteamId"]].to_csv(paths[SCHEDULE_FILE], index=False)
+
+    return out_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic NBA dataset.")
+    parser.add_argument("--scale", type=int, default=1, help="multiple of the real league size (1, 10, 100)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--seasons", type=int, default=REAL_SEASONS)
+    parser.add_argument("--out", required=True, help="directory to write the CSV files to")
+    args = parser.parse_args()
+
+    generate(args.out, args.scale, args.seed, args.seasons)
+    print(f"Wrote synthetic x{args.scale} dataset to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
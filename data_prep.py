@@ -1,6 +1,15 @@
+import os
+import json
+import hashlib
 import pandas as pd
 import numpy as np
-import kagglehub
+from dataset_cache import DatasetCache, DATASET_FILES, GAMES_FILE, TEAM_STATS_FILE, SCHEDULE_FILE, PLAYER_STATS_FILE
+from instrumentation import span
+from feature_index import TeamFeatureIndex, HOME, AWAY
+from feature_store import FeatureStore, to_epoch_seconds, write_feature_store, append_feature_store, feature_store_exists
+from feature_matrix import FeatureMatrix
+from ingest import read_columns
+from player_stats import RosterStrength, stream_roster_strength
 
 # Data configuration
 GAME_FEATURE_COLS_RAW = ["gameId", "gameDate", "hometeamId", "awayteamId", "result"]
@@ -8,95 +17,460 @@ MODEL_FEATURE_COLS = ["home_efg", "away_efg", "home_tov", "away_tov", "home_orb"
 TARGET_COL = "result"
 RANDOM_SEED = 42
 
+FEATURE_STORE_PATH = "data/feature_store"
+# CSV copy of the feature table, only written on request
 FEATURE_PATH = "data/feature_table.csv"
 N_GAMES = 10
 
+# The feature bank: MODEL_FEATURE_COLS over several window lengths and as
+# exponentially weighted means, all built in the same pass. A family is
+# picked by name through feature_family(); the N_GAMES window is
+# MODEL_FEATURE_COLS itself.
+FEATURE_WINDOWS = [5, 10, 20]
+EWM_ALPHAS = [0.1, 0.2, 0.5]
+FEATURE_FAMILIES = [f"w{window}" for window in FEATURE_WINDOWS] + [f"ewm{alpha}" for alpha in EWM_ALPHAS]
+
+# last ROLLING_STATE_ROWS home/away stat rows per team, and each team's EWMAs
+# before them, used for incremental builds
+ROLLING_STATE_PATH = "data/rolling_state.csv"
+ROLLING_STATE_META_PATH = "data/rolling_state.json"
+ROLLING_EWM_PATH = "data/rolling_ewm.npz"
+
+# per-game team box score columns averaged over the rolling window
+BOX_SCORE_COLS = ["fieldGoalsMade", "fieldGoalsAttempted", "threePointersMade", "turnovers",
+                  "freeThrowsMade", "freeThrowsAttempted", "assists", "reboundsDefensive",
+                  "reboundsOffensive"]
+OPPONENT_COLS = {"reboundsDefensive": "reboundsDefensive_opp", "reboundsOffensive": "reboundsOffensive_opp"}
+STAT_COLS = BOX_SCORE_COLS + list(OPPONENT_COLS.values())
+
+# the only raw columns read, and their dtypes (gameDate is parsed to int64 epoch seconds)
+GAMES_DTYPES = {"gameId": np.int64, "hometeamId": np.int32, "awayteamId": np.int32, "winner": np.float64,
+                "gameType": "category"}
+TEAM_STATS_DTYPES = {"gameId": np.int64, "teamId": np.int32, "home": np.int8,
+                     **dict.fromkeys(BOX_SCORE_COLS, np.float32)}
+ROLLING_STATE_COLS = ["gameId", "gameDate", "teamId", "home"] + STAT_COLS
+ROLLING_STATE_ROWS = max(FEATURE_WINDOWS + [N_GAMES])
+
+# Optional roster strength features from the player box scores (see
+# player_stats.py), stored after STORE_FEATURE_COLS when enabled
+PLAYER_FEATURE_COLS = ["home_roster_strength", "away_roster_strength"]
+PLAYER_STATE_PATH = "data/player_state.npz"
+
+# the schedule file names its tip-off column differently from Games.csv
+SCHEDULE_DATE_COLS = ["gameDateTimeEst", "gameDate"]
+SCHEDULE_COLS = ["gameId", "gameDate", "hometeamId", "awayteamId"]
+
 # cutoff date for train/test split
 # (this is the first day of the 2025 season)
 TRAIN_CUTOFF = "2025-10-02T12:00:00Z"
 
+
+def feature_family(family: str) -> list:
+    """MODEL_FEATURE_COLS of one feature bank family, e.g. "w5" (5-game window) or "ewm0.2" (EWMA, alpha 0.2)."""
+    if family == f"w{N_GAMES}":
+        return MODEL_FEATURE_COLS
+    if family not in FEATURE_FAMILIES:
+        raise ValueError(f"Unknown feature family {family!r}, expected one of {', '.join(FEATURE_FAMILIES)}")
+    return [f"{col}_{family}" for col in MODEL_FEATURE_COLS]
+
+
+# every stored feature column, with MODEL_FEATURE_COLS first and each family a contiguous run
+STORE_FEATURE_COLS = MODEL_FEATURE_COLS + [
+    col for family in FEATURE_FAMILIES if family != f"w{N_GAMES}" for col in feature_family(family)
+]
+
+
+def add_opponent_stats(stats):
+    """Add OPPONENT_COLS to team box scores, pairing each game's home and away rows with one sort."""
+    game_ids = stats["gameId"].to_numpy()
+    home = stats["home"].to_numpy()
+    order = np.argsort(game_ids, kind="stable")
+    # the rows of a game are adjacent once sorted; a home row next to an away row are opponents
+    pair = np.flatnonzero((game_ids[order][1:] == game_ids[order][:-1]) & (home[order][1:] != home[order][:-1]))
+    first, second = order[pair], order[pair + 1]
+
+    for col, opp_col in OPPONENT_COLS.items():
+        values = stats[col].to_numpy()
+        opponent = np.full(len(stats), np.nan, dtype=values.dtype)
+        opponent[first] = values[second]
+        opponent[second] = values[first]
+        stats[opp_col] = opponent
+    return stats
+
+
+def four_factors(home_agg, away_agg):
+    """MODEL_FEATURE_COLS from the rolling stat means of the home and away teams."""
+    features = pd.DataFrame(index=home_agg.index)
+
+    features["home_efg"] = (home_agg["fieldGoalsMade"] + 0.5 * home_agg["threePointersMade"]) / home_agg["fieldGoalsAttempted"]
+    features["away_efg"] = (away_agg["fieldGoalsMade"] + 0.5 * away_agg["threePointersMade"]) / away_agg["fieldGoalsAttempted"]
+
+    features["home_tov"] = home_agg["turnovers"] / (home_agg["fieldGoalsAttempted"] + 0.44 * home_agg["freeThrowsAttempted"] + home_agg["turnovers"])
+    features["away_tov"] = away_agg["turnovers"] / (away_agg["fieldGoalsAttempted"] + 0.44 * away_agg["freeThrowsAttempted"] + away_agg["turnovers"])
+
+    features["home_orb"] = home_agg["reboundsOffensive"] / (home_agg["reboundsOffensive"] + home_agg["reboundsDefensive_opp"])
+    features["away_orb"] = away_agg["reboundsOffensive"] / (away_agg["reboundsOffensive"] + away_agg["reboundsDefensive_opp"])
+
+    features["home_ft"] = home_agg["freeThrowsMade"] / home_agg["freeThrowsAttempted"]
+    features["away_ft"] = away_agg["freeThrowsMade"] / away_agg["freeThrowsAttempted"]
+    return features[MODEL_FEATURE_COLS]
+
+
+def four_factor_bank(home_bank, away_bank, index=None):
+    """STORE_FEATURE_COLS from TeamFeatureIndex.query_bank() results for the home and away teams."""
+    families = []
+    for (kind, param), home_means in home_bank.items():
+        home_agg = pd.DataFrame(home_means, columns=STAT_COLS, index=index)
+        away_agg = pd.DataFrame(away_bank[(kind, param)], columns=STAT_COLS, index=index)
+        features = four_factors(home_agg, away_agg)
+        features.columns = feature_family(f"{kind}{param}")
+        families.append(features)
+    return pd.concat(families, axis=1)[STORE_FEATURE_COLS]
+
+
 class RecommenderDataPrep:
     """Utility class for preparing recommender system data."""
 
-    def __init__(self, evaluate):
+    def __init__(self, evaluate, dataset: DatasetCache = None, player_features: bool = False):
         self.evaluate = evaluate
+        self.player_features = player_features
+        self.dataset = dataset if dataset is not None else DatasetCache()
         self.feature_cols = GAME_FEATURE_COLS_RAW
         self.target_col = TARGET_COL
         self.random_seed = RANDOM_SEED
 
+        self.store = None
+        self.train_rows = None
+        self.test_rows = None
         self.train_df = None
         self.test_df = None
         self.game_schedule = None
+        self.feature_index = None
+        self.roster_strength = None
+        self.player_stream_stats = None
+        self._matrices = {}
+
+    @property
+    def store_feature_cols(self) -> list:
+        """Feature columns of the store this instance builds."""
+        return STORE_FEATURE_COLS + (PLAYER_FEATURE_COLS if self.player_features else [])
+
+    def load_and_prepare(self, create_csv = True, incremental = False, export_csv = False, refresh = False):
+        """Load data and prepare train/test splits.
 
-    def load_and_prepare(self, create_csv = True):
-        """Load data and prepare train/test splits."""
+        With incremental=True the feature table is only extended with games
+        newer than the stored rolling state, falling back to a full rebuild
+        when there is no usable state. export_csv also writes the table to
+        FEATURE_PATH. refresh downloads the latest dataset first unless the
+        dataset cache is offline.
+        """
 
-        data_path = kagglehub.dataset_download("eoinamoore/historical-nba-data-and-player-box-scores")
+        # only the schedule is needed when the feature table is not rebuilt
+        with span("data_prep.resolve_dataset", create_csv=create_csv):
+            files = DATASET_FILES + ([PLAYER_STATS_FILE] if self.player_features else [])
+            data_path = self.dataset.resolve(files if create_csv else [SCHEDULE_FILE], refresh=refresh)
         
         if create_csv:
-            print("Creating feature table...")
+            if incremental and self.load_rolling_state() is not None:
+                print("Updating feature table...")
+                self.update_feature_table(data_path)
+            else:
+                print("Creating feature table...")
+                self.build_feature_table(data_path)
+        
+        with span("data_prep.load_store") as load_span:
+            self.store = FeatureStore(FEATURE_STORE_PATH)
+            self._matrices = {}
+            self.df = self.store.to_frame()
+            load_span.set(rows=len(self.store))
+        # a store built with the roster strength columns keeps them in schedule lookups too
+        self.player_features = set(PLAYER_FEATURE_COLS) <= set(self.store.feature_cols)
+
+        if export_csv:
+            with span("data_prep.export_csv", rows=len(self.store)):
+                self.store.export_csv(FEATURE_PATH)
+
+        with span("data_prep.read_schedule"):
+            self.game_schedule = pd.read_csv(os.path.join(data_path, SCHEDULE_FILE))
+
+        # rows are stored in date order, so both splits are plain slices
+        if self.evaluate:
+            cutoff = self.store.row_index(TRAIN_CUTOFF)
+            self.train_rows = slice(0, cutoff)
+            self.test_rows = slice(cutoff, len(self.store))
+            self.test_df = self.df.iloc[self.test_rows]
+        else:
+            self.train_rows = slice(0, len(self.store))
+        self.train_df = self.df.iloc[self.train_rows]
             
-            games = pd.read_csv(data_path + "/Games.csv")
-            games = games[games["gameType"] != "Playoffs"]
-            games["result"] = (games["hometeamId"] == games["winner"]).astype(int)
 
-            games = games[GAME_FEATURE_COLS_RAW]
+    def build_feature_table(self, data_path):
+        """Rebuild the whole feature table and rolling state from the raw CSVs."""
+        with span("data_prep.read_games"):
+            games = self.read_games(data_path)
+        with span("data_prep.read_team_stats") as read_span:
+            team_stats = self.read_team_stats(data_path)
+            read_span.set(rows=len(team_stats))
 
-            team_stats = pd.read_csv(data_path + "/TeamStatistics.csv")
+        with span("data_prep.rolling_features", rows=len(games), features=len(STORE_FEATURE_COLS)):
+            index = self.build_feature_index(team_stats)
+            games = self.add_features(games, team_stats, index)
+        if self.player_features:
+            games = self.add_player_features(games, self.stream_player_stats(data_path))
+        with span("data_prep.write_store", rows=len(games)):
+            write_feature_store(games, FEATURE_STORE_PATH, self.store_feature_cols)
 
-            team_stats_sorted = team_stats.sort_values(by="gameDate", ascending=False)
+        with span("data_prep.save_rolling_state"):
+            self.save_rolling_state(team_stats, team_stats["gameDate"].max(), index)
+        print("Wrote feature table to file")
 
-            home_stats = team_stats_sorted[team_stats_sorted["home"] == 1].copy()
-            away_stats = team_stats_sorted[team_stats_sorted["home"] == 0].copy()
+    def update_feature_table(self, data_path):
+        """Append features for games newer than the stored high-water mark."""
+        state, high_water, ewm_seeds = self.load_rolling_state()
 
-            opp_home_stats = away_stats[["gameId", "reboundsDefensive", "reboundsOffensive"]].rename(
-                columns={"reboundsDefensive": "reboundsDefensive_opp", "reboundsOffensive": "reboundsOffensive_opp"}
-            )
-            opp_away_stats = home_stats[["gameId", "reboundsDefensive", "reboundsOffensive"]].rename(
-                columns={"reboundsDefensive": "reboundsDefensive_opp", "reboundsOffensive": "reboundsOffensive_opp"}
-            )
+        with span("data_prep.read_games"):
+            games = self.read_games(data_path, after=high_water)
 
-            home_stats = home_stats.merge(opp_home_stats, on="gameId", how="left")
-            away_stats = away_stats.merge(opp_away_stats, on="gameId", how="left")
+        with span("data_prep.read_team_stats"):
+            new_stats = self.read_team_stats(data_path, after=high_water)
 
-            home_agg = self.get_rolling_stats(games, home_stats, True)
-            away_agg = self.get_rolling_stats(games, away_stats, False)
+        if new_stats.empty:
+            print("Feature table is already up to date")
+            return
 
-            games["home_efg"] = (home_agg["fieldGoalsMade"] + 0.5 * home_agg["threePointersMade"]) / home_agg["fieldGoalsAttempted"]
-            games["away_efg"] = (away_agg["fieldGoalsMade"] + 0.5 * away_agg["threePointersMade"]) / away_agg["fieldGoalsAttempted"]
+        team_stats = pd.concat([state, new_stats], ignore_index=True)
+        # the EWMAs carry on from where the state's rows start
+        index = self.build_feature_index(team_stats, ewm_seeds)
+        # playoff box scores still move the player state on, even with no new games to store
+        roster = self.stream_player_stats(data_path, after=high_water) if self.player_features else None
+        if not games.empty:
+            with span("data_prep.rolling_features", rows=len(games), features=len(STORE_FEATURE_COLS)):
+                games = self.add_features(games, team_stats, index)
+            if self.player_features:
+                games = self.add_player_features(games, roster)
+            with span("data_prep.append_store", rows=len(games)):
+                append_feature_store(games, FEATURE_STORE_PATH, self.store_feature_cols)
 
-            games["home_tov"] = home_agg["turnovers"] / (home_agg["fieldGoalsAttempted"] + 0.44 * home_agg["freeThrowsAttempted"] + home_agg["turnovers"])
-            games["away_tov"] = away_agg["turnovers"] / (away_agg["fieldGoalsAttempted"] + 0.44 * away_agg["freeThrowsAttempted"] + away_agg["turnovers"])
+        with span("data_prep.save_rolling_state"):
+            self.save_rolling_state(team_stats, new_stats["gameDate"].max(), index)
+        print(f"Appended {len(games)} games to feature table")
 
-            games["home_orb"] = home_agg["reboundsOffensive"] / (home_agg["reboundsOffensive"] + home_agg["reboundsDefensive_opp"])
-            games["away_orb"] = away_agg["reboundsOffensive"] / (away_agg["reboundsOffensive"] + away_agg["reboundsDefensive_opp"])
+    def read_games(self, data_path, after=None):
+        """Regular season games in date order with the home win label, only those after a date if given."""
+        def keep(chunk):
+            mask = chunk["gameType"] != "Playoffs"
+            return mask if after is None else mask & (chunk["gameDate"] > after)
 
-            games["home_ft"] = home_agg["freeThrowsMade"] / home_agg["freeThrowsAttempted"]
-            games["away_ft"] = away_agg["freeThrowsMade"] / away_agg["freeThrowsAttempted"]
+        games = read_columns(os.path.join(data_path, GAMES_FILE), GAMES_DTYPES, ["gameDate"], keep,
+                             columns=["gameId", "gameDate", "hometeamId", "awayteamId", "winner"])
+        games["result"] = (games["hometeamId"] == games["winner"]).astype(np.int8)
 
-            games.to_csv(FEATURE_PATH, index=False)
-            print("Wrote feature table to file")
-        
-        self.df = pd.read_csv(FEATURE_PATH)
+        games = games[GAME_FEATURE_COLS_RAW]
+        return games.sort_values(["gameDate", "gameId"], kind="mergesort", ignore_index=True)
 
-        #hacky
-        self.df = self.df.replace([np.inf, -np.inf], np.nan).dropna()
+    def read_team_stats(self, data_path, after=None):
+        """Home and away team box scores with their opponent's rebounds, only those after a date if given.
 
-        self.game_schedule = pd.read_csv(data_path + "/LeagueSchedule25_26.csv")
+        Streamed in chunks of the needed columns only, so the wide raw table
+        is never in memory; dates come back as int64 epoch seconds.
+        """
+        def keep(chunk):
+            mask = chunk["home"].isin([HOME, AWAY])
+            return mask if after is None else mask & (chunk["gameDate"] > after)
 
-        if self.evaluate:
-            self.train_df = self.df[self.df["gameDate"] < TRAIN_CUTOFF].copy()
-            self.test_df = self.df[self.df["gameDate"] >= TRAIN_CUTOFF].copy()
-        else:
-            self.train_df = self.df
-            
+        stats = read_columns(os.path.join(data_path, TEAM_STATS_FILE), TEAM_STATS_DTYPES, ["gameDate"], keep)
+        return add_opponent_stats(stats)[ROLLING_STATE_COLS]
+
+    def add_features(self, games, team_stats, index=None):
+        """Add the whole feature bank of rolling Four Factors for both teams to games.
+
+        index is the build_feature_index() of team_stats, if already built.
+        """
+        index = index if index is not None else self.build_feature_index(team_stats)
+        games[STORE_FEATURE_COLS] = self.feature_bank(index, games["hometeamId"], games["awayteamId"],
+                                                      games["gameDate"], games["gameId"], labels=games.index)
+        return games
+
+    def stream_player_stats(self, data_path, after=None) -> pd.DataFrame:
+        """Roster strength going into every game after a date (all games if None), from the player box scores.
+
+        Continues from the saved player state when after is given. The file
+        is streamed, so memory does not grow with its size.
+        """
+        def keep(chunk):
+            return chunk["gameDate"] > after
+
+        # every game, playoffs included, moves the players' rolling Game Scores on
+        games = read_columns(os.path.join(data_path, GAMES_FILE),
+                             {col: GAMES_DTYPES[col] for col in ("gameId", "hometeamId", "awayteamId")},
+                             ["gameDate"], keep if after is not None else None)
+        state = RosterStrength.load(PLAYER_STATE_PATH) if after is not None else None
+
+        with span("data_prep.player_stats", games=len(games)) as player_span:
+            roster, self.roster_strength, stats = stream_roster_strength(os.path.join(data_path, PLAYER_STATS_FILE),
+                                                                         games, state)
+            player_span.set(**stats)
+        self.player_stream_stats = stats
+        print(f"Aggregated {stats['rows']:,} player box score rows in {stats['seconds']:.1f}s "
+              f"({stats['rows_per_sec']:,.0f} rows/s)")
+        return roster
+
+    def add_player_features(self, games, roster):
+        """Add PLAYER_FEATURE_COLS to games from stream_player_stats() output.
+
+        Games before a team's first box score get 0, since rows with any
+        missing feature are left out of the store.
+        """
+        games = games.merge(roster, on="gameId", how="left")
+        games[PLAYER_FEATURE_COLS] = games[PLAYER_FEATURE_COLS].fillna(0.0)
+        return games
+
+    def feature_bank(self, index, home_team_ids, away_team_ids, dates, game_ids=None, labels=None):
+        """STORE_FEATURE_COLS for matchups on dates, every window and EWMA from one lookup per team.
+
+        Games in game_ids that are already in the index are left out of their own windows.
+        """
+        windows = sorted(set(FEATURE_WINDOWS) | {N_GAMES})
+        home_bank = index.query_bank(home_team_ids, HOME, dates, game_ids, windows)
+        away_bank = index.query_bank(away_team_ids, AWAY, dates, game_ids, windows)
+        return four_factor_bank(home_bank, away_bank, labels)
+
+    def build_feature_index(self, team_stats, ewm_seeds=None):
+        """Point-in-time index over team stat rows that already have their opponent columns.
+
+        ewm_seeds continues the EWMAs of an earlier index (see load_rolling_state).
+        """
+        return TeamFeatureIndex(team_stats, STAT_COLS, N_GAMES, EWM_ALPHAS, ewm_seeds)
+
+    def load_feature_index(self, data_path):
+        """Index every team box score in the dataset for live "features as of date" lookups."""
+        with span("data_prep.load_feature_index") as index_span:
+            self.feature_index = self.build_feature_index(self.read_team_stats(data_path))
+            index_span.set(rows=len(self.feature_index))
+        if self.player_features:
+            self.roster_strength = RosterStrength.load(PLAYER_STATE_PATH)
+        return self.feature_index
+
+    def features_as_of(self, home_team_ids, away_team_ids, dates, game_ids=None):
+        """store_feature_cols for matchups played on dates, from the loaded feature index.
+
+        game_ids leaves games that were already played out of their own
+        windows, as in the stored features. Roster strength is each team's
+        latest, so it only holds for games after the last stored one.
+        """
+        features = self.feature_bank(self.feature_index, home_team_ids, away_team_ids, dates, game_ids)
+        if self.player_features:
+            for col, team_ids in zip(PLAYER_FEATURE_COLS, (home_team_ids, away_team_ids)):
+                features[col] = (self.roster_strength.current(team_ids) if self.roster_strength is not None
+                                 else np.nan)
+        return features
+
+    def get_schedule_data(self, start=None, end=None):
+        """Scheduled matchups from start to end (inclusive dates) and their features as of each game.
+
+        Returns (schedule, features) with aligned rows. Features are NaN for
+        teams without any history. Games already played get the features
+        stored for them: their own box scores are left out, and their
+        roster strength is the one going into the game, not the latest.
+        """
+        schedule = self.game_schedule
+        date_col = next(col for col in SCHEDULE_DATE_COLS if col in schedule.columns)
+        schedule = schedule.rename(columns={date_col: "gameDate"})[SCHEDULE_COLS]
+
+        dates = to_epoch_seconds(schedule["gameDate"])
+        keep = np.ones(len(schedule), dtype=bool)
+        if start is not None:
+            keep &= dates >= to_epoch_seconds(start)
+        if end is not None:
+            keep &= dates < to_epoch_seconds(end) + 24 * 60 * 60
+        schedule = schedule[keep].reset_index(drop=True)
+
+        if self.feature_index is None:
+            self.load_feature_index(self.dataset.resolve([TEAM_STATS_FILE]))
+
+        with span("data_prep.schedule_features", rows=len(schedule)):
+            features = self.features_as_of(schedule["hometeamId"], schedule["awayteamId"], dates[keep],
+                                           schedule["gameId"])
+            if self.player_features and self.store is not None:
+                stored = pd.Index(self.store.columns["gameId"]).get_indexer(schedule["gameId"])
+                played = stored >= 0
+                features.loc[played, PLAYER_FEATURE_COLS] = self.store.feature_matrix(PLAYER_FEATURE_COLS)[stored[played]]
+        features = features.replace([np.inf, -np.inf], np.nan).astype(np.float32)
+        return schedule, features
+
+    def save_rolling_state(self, team_stats, high_water, index=None):
+        """Keep each team's last ROLLING_STATE_ROWS home and away stat rows next to the feature table.
+
+        That covers the longest window. The EWMAs are kept as their values
+        just before those rows, taken from index (the build_feature_index()
+        of team_stats), so the next update continues the exact recursion a
+        full rebuild runs.
+        """
+        index = index if index is not None else self.build_feature_index(team_stats)
+        # deduplicated and ordered like the index's rows, so the kept rows are the ones the seeds precede
+        state = team_stats[ROLLING_STATE_COLS].drop_duplicates(["gameId", "teamId", "home"])
+        state = state.sort_values(["teamId", "home", "gameDate"], kind="mergesort")
+        state = state.groupby(["teamId", "home"]).tail(ROLLING_STATE_ROWS)
+        state.to_csv(ROLLING_STATE_PATH, index=False)
+
+        seeds = index.ewm_state(ROLLING_STATE_ROWS)
+        groups = np.array(list(seeds), dtype=np.int64).reshape(-1, 2)
+        with open(ROLLING_EWM_PATH, "wb") as f:
+            np.savez(f, venues=groups[:, 0], teams=groups[:, 1],
+                     seeds=np.array(list(seeds.values())).reshape(len(seeds), len(EWM_ALPHAS), len(STAT_COLS)))
+
+        if self.player_features:
+            self.roster_strength.save(PLAYER_STATE_PATH)
+
+        with open(ROLLING_STATE_META_PATH, "w") as f:
+            json.dump({"high_water": int(high_water), "n_games": N_GAMES, "windows": FEATURE_WINDOWS,
+                       "alphas": EWM_ALPHAS, "state_rows": ROLLING_STATE_ROWS, "ewm_seeds": True,
+                       "player_features": self.player_features}, f)
+
+    def load_rolling_state(self):
+        """Return (state rows, high-water date, EWMA seeds), or None when there is no usable state."""
+        if not (os.path.exists(ROLLING_STATE_PATH) and os.path.exists(ROLLING_STATE_META_PATH)
+                and os.path.exists(ROLLING_EWM_PATH) and feature_store_exists(FEATURE_STORE_PATH)):
+            return None
+
+        with open(ROLLING_STATE_META_PATH) as f:
+            meta = json.load(f)
+
+        # a different feature bank invalidates every stored feature, and so
+        # does a state from before dates were kept as epoch seconds
+        if (not isinstance(meta["high_water"], int) or meta["n_games"] != N_GAMES or meta.get("windows") != FEATURE_WINDOWS
+                or meta.get("alphas") != EWM_ALPHAS or meta.get("state_rows", 0) < ROLLING_STATE_ROWS):
+            return None
+        # as does one whose EWMAs were cut off rather than kept
+        if not meta.get("ewm_seeds", False):
+            return None
+        # so does adding or dropping the roster strength columns
+        if meta.get("player_features", False) != self.player_features:
+            return None
+        if self.player_features and RosterStrength.load(PLAYER_STATE_PATH) is None:
+            return None
+
+        with np.load(ROLLING_EWM_PATH) as data:
+            ewm_seeds = {(int(venue), int(team)): seed
+                         for venue, team, seed in zip(data["venues"], data["teams"], data["seeds"])}
+        return pd.read_csv(ROLLING_STATE_PATH), meta["high_water"], ewm_seeds
 
     def get_rolling_stats(self, games_df, stats_df, is_home):
+        """Average of each team's last N_GAMES stat rows before every game in games_df."""
+        team_col = "hometeamId" if is_home else "awayteamId"
+        venue = HOME if is_home else AWAY
+
+        index = self.build_feature_index(stats_df)
+        return index.query_frame(games_df[team_col], venue, games_df["gameDate"], games_df["gameId"], index=games_df.index)
+
+    def get_rolling_stats_loop(self, games_df, stats_df, is_home):
+        """Reference per-game implementation of get_rolling_stats.
+
+        Kept for checking the indexed version against; it is far too slow
+        for full rebuilds. stats_df has to be one venue's rows, newest first.
+        """
         results = []
-        stat_cols = ["fieldGoalsMade", "fieldGoalsAttempted", "threePointersMade", "turnovers", 
-                    "freeThrowsMade", "freeThrowsAttempted", "assists", "reboundsDefensive", 
-                    "reboundsOffensive", "reboundsDefensive_opp", "reboundsOffensive_opp"]
-        
+
         team_col = "hometeamId" if is_home else "awayteamId"
         
         for _, game in games_df.iterrows():
@@ -113,25 +487,61 @@ class RecommenderDataPrep:
             team_games = stats_df[mask].head(N_GAMES)
             
             if len(team_games) > 0:
-                agg = team_games[stat_cols].sum() / N_GAMES
+                agg = team_games[STAT_COLS].astype(np.float64).sum() / N_GAMES
             else:
-                agg = pd.Series({col: 0 for col in stat_cols})
+                agg = pd.Series({col: 0 for col in STAT_COLS})
             
             results.append(agg)
         
-        return pd.DataFrame(results, index=games_df.index)
+        return pd.DataFrame(results, index=games_df.index, columns=STAT_COLS)
 
     def get_training_data(self, model_feature_cols: list):
-        """Get training features and target."""
-        X_train = self.train_df[model_feature_cols].astype(float)
-        y_train = self.train_df[self.target_col].astype(int)
+        """Get training features and target as views of the feature store."""
+        X_train = self.get_feature_frame(model_feature_cols, self.train_rows)
+        y_train = pd.Series(self.store.columns[self.target_col][self.train_rows], name=self.target_col, copy=False)
         return X_train, y_train
     
     def get_test_data(self, model_feature_cols):
         if self.evaluate:
-            X_test = self.test_df[model_feature_cols]
+            X_test = self.get_feature_frame(model_feature_cols, self.test_rows)
             return X_test
+
+    def get_feature_matrix(self, model_feature_cols: list, split: str = "train") -> FeatureMatrix:
+        """Shared model-ready matrix of model_feature_cols over the train or test split.
+
+        Built once per column set and split, with the standardizing scaler
+        fitted on the training split, so every model in a run reuses the same
+        arrays instead of copying and scaling the features itself.
+        """
+        if split not in ("train", "test"):
+            raise ValueError(f"split must be 'train' or 'test', got {split!r}")
+        rows = self.train_rows if split == "train" else self.test_rows
+        if rows is None:
+            raise ValueError("there is no test split unless evaluating")
+        key = (tuple(model_feature_cols), split, rows.start, rows.stop)
+        if key not in self._matrices:
+            scaler = None if split == "train" else self.get_feature_matrix(model_feature_cols, "train").scaler
+            with span("data_prep.feature_matrix", split=split, rows=rows.stop - rows.start, features=len(model_feature_cols)):
+                values = self.store.feature_matrix(model_feature_cols, rows.start, rows.stop)
+                self._matrices[key] = FeatureMatrix.build(values, model_feature_cols, scaler)
+        return self._matrices[key]
+
+    def get_feature_frame(self, model_feature_cols, rows):
+        """DataFrame of model_feature_cols over a row slice, without copying when the columns are contiguous."""
+        return self.store.feature_frame(model_feature_cols, rows.start, rows.stop)
     
+    def training_data_hash(self, rows: slice = None):
+        """sha256 of the training rows (or rows) of every stored column, for telling when models are stale."""
+        rows = rows if rows is not None else self.train_rows
+        digest = hashlib.sha256()
+        digest.update(json.dumps(self.store.feature_cols).encode())
+        for values in self.store.columns.values():
+            digest.update(memoryview(values[rows]))
+        # columns of the column-major feature matrix are contiguous, so none of this copies
+        for i in range(len(self.store.feature_cols)):
+            digest.update(memoryview(self.store.features[rows, i]))
+        return digest.hexdigest()
+
     def get_test_results(self):
         return self.test_df[self.target_col]
 
@@ -0,0 +1,130 @@
+"""Local cache of the raw Kaggle dataset files.
+
+Files live in one root directory next to a manifest of their sizes and
+sha256 hashes. kagglehub is only imported and called when the manifest is
+missing or no longer matches the files on disk, when it is older than
+max_age_hours (NBA_DATA_MAX_AGE), or when a refresh is asked for, as the
+nightly update does. In offline mode the files are read straight from the
+root directory and nothing is downloaded, which is also how a stand-in
+directory of small CSVs is used for tests.
+"""
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime, timezone
+from instrumentation import span
+
+DATASET_HANDLE = "eoinamoore/historical-nba-data-and-player-box-scores"
+
+GAMES_FILE = "Games.csv"
+TEAM_STATS_FILE = "TeamStatistics.csv"
+SCHEDULE_FILE = "LeagueSchedule25_26.csv"
+DATASET_FILES = [GAMES_FILE, TEAM_STATS_FILE, SCHEDULE_FILE]
+# per-player box scores, only needed for the optional roster strength features
+PLAYER_STATS_FILE = "PlayerStatistics.csv"
+
+# overridable so scoring boxes can point at a pre-populated directory
+DEFAULT_ROOT = os.environ.get("NBA_DATA_ROOT", "data/raw")
+DEFAULT_OFFLINE = os.environ.get("NBA_OFFLINE", "0") == "1"
+# hours after which the cached files are downloaded again; unset keeps them until refreshed
+DEFAULT_MAX_AGE = float(os.environ["NBA_DATA_MAX_AGE"]) if os.environ.get("NBA_DATA_MAX_AGE") else None
+MANIFEST_FILE = "manifest.json"
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Resolves dataset files from a local root directory, downloading only when needed."""
+
+    def __init__(self, root: str = None, offline: bool = None, verify_hashes: bool = False,
+                 max_age_hours: float = None):
+        self.root = root if root is not None else DEFAULT_ROOT
+        self.offline = offline if offline is not None else DEFAULT_OFFLINE
+        self.max_age_hours = max_age_hours if max_age_hours is not None else DEFAULT_MAX_AGE
+        # hashing the full box score history is slow, so by default only sizes are compared
+        self.verify_hashes = verify_hashes
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, MANIFEST_FILE)
+
+    def resolve(self, files: list = None, refresh: bool = False) -> str:
+        """Return the directory holding files, downloading first if the cache is missing or stale.
+
+        refresh downloads the latest files whatever the cache holds, unless offline.
+        """
+        files = files if files is not None else DATASET_FILES
+
+        if self.offline:
+            missing = [name for name in files if not os.path.exists(os.path.join(self.root, name))]
+            if missing:
+                raise FileNotFoundError(f"Offline mode but {missing} not found in {self.root}")
+            return self.root
+
+        if refresh or not self.is_fresh(files):
+            self.download(files)
+        return self.root
+
+    def is_fresh(self, files: list) -> bool:
+        """True if the manifest exists, is younger than max_age_hours and matches every file in files."""
+        manifest = self.read_manifest()
+        if manifest is None:
+            return False
+        if self.max_age_hours is not None:
+            age = datetime.now(timezone.utc) - datetime.fromisoformat(manifest["created"])
+            if age.total_seconds() > self.max_age_hours * 60 * 60:
+                return False
+
+        for name in files:
+            entry = manifest["files"].get(name)
+            path = os.path.join(self.root, name)
+            if entry is None or not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+                return False
+            if self.verify_hashes and file_sha256(path) != entry["sha256"]:
+                return False
+        return True
+
+    def read_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def write_manifest(self, files: list = None):
+        """Record the size and hash of files as they are now in the root directory."""
+        files = files if files is not None else DATASET_FILES
+        entries = {}
+        for name in files:
+            path = os.path.join(self.root, name)
+            entries[name] = {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+
+        manifest = {
+            "dataset": DATASET_HANDLE,
+            "created": datetime.now(timezone.utc).isoformat(),
+            "files": entries,
+        }
+        with open(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+
+    def download(self, files: list = None):
+        """Fetch the dataset with kagglehub and copy DATASET_FILES and any other files into the root directory."""
+        import kagglehub
+
+        print(f"Downloading {DATASET_HANDLE}...")
+        with span("dataset_cache.download", dataset=DATASET_HANDLE):
+            download_path = kagglehub.dataset_download(DATASET_HANDLE)
+
+        files = DATASET_FILES + [name for name in files or [] if name not in DATASET_FILES]
+        os.makedirs(self.root, exist_ok=True)
+        for name in files:
+            shutil.copy2(os.path.join(download_path, name), os.path.join(self.root, name))
+        self.write_manifest(files)
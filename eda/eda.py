@@ -1,102 +1,369 @@
-import pandas as pd
+"""Exploratory summaries and plots of the feature table.
+
+Works on the same memory-mapped feature store the models train on, never
+the raw CSVs. Everything that needs a pass over every row (per-season home
+win rates, column summaries, the correlation matrix and per-outcome
+histograms of the home-minus-away differences) is computed in chunks of
+CHUNK_ROWS and cached as JSON under a hash of the store's contents, so a
+rerun on unchanged data only hashes the store. Scatter plots and the 2-D
+projection are drawn from a sample of at most --sample games, stratified by
+season and outcome, and the projection of a sample is cached as well.
+
+The projection is UMAP when umap-learn is installed and PCA otherwise.
+Figures are written to --out and never shown, so it runs headless.
+
+    python -m eda.eda
+    python -m eda.eda --features ewm0.2 --sample 5000 --format html
+"""
+import os
+import json
+import hashlib
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import umap
-from sklearn.preprocessing import StandardScaler
-
-
-
-# Everything below is for the old dataset
-games = pd.read_csv('data/games.csv')
-details = pd.read_csv('data/games_details.csv')
-teams = pd.read_csv('data/teams.csv')
-
-print(f"games.csv entry count: {len(games)}")
-print(f"games_details.csv entry count: {len(details)}")
-print(f"teams.csv entry count: {len(teams)}")
-
-print(games.duplicated(subset=["GAME_ID"]).sum())
-
-missing_games = games.isnull().mean().sort_values(ascending=False)
-print("\nMissing values in games.csv:")
-print(missing_games[missing_games > 0])
-
-missing_details = details.isnull().mean().sort_values(ascending=False)
-print("\nMissing values in games_details.csv (top 10):")
-print(missing_details.head(10))
-
-win_rate = games['HOME_TEAM_WINS'].mean()
-print(f"\nHome team win rate: {win_rate:.2%}")
-
-team_stats = details.groupby(['GAME_ID', 'TEAM_ID']).agg({
-    'PTS': 'sum',
-    'REB': 'sum',
-    'AST': 'sum',
-    'TO': 'sum',
-    'STL': 'sum',
-    'BLK': 'sum',   
-    'FG_PCT': 'mean',
-    'FT_PCT': 'mean',
-    'FG3_PCT': 'mean'
-}).reset_index()
-
-home = team_stats.merge(games[['GAME_ID','HOME_TEAM_ID']], left_on=['GAME_ID','TEAM_ID'], right_on=['GAME_ID','HOME_TEAM_ID'], how='inner')
-away = team_stats.merge(games[['GAME_ID','VISITOR_TEAM_ID']], left_on=['GAME_ID','TEAM_ID'], right_on=['GAME_ID','VISITOR_TEAM_ID'], how='inner')
-
-home = home.add_suffix('_home')
-away = away.add_suffix('_away')
-
-merged = home.merge(away, left_on='GAME_ID_home', right_on='GAME_ID_away', how='inner').rename(columns={'GAME_ID_home':'GAME_ID'})
-
-merged = merged.merge(games[['GAME_ID','HOME_TEAM_WINS']], on='GAME_ID')
-merged['label'] = merged['HOME_TEAM_WINS']
-
-diff_cols = ['PTS', 'REB', 'AST', 'TO', 'STL', 'BLK', 'FG_PCT', 'FT_PCT', 'FG3_PCT']
-for col in diff_cols:
-    merged[f'{col}_diff'] = merged[f'{col}_home'] - merged[f'{col}_away']
-
-plt.figure(figsize=(12,5))
-sns.countplot(x='label', data=merged, palette='coolwarm')
-plt.title('Home Team Win vs Loss Count')
-plt.xlabel('Home Team Win (1) or Loss (0)')
-plt.ylabel('Games')
-plt.show()
-
-plt.figure(figsize=(10,5))
-sns.histplot(merged['PTS_diff'], bins=40, kde=True)
-plt.title('Distribution of Points Difference (Home - Away)')
-plt.xlabel('Points Difference')
-plt.show()
-
-plt.figure(figsize=(10,7))
-corr = merged[[f'{col}_diff' for col in diff_cols] + ['label']].corr()
-sns.heatmap(corr, annot=True, cmap='coolwarm', center=0)
-plt.title('Correlation Heatmap of Feature Differences and Win Label')
-plt.show()
-
-plt.figure(figsize=(8,6))
-sns.scatterplot(
-    x='REB_diff', y='AST_diff',
-    hue='label', data=merged,
-    alpha=0.6, palette='coolwarm'
-)
-plt.title('Rebounds vs Assists Difference by Game Outcome')
-plt.xlabel('Rebounds Difference (Home - Away)')
-plt.ylabel('Assists Difference (Home - Away)')
-plt.show()
-
-X = merged[[f'{col}_diff' for col in diff_cols]].fillna(0)
-X_scaled = StandardScaler().fit_transform(X)
-
-reducer = umap.UMAP(n_neighbors=15, min_dist=0.1, random_state=42)
-embedding = reducer.fit_transform(X_scaled)
-
-plt.figure(figsize=(10,7))
-sns.scatterplot(x=embedding[:,0], y=embedding[:,1], hue=merged['label'], palette='coolwarm', alpha=0.7)
-plt.title('UMAP Projection of Game-Level Features')
-plt.xlabel(None)
-plt.ylabel(None)
-plt.legend(title='Home Win')
-plt.show()
+import pandas as pd
+from data_prep import FEATURE_STORE_PATH, TARGET_COL, N_GAMES, FEATURE_FAMILIES, feature_family
+from feature_store import FeatureStore, feature_store_exists, to_epoch_seconds, from_epoch_seconds
+from backtest import SEASON_START
+from ingest import CHUNK_ROWS
+from instrumentation import span
+
+EDA_CACHE_PATH = "data/eda"
+EDA_OUT = "out/eda"
+SAMPLE_ROWS = 20_000
+HIST_BINS = 60
+PROJECTIONS = ("auto", "umap", "pca")
+DEFAULT_SEED = 42
+
+
+def store_hash(store: FeatureStore) -> str:
+    """sha256 of the stored columns and features."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(store.feature_cols).encode())
+    for name in sorted(store.columns):
+        digest.update(memoryview(np.ascontiguousarray(store.columns[name])))
+    # the features are column-major, so the transpose is the contiguous view
+    digest.update(memoryview(store.features.T))
+    return digest.hexdigest()
+
+
+def diff_columns(feature_cols: list) -> dict:
+    """{"<stat>_diff": (home column index, away column index)} of every home_/away_ pair in feature_cols."""
+    out = {}
+    for i, col in enumerate(feature_cols):
+        if col.startswith("home_") and "away_" + col[5:] in feature_cols:
+            out[col[5:] + "_diff"] = (i, feature_cols.index("away_" + col[5:]))
+    return out
+
+
+def season_codes(dates) -> np.ndarray:
+    """The season (year it starts in) of every epoch-second date."""
+    dates = np.asarray(dates)
+    first = pd.Timestamp(int(dates.min()), unit="s").year - 1
+    last = pd.Timestamp(int(dates.max()), unit="s").year
+    years = np.arange(first, last + 1)
+    starts = to_epoch_seconds([SEASON_START.format(year) for year in years])
+    return years[np.searchsorted(starts, dates, side="right") - 1]
+
+
+def _block(store, diffs, start, stop, features=True) -> np.ndarray:
+    """Rows start:stop of the features, their home-minus-away differences and the label, as float64.
+
+    Without features only the differences and the label.
+    """
+    rows = store.features[start:stop]
+    home, away = [list(idx) for idx in zip(*diffs.values())] if diffs else ([], [])
+    return np.hstack(([rows.astype(np.float64)] if features else [])
+                     + [rows[:, home].astype(np.float64) - rows[:, away],
+                        store.columns[TARGET_COL][start:stop, None].astype(np.float64)])
+
+
+def aggregate(store: FeatureStore, bins: int = HIST_BINS, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """Per-season, per-column and pairwise summaries of the whole store, as a JSON-ready dict."""
+    diffs = diff_columns(store.feature_cols)
+    columns = store.feature_cols + list(diffs) + [TARGET_COL]
+    n_rows = len(store)
+    y = store.columns[TARGET_COL]
+
+    # moments and cross-products around the first chunk's means, which keeps the
+    # covariance from being a small difference of large sums
+    shift = _block(store, diffs, 0, min(chunk_rows, n_rows)).mean(axis=0)
+    total = np.zeros(len(columns))
+    gram = np.zeros((len(columns), len(columns)))
+    low = np.full(len(columns), np.inf)
+    high = np.full(len(columns), -np.inf)
+    for start in range(0, n_rows, chunk_rows):
+        block = _block(store, diffs, start, start + chunk_rows)
+        low = np.minimum(low, block.min(axis=0))
+        high = np.maximum(high, block.max(axis=0))
+        block -= shift
+        total += block.sum(axis=0)
+        gram += block.T @ block
+
+    mean = total / n_rows
+    cov = gram / n_rows - np.outer(mean, mean)
+    std = np.sqrt(np.clip(np.diag(cov), 0, None))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = cov / np.outer(std, std)
+    mean += shift
+
+    # per-outcome histograms of the differences, every column binned in one bincount
+    diff_cols = slice(len(store.feature_cols), len(store.feature_cols) + len(diffs))
+    edges = np.linspace(low[diff_cols], high[diff_cols], bins + 1, axis=1)
+    width = np.where(high[diff_cols] > low[diff_cols], (high[diff_cols] - low[diff_cols]) / bins, 1.0)
+    counts = np.zeros(len(diffs) * 2 * bins, dtype=np.int64)
+    offsets = np.arange(len(diffs)) * 2 * bins
+    for start in range(0, n_rows, chunk_rows):
+        block = _block(store, diffs, start, start + chunk_rows, features=False)
+        at = np.clip(((block[:, :-1] - low[diff_cols]) / width).astype(np.int64), 0, bins - 1)
+        at += offsets + bins * block[:, -1:].astype(np.int64)
+        counts += np.bincount(at.ravel(), minlength=len(counts))
+    counts = counts.reshape(len(diffs), 2, bins)
+
+    seasons = season_codes(store.columns["gameDate"])
+    games = pd.Series(np.asarray(y, dtype=np.int64)).groupby(seasons).agg(["size", "mean"])
+
+    return {
+        "rows": n_rows,
+        "first_date": from_epoch_seconds(store.columns["gameDate"][:1])[0],
+        "last_date": from_epoch_seconds(store.columns["gameDate"][-1:])[0],
+        "home_win_rate": float(mean[-1]),
+        "seasons": {str(season): {"games": int(row["size"]), "home_win_rate": float(row["mean"])}
+                    for season, row in games.iterrows()},
+        "columns": columns,
+        "summary": {col: {"mean": float(mean[i]), "std": float(std[i]), "min": float(low[i]), "max": float(high[i])}
+                    for i, col in enumerate(columns)},
+        "correlation": [[None if np.isnan(value) else float(value) for value in row] for row in corr],
+        "histograms": {col: {"edges": edges[i].tolist(), "losses": counts[i, 0].tolist(), "wins": counts[i, 1].tolist()}
+                       for i, col in enumerate(diffs)},
+    }
+
+
+def stratified_sample(store: FeatureStore, cap: int = SAMPLE_ROWS, seed: int = DEFAULT_SEED) -> np.ndarray:
+    """Sorted row indices of at most cap games, each (season, outcome) getting its share of the rows."""
+    n_rows = len(store)
+    if n_rows <= cap:
+        return np.arange(n_rows)
+    rng = np.random.default_rng(seed)
+    y = np.asarray(store.columns[TARGET_COL])
+    seasons = season_codes(store.columns["gameDate"])
+    # rows are in date order, so every season is a contiguous run
+    bounds = np.flatnonzero(np.diff(seasons)) + 1
+    starts, stops = np.concatenate([[0], bounds]), np.concatenate([bounds, [n_rows]])
+    strata = [(start, stop, label) for start, stop in zip(starts, stops) for label in (0, 1)]
+    sizes = np.array([np.count_nonzero(y[start:stop] == label) for start, stop, label in strata])
+
+    # proportional allocation, with the rows left over by rounding down going to the largest remainders
+    quota = sizes * cap / n_rows
+    take = np.floor(quota).astype(np.int64)
+    take[np.argsort(take - quota)[:cap - take.sum()]] += 1
+
+    picked = [rng.choice(start + np.flatnonzero(y[start:stop] == label), n, replace=False)
+              for (start, stop, label), n in zip(strata, take) if n]
+    return np.sort(np.concatenate(picked))
+
+
+def projection_method(projection: str = "auto") -> str:
+    """UMAP when asked for or, for "auto", when umap-learn is installed; PCA otherwise."""
+    if projection != "auto":
+        return projection
+    try:
+        import umap  # noqa: F401
+        return "umap"
+    except ImportError:
+        return "pca"
+
+
+def project(X: np.ndarray, method: str, seed: int = DEFAULT_SEED) -> np.ndarray:
+    """2-D embedding of the standardized rows of X."""
+    from sklearn.preprocessing import StandardScaler
+
+    X = StandardScaler().fit_transform(X)
+    if method == "umap":
+        import umap
+        return umap.UMAP(n_neighbors=15, min_dist=0.1, random_state=seed).fit_transform(X)
+    from sklearn.decomposition import PCA
+    return PCA(n_components=2, random_state=seed).fit_transform(X)
+
+
+class EDACache:
+    """Aggregates and projections of one feature store, kept under a directory named after its hash."""
+
+    def __init__(self, root: str, data_hash: str):
+        self.dir = os.path.join(root, data_hash[:20])
+
+    def path(self, name):
+        return os.path.join(self.dir, name)
+
+    def _replace(self, name, write):
+        # written under a temporary name and moved into place, like the OOF cache
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = self.path(name) + f".{os.getpid()}.tmp"
+        write(tmp)
+        os.replace(tmp, self.path(name))
+
+    def aggregates(self, store, bins, refresh=False) -> dict:
+        name = f"aggregates_{bins}.json"
+        if not refresh and os.path.exists(self.path(name)):
+            with open(self.path(name)) as f:
+                return json.load(f)
+        with span("eda.aggregate", rows=len(store)):
+            result = aggregate(store, bins)
+
+        def write(path):
+            with open(path, "w") as f:
+                json.dump(result, f)
+        self._replace(name, write)
+        return result
+
+    def projection(self, store, feature_cols, rows, method, seed, refresh=False) -> np.ndarray:
+        key = hashlib.sha256(json.dumps([feature_cols, method, seed]).encode())
+        key.update(memoryview(rows))
+        name = f"projection_{method}_{key.hexdigest()[:12]}.npy"
+        if not refresh and os.path.exists(self.path(name)):
+            return np.load(self.path(name))
+        with span("eda.project", rows=len(rows), method=method):
+            embedding = project(np.asarray(store.feature_matrix(feature_cols)[rows], dtype=np.float64), method, seed)
+
+        def write(path):
+            with open(path, "wb") as f:
+                np.save(f, embedding, allow_pickle=False)
+        self._replace(name, write)
+        return embedding
+
+
+def season_figure(aggregates: dict):
+    import plotly.graph_objects as go
+
+    seasons = aggregates["seasons"]
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=list(seasons), y=[s["home_win_rate"] for s in seasons.values()],
+                         customdata=[s["games"] for s in seasons.values()],
+                         hovertemplate="%{x}: %{y:.3f} over %{customdata} games<extra></extra>",
+                         name="Home win rate"))
+    fig.add_hline(y=aggregates["home_win_rate"], line_dash="dash",
+                  annotation_text=f"All games: {aggregates['home_win_rate']:.3f}")
+    fig.update_layout(title="Home Team Win Rate by Season", xaxis_title="Season", yaxis_title="Home win rate",
+                      template="plotly_white", width=900, height=500)
+    return fig
+
+
+def histogram_figure(aggregates: dict, diff_cols: list):
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+
+    cols = 2
+    rows = (len(diff_cols) + cols - 1) // cols
+    fig = make_subplots(rows=rows, cols=cols, subplot_titles=diff_cols)
+    for i, col in enumerate(diff_cols):
+        hist = aggregates["histograms"][col]
+        centers = (np.array(hist["edges"][:-1]) + np.array(hist["edges"][1:])) / 2
+        for outcome, color in (("wins", "#1f77b4"), ("losses", "#d62728")):
+            fig.add_trace(go.Bar(x=centers, y=hist[outcome], name=f"Home {outcome}", marker_color=color,
+                                 opacity=0.6, showlegend=i == 0, legendgroup=outcome),
+                          row=i // cols + 1, col=i % cols + 1)
+    fig.update_layout(title="Home - Away Differences by Game Outcome", barmode="overlay", bargap=0,
+                      template="plotly_white", width=1000, height=300 * rows)
+    return fig
+
+
+def correlation_figure(aggregates: dict, cols: list):
+    import plotly.graph_objects as go
+
+    idx = [aggregates["columns"].index(col) for col in cols]
+    corr = np.array([[aggregates["correlation"][i][j] for j in idx] for i in idx], dtype=np.float64)
+    fig = go.Figure(go.Heatmap(z=corr, x=cols, y=cols, zmin=-1, zmax=1, colorscale="RdBu_r",
+                               text=np.round(corr, 2), texttemplate="%{text}"))
+    fig.update_layout(title="Correlation of the Features and the Home Win Label", template="plotly_white",
+                      width=900, height=800, yaxis_autorange="reversed")
+    return fig
+
+
+def scatter_figure(x, y, labels, x_title, y_title, title):
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    for label, name, color in ((1, "Home win", "#1f77b4"), (0, "Home loss", "#d62728")):
+        mask = labels == label
+        fig.add_trace(go.Scattergl(x=x[mask], y=y[mask], mode="markers", name=name,
+                                   marker=dict(color=color, size=4, opacity=0.5)))
+    fig.update_layout(title=title, xaxis_title=x_title, yaxis_title=y_title, template="plotly_white",
+                      width=900, height=700)
+    return fig
+
+
+def print_summary(aggregates: dict, feature_cols: list, diff_cols: list):
+    print(f"Games: {aggregates['rows']} from {aggregates['first_date']} to {aggregates['last_date']} "
+          f"over {len(aggregates['seasons'])} seasons")
+    print(f"Home team win rate: {aggregates['home_win_rate']:.2%}")
+
+    label = aggregates["columns"].index(TARGET_COL)
+    print("\nCorrelation with the home win label:")
+    for col in sorted(feature_cols + diff_cols,
+                      key=lambda col: -abs(aggregates["correlation"][aggregates["columns"].index(col)][label] or 0)):
+        summary = aggregates["summary"][col]
+        corr = aggregates["correlation"][aggregates["columns"].index(col)][label]
+        corr = "n/a" if corr is None else f"{corr:+.3f}"
+        print(f"  {col:<20} {corr:>7}   mean {summary['mean']:8.4f}  std {summary['std']:7.4f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize and plot the feature table.")
+    parser.add_argument("--features", default=f"w{N_GAMES}", choices=FEATURE_FAMILIES,
+                        help="feature family to plot")
+    parser.add_argument("--sample", type=int, default=SAMPLE_ROWS,
+                        help="most games in the scatter plots and projection, stratified by season and outcome")
+    parser.add_argument("--projection", default="auto", choices=PROJECTIONS,
+                        help="2-D projection of the sample (auto: UMAP if installed, else PCA)")
+    parser.add_argument("--bins", type=int, default=HIST_BINS, help="histogram bins per difference")
+    parser.add_argument("--format", default="png", choices=("png", "svg", "html"), help="figure file format")
+    parser.add_argument("--out", default=EDA_OUT, help="directory the figures are written to")
+    parser.add_argument("--cache-dir", default=EDA_CACHE_PATH, help="where aggregates and projections are cached")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="seed of the sample and projection")
+    parser.add_argument("--refresh", action="store_true", help="recompute instead of reading the cache")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not feature_store_exists(FEATURE_STORE_PATH):
+        raise SystemExit(f"No feature store at {FEATURE_STORE_PATH}; run update_models.py first")
+    store = FeatureStore(FEATURE_STORE_PATH)
+
+    with span("eda.hash", rows=len(store)):
+        cache = EDACache(args.cache_dir, store_hash(store))
+    aggregates = cache.aggregates(store, args.bins, args.refresh)
+
+    feature_cols = feature_family(args.features)
+    diff_cols = list(diff_columns(feature_cols))
+    print_summary(aggregates, feature_cols, diff_cols)
+
+    rows = stratified_sample(store, args.sample, args.seed)
+    method = projection_method(args.projection)
+    embedding = cache.projection(store, feature_cols, rows, method, args.seed, args.refresh)
+
+    sample = pd.DataFrame(store.feature_matrix(feature_cols)[rows], columns=feature_cols)
+    labels = np.asarray(store.columns[TARGET_COL][rows])
+    for diff, (home, away) in diff_columns(feature_cols).items():
+        sample[diff] = sample[feature_cols[home]] - sample[feature_cols[away]]
+    x_col, y_col = diff_cols[:2]
+
+    figures = {
+        "home_win_rate": season_figure(aggregates),
+        "diffs": histogram_figure(aggregates, diff_cols),
+        "correlations": correlation_figure(aggregates, feature_cols + diff_cols + [TARGET_COL]),
+        "scatter": scatter_figure(sample[x_col].to_numpy(), sample[y_col].to_numpy(), labels,
+                                  f"{x_col} (home - away)", f"{y_col} (home - away)",
+                                  f"{x_col} vs {y_col} ({len(rows)} sampled games)"),
+        method: scatter_figure(embedding[:, 0], embedding[:, 1], labels, None, None,
+                               f"{method.upper()} Projection of the {args.features} Features ({len(rows)} sampled games)"),
+    }
+    os.makedirs(args.out, exist_ok=True)
+    paths = {os.path.join(args.out, f"{name}.{args.format}"): fig for name, fig in figures.items()}
+    from evaluate_predictor import write_figures
+    with span("eda.write", figures=len(paths)):
+        write_figures(paths)
+    print(f"\nWrote {len(paths)} figures to {args.out}")
+
 
+if __name__ == "__main__":
+    main()
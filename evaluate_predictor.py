@@ -1,31 +1,36 @@
-import numpy as np
-from models import (
-    SimplePredictor,
-    SVMClassifier,
-    RFClassifier,
-    KNNClassifier,
-    MLPClassifier,
-    NBClassifier   
-)
+"""Fit the models on the training seasons and report how they score on the test season.
+
+Every model's metrics, curves and confusion matrix come from one pass over
+its sorted scores (see evaluation.py), and bootstrap intervals from one
+resampling shared by all models. The full report is written as JSON;
+plots are opt-in, drawn from the downsampled curves in that report, and
+rendered in one go.
+
+    python evaluate_predictor.py
+    python evaluate_predictor.py --models RF,NB --bootstrap 0
+    python evaluate_predictor.py --plots --max-points 500
+"""
+import os
+import json
+import argparse
+from models import MODEL_NAMES, BEST_PARAMS_PATH, get_model, parse_model_names, tuned_params
 from data_prep import RecommenderDataPrep, MODEL_FEATURE_COLS
-import plotly.graph_objects as go
-from sklearn.metrics import (
-    accuracy_score,
-    f1_score,
-    roc_auc_score,
-    roc_curve,
-    precision_recall_curve,
-    average_precision_score,
-    confusion_matrix,
-    classification_report,
-)
-
-def plot_roc_curves(y_true, scores_dict, out):
+from training import fit_and_score
+from evaluation import evaluate_scores, bootstrap_intervals, BOOTSTRAP_SAMPLES, CURVE_POINTS
+from instrumentation import span
+
+JSON_OUT = "out/evaluation.json"
+ROC_OUT = "out/roc_curve.png"
+PR_OUT = "out/pr_curve.png"
+
+
+def roc_figure(reports: dict):
+    import plotly.graph_objects as go
+
     fig = go.Figure()
-    for name, y_score in scores_dict.items():
-        fpr, tpr, _ = roc_curve(y_true, y_score)
-        auc = roc_auc_score(y_true, y_score)
-        fig.add_trace(go.Scatter(x=fpr, y=tpr, mode="lines", name=f"{name} (AUC={auc:.3f})"))
+    for name, report in reports.items():
+        fig.add_trace(go.Scatter(x=report["roc"]["fpr"], y=report["roc"]["tpr"], mode="lines",
+                                 name=f"{name} (AUC={report['auc']:.3f})"))
     fig.add_trace(go.Scatter(x=[0,1], y=[0,1], mode="lines",
                              name="Chance", line=dict(dash="dash")))
     fig.update_layout(
@@ -36,17 +41,17 @@ def plot_roc_curves(y_true, scores_dict, out):
         legend_title_text=None,
         width=900, height=550
     )
-    fig.write_image(out)
+    return fig
 
 
-def plot_pr_curves(y_true, scores_dict, out):
+def pr_figure(reports: dict):
+    import plotly.graph_objects as go
+
     fig = go.Figure()
-    pos_rate = (sum(y_true) / len(y_true)) if len(y_true) else 0.0
-    for name, y_score in scores_dict.items():
-        precision, recall, _ = precision_recall_curve(y_true, y_score)
-        ap = average_precision_score(y_true, y_score)
-        fig.add_trace(go.Scatter(x=recall, y=precision, mode="lines",
-                                 name=f"{name} (AP={ap:.3f})"))
+    pos_rate = next(iter(reports.values()))["positive_rate"] if reports else 0.0
+    for name, report in reports.items():
+        fig.add_trace(go.Scatter(x=report["pr"]["recall"], y=report["pr"]["precision"], mode="lines",
+                                 name=f"{name} (AP={report['average_precision']:.3f})"))
     fig.add_trace(go.Scatter(x=[0,1], y=[pos_rate, pos_rate], mode="lines",
                              name=f"Baseline (pos rate={pos_rate:.3f})",
                              line=dict(dash="dash")))
@@ -58,60 +63,112 @@ def plot_pr_curves(y_true, scores_dict, out):
         legend_title_text=None,
         width=900, height=550
     )
-    fig.write_image(out)
+    return fig
+
+
+def write_figures(figures: dict):
+    """Write {path: figure}; .html paths as HTML, the rest as images in a single renderer session."""
+    import plotly.io as pio
+
+    images = {out: fig for out, fig in figures.items() if not out.endswith(".html")}
+    for out, fig in figures.items():
+        if out.endswith(".html"):
+            fig.write_html(out, include_plotlyjs="cdn")
+    if images:
+        with span("evaluate.write_image", plots=len(images)):
+            pio.write_images(list(images.values()), list(images))
+
 
+def plot_reports(reports: dict, roc_out: str = ROC_OUT, pr_out: str = PR_OUT):
+    for out in (roc_out, pr_out):
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    write_figures({roc_out: roc_figure(reports), pr_out: pr_figure(reports)})
+
+
+def print_report(name, report, intervals=None):
+    def interval(metric):
+        if not intervals or metric not in intervals:
+            return ""
+        low, high = intervals[metric]
+        return f"  [{low:.4f}, {high:.4f}]"
 
-def print_report(name, y_true, y_pred, y_proba):
-    acc = accuracy_score(y_true, y_pred)
-    f1 = f1_score(y_true, y_pred)
-    auc = roc_auc_score(y_true, y_proba)
-    cm = confusion_matrix(y_true, y_pred)
     print(f"\n--- {name} ---")
     print("Confusion Matrix [TN FP; FN TP]:")
-    print(cm)
-    print(f"Accuracy: {acc:.4f}")
-    print(f"F1 Score: {f1:.4f}")
-    print(f"ROC AUC:  {auc:.4f}")
+    for row in report["confusion_matrix"]:
+        print(f"  {row[0]:>8} {row[1]:>8}")
+    print(f"Accuracy: {report['accuracy']:.4f}{interval('accuracy')}")
+    print(f"F1 Score: {report['f1']:.4f}")
+    if report["auc"] is not None:
+        print(f"ROC AUC:  {report['auc']:.4f}{interval('auc')}")
+        print(f"Avg Prec: {report['average_precision']:.4f}{interval('average_precision')}")
+    print(f"Log Loss: {report['log_loss']:.4f}{interval('log_loss')}")
+    best = report["best_threshold"]["accuracy"]
+    print(f"Best threshold: {best['threshold']:.2f} (accuracy {best['accuracy']:.4f})")
+
     print("\nClassification Report:")
-    print(classification_report(y_true, y_pred, digits=4, zero_division=0))
+    print(f"{'':>14} {'precision':>10} {'recall':>10} {'f1-score':>10} {'support':>10}")
+    table = report["classification"]
+    for label in ("0", "1", "macro avg", "weighted avg"):
+        row = table[label]
+        print(f"{label:>14} {row['precision']:>10.4f} {row['recall']:>10.4f} {row['f1']:>10.4f} {row['support']:>10}")
+    print(f"{'accuracy':>14} {'':>10} {'':>10} {table['accuracy']:>10.4f} {report['rows']:>10}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Fit the models and score them on the test season.")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="comma-separated models to evaluate, e.g. RF,NB")
+    parser.add_argument("--tuned", action="store_true",
+                        help="build the models with the hyperparameters tune.py saved in " + BEST_PARAMS_PATH)
+    parser.add_argument("--bootstrap", type=int, default=BOOTSTRAP_SAMPLES,
+                        help="bootstrap resamples for the confidence intervals (0 to skip)")
+    parser.add_argument("--json-out", default=JSON_OUT, help="where to write the full report as JSON")
+    parser.add_argument("--plots", action="store_true", help="also write the ROC and precision-recall plots")
+    parser.add_argument("--max-points", type=int, default=CURVE_POINTS, help="points kept per plotted curve")
+    args = parser.parse_args()
+    try:
+        args.models = parse_model_names(args.models)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
 
 
 def main():
+    args = parse_args()
+
     print("Loading and preparing data...")
     data_prep = RecommenderDataPrep(True)
     data_prep.load_and_prepare(False)
-    
-    models = {
-        "Simple": (SimplePredictor(), MODEL_FEATURE_COLS),
-        "SVM": (SVMClassifier(), MODEL_FEATURE_COLS),
-        "RandomForest": (RFClassifier(), MODEL_FEATURE_COLS),
-        "KNN": (KNNClassifier(), MODEL_FEATURE_COLS),
-        "MLP": (MLPClassifier(), MODEL_FEATURE_COLS),
-        "NB": (NBClassifier(), MODEL_FEATURE_COLS),
-    }
-
-    for name, (model, feature_cols) in models.items():
-        print(f"Training {name}...")
-        X_train, y_train = data_prep.get_training_data(feature_cols)
-        model.fit(X_train, y_train)
-
-    predictions = {}
-    probas = {}
-
-    for name, (model, feature_cols) in models.items():
-        print(f"Generating recommendations for {name}...")
-        X_test = data_prep.get_test_data(feature_cols)
-        predictions[name] = model.predict(X_test)
-        probas[name] = model.predict_proba(X_test)
+
+    params = tuned_params(MODEL_FEATURE_COLS) if args.tuned else {}
+    models = {name: (get_model(name, **params.get(name, {})), MODEL_FEATURE_COLS) for name in args.models}
+
+    print("Training and scoring models...")
+    runs = fit_and_score(models, data_prep)
+
+    predictions = {name: run.predictions for name, run in runs.items()}
+    probas = {name: run.probas for name, run in runs.items()}
 
     y_test = data_prep.get_test_results()
 
+    with span("evaluate.metrics", models=len(runs)):
+        reports = {name: evaluate_scores(y_test, probas[name], predictions[name], args.max_points)
+                   for name in models}
+    intervals = {}
+    if args.bootstrap > 0:
+        with span("evaluate.bootstrap", models=len(runs), samples=args.bootstrap):
+            intervals = bootstrap_intervals(y_test, probas, predictions, n_samples=args.bootstrap)
+
     for name in models.keys():
-        print_report(name, y_test, predictions[name], probas[name])
+        print_report(name, reports[name], intervals.get(name))
+
+    os.makedirs(os.path.dirname(args.json_out) or ".", exist_ok=True)
+    with open(args.json_out, "w") as f:
+        json.dump({"models": reports, "intervals": intervals, "bootstrap_samples": args.bootstrap}, f)
+    print(f"\nWrote the evaluation report to {args.json_out}")
 
-    plot_roc_curves(y_test, probas, out="out/roc_curve.png")
-    plot_pr_curves(y_test, probas, out="out/pr_curve.png")
+    if args.plots:
+        plot_reports(reports)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,283 @@
+"""Evaluation metrics for binary scores, from one sort per model.
+
+ScoreCurve sorts a model's scores once and keeps the cumulative true and
+false positive counts at every distinct score. The ROC and precision-recall
+curves, AUC, average precision, the confusion matrix at any threshold and
+whole threshold sweeps are then read off those two arrays, instead of every
+sklearn metric re-sorting the same scores. AUC and average precision match
+roc_auc_score and average_precision_score.
+
+bootstrap_intervals() resamples the test games once for all models (a
+paired bootstrap) and scores every resample of every model together, with
+the resamples expressed as per-game weights over the already sorted scores.
+"""
+from dataclasses import dataclass
+import numpy as np
+
+CURVE_POINTS = 200
+SWEEP_THRESHOLDS = np.round(np.linspace(0, 1, 101), 2)
+BOOTSTRAP_SAMPLES = 1000
+CI_LEVEL = 0.95
+# bound on the (resamples x models x games) float64 arrays of one bootstrap chunk
+BOOTSTRAP_CHUNK_BYTES = 64 * 2**20
+# clip used by sklearn.metrics.log_loss for float64 probabilities
+LOG_LOSS_EPS = np.finfo(np.float64).eps
+
+
+def downsample(*arrays, max_points: int = CURVE_POINTS):
+    """Every array thinned to at most max_points evenly spaced points, keeping both ends."""
+    n = len(arrays[0])
+    if n <= max_points:
+        return arrays
+    keep = np.unique(np.linspace(0, n - 1, max_points).round().astype(int))
+    return tuple(array[keep] for array in arrays)
+
+
+@dataclass
+class ScoreCurve:
+    """Cumulative counts over the distinct scores of one model, highest first.
+
+    tp[i] and fp[i] count the games scored at least thresholds[i] that were
+    and weren't home wins.
+    """
+    thresholds: np.ndarray
+    tp: np.ndarray
+    fp: np.ndarray
+    n_pos: int
+    n_neg: int
+
+    @classmethod
+    def build(cls, y_true, scores):
+        y_true = np.asarray(y_true, dtype=bool)
+        scores = np.asarray(scores, dtype=np.float64)
+        order = np.argsort(-scores, kind="stable")
+        scores, y_true = scores[order], y_true[order]
+
+        # last position of every run of equal scores
+        ends = np.flatnonzero(np.diff(scores, append=-np.inf))
+        tp = np.cumsum(y_true, dtype=np.int64)[ends]
+        fp = (ends + 1) - tp
+        n_pos = int(tp[-1]) if len(tp) else 0
+        return cls(scores[ends], tp, fp, n_pos, len(scores) - n_pos)
+
+    def roc(self):
+        """(fpr, tpr, thresholds) like sklearn's roc_curve without dropping points."""
+        fpr = np.concatenate([[0.0], self.fp / self.n_neg]) if self.n_neg else np.full(len(self.fp) + 1, np.nan)
+        tpr = np.concatenate([[0.0], self.tp / self.n_pos]) if self.n_pos else np.full(len(self.tp) + 1, np.nan)
+        return fpr, tpr, np.concatenate([[np.inf], self.thresholds])
+
+    def precision_recall(self):
+        """(precision, recall, thresholds) in order of decreasing threshold."""
+        precision = self.tp / (self.tp + self.fp)
+        recall = self.tp / self.n_pos if self.n_pos else np.full(len(self.tp), np.nan)
+        return precision, recall, self.thresholds
+
+    def auc(self) -> float:
+        """Area under the ROC curve; None when only one class is present."""
+        if not (self.n_pos and self.n_neg):
+            return None
+        fpr, tpr, _ = self.roc()
+        return float(np.trapezoid(tpr, fpr))
+
+    def average_precision(self) -> float:
+        if not self.n_pos:
+            return None
+        precision, recall, _ = self.precision_recall()
+        return float(np.sum(np.diff(recall, prepend=0.0) * precision))
+
+    def counts_above(self, thresholds):
+        """(tp, fp) of calling every game scored strictly above each threshold a home win."""
+        thresholds = np.asarray(thresholds, dtype=np.float64)
+        # number of distinct scores strictly greater than each threshold
+        k = np.searchsorted(-self.thresholds, -thresholds, side="left")
+        tp = np.where(k > 0, self.tp[np.maximum(k - 1, 0)], 0)
+        fp = np.where(k > 0, self.fp[np.maximum(k - 1, 0)], 0)
+        return tp, fp
+
+    def confusion(self, threshold: float = 0.5) -> np.ndarray:
+        """[[TN, FP], [FN, TP]] for predicting a home win when the score is above threshold."""
+        tp, fp = self.counts_above([threshold])
+        return confusion_matrix_from_counts(int(tp[0]), int(fp[0]), self.n_pos, self.n_neg)
+
+    def sweep(self, thresholds=SWEEP_THRESHOLDS) -> dict:
+        """Accuracy, precision, recall and F1 at every threshold, all from the same counts."""
+        tp, fp = self.counts_above(thresholds)
+        n = self.n_pos + self.n_neg
+        with np.errstate(invalid="ignore", divide="ignore"):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+            recall = tp / self.n_pos if self.n_pos else np.zeros(len(tp))
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+        return {
+            "thresholds": np.asarray(thresholds, dtype=np.float64),
+            "accuracy": (tp + (self.n_neg - fp)) / n,
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+        }
+
+
+def confusion_matrix_from_counts(tp, fp, n_pos, n_neg) -> np.ndarray:
+    return np.array([[n_neg - fp, fp], [n_pos - tp, tp]], dtype=np.int64)
+
+
+def confusion_from_predictions(y_true, y_pred) -> np.ndarray:
+    """[[TN, FP], [FN, TP]] of hard predictions, in one bincount."""
+    codes = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+    return np.bincount(codes, minlength=4).reshape(2, 2)
+
+
+def classification_table(cm: np.ndarray) -> dict:
+    """Per-class precision, recall, F1 and support with their averages, like classification_report."""
+    table = {}
+    support = cm.sum(axis=1)
+    predicted = cm.sum(axis=0)
+    for label in (0, 1):
+        correct = cm[label, label]
+        precision = correct / predicted[label] if predicted[label] else 0.0
+        recall = correct / support[label] if support[label] else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        table[str(label)] = {"precision": float(precision), "recall": float(recall), "f1": float(f1),
+                             "support": int(support[label])}
+    total = int(support.sum())
+    for average, weights in (("macro avg", np.array([0.5, 0.5])), ("weighted avg", support / max(total, 1))):
+        table[average] = {metric: float(sum(w * table[str(label)][metric] for label, w in zip((0, 1), weights)))
+                          for metric in ("precision", "recall", "f1")}
+        table[average]["support"] = total
+    table["accuracy"] = float(np.trace(cm) / total) if total else 0.0
+    return table
+
+
+def evaluate_scores(y_true, scores, predictions=None, max_points: int = CURVE_POINTS) -> dict:
+    """Every metric of one model's test scores, ready for printing or JSON.
+
+    The confusion matrix, accuracy and F1 are those of predictions (the
+    model's own predict()) when given, and of scores above 0.5 otherwise.
+    Curves are downsampled to max_points.
+    """
+    y_true = np.asarray(y_true, dtype=np.int64)
+    scores = np.asarray(scores, dtype=np.float64)
+    curve = ScoreCurve.build(y_true, scores)
+
+    cm = confusion_from_predictions(y_true, predictions) if predictions is not None else curve.confusion(0.5)
+    table = classification_table(cm)
+    clipped = np.clip(scores, LOG_LOSS_EPS, 1 - LOG_LOSS_EPS)
+
+    fpr, tpr, roc_thresholds = curve.roc()
+    precision, recall, pr_thresholds = curve.precision_recall()
+    fpr, tpr, roc_thresholds = downsample(fpr, tpr, roc_thresholds, max_points=max_points)
+    precision, recall, pr_thresholds = downsample(precision, recall, pr_thresholds, max_points=max_points)
+
+    sweep = curve.sweep()
+    best = {}
+    for metric in ("accuracy", "f1"):
+        i = int(np.argmax(sweep[metric]))
+        best[metric] = {"threshold": float(sweep["thresholds"][i]), metric: float(sweep[metric][i])}
+    return {
+        "rows": len(y_true),
+        "positive_rate": float(y_true.mean()) if len(y_true) else 0.0,
+        "accuracy": table["accuracy"],
+        "f1": table["1"]["f1"],
+        "auc": curve.auc(),
+        "average_precision": curve.average_precision(),
+        "brier": float(np.mean((scores - y_true) ** 2)),
+        "log_loss": float(-np.mean(y_true * np.log(clipped) + (1 - y_true) * np.log(1 - clipped))),
+        "confusion_matrix": cm.tolist(),
+        "classification": table,
+        "best_threshold": best,
+        "sweep": {key: np.round(values, 6).tolist() for key, values in sweep.items()},
+        "roc": {"fpr": fpr.tolist(), "tpr": tpr.tolist(), "thresholds": _finite(roc_thresholds)},
+        "pr": {"precision": precision.tolist(), "recall": recall.tolist(), "thresholds": _finite(pr_thresholds)},
+    }
+
+
+def _finite(values):
+    # JSON has no infinity
+    return [float(v) if np.isfinite(v) else None for v in values]
+
+
+def _bootstrap_chunk(weights, order, y_sorted, group_first, group_last, correct, losses):
+    """Metrics of every model under every resample in weights (resamples x games)."""
+    # (resamples, models, games) weights in each model's ascending score order
+    w = weights[:, order]
+    pos = w * y_sorted
+    neg = w - pos
+    n_pos = pos.sum(axis=-1)
+    n_neg = neg.sum(axis=-1)
+
+    cum_pos = np.cumsum(pos, axis=-1)
+    cum_neg = np.cumsum(neg, axis=-1)
+    first = np.broadcast_to(group_first, w.shape)
+    last = np.broadcast_to(group_last, w.shape)
+    # weight of the games scored strictly below, and level with, each game's score
+    neg_below = np.take_along_axis(cum_neg - neg, first, axis=-1)
+    neg_tied = np.take_along_axis(cum_neg, last, axis=-1) - neg_below
+    pos_below = np.take_along_axis(cum_pos - pos, first, axis=-1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        auc = (pos * (neg_below + 0.5 * neg_tied)).sum(axis=-1) / (n_pos * n_neg)
+        # at or above a positive's score: everything minus what is strictly below
+        tp = n_pos[..., None] - pos_below
+        fp = n_neg[..., None] - neg_below
+        average_precision = (pos * tp / (tp + fp)).sum(axis=-1) / n_pos
+
+    n = weights.sum(axis=1, keepdims=True)
+    return {
+        "auc": auc,
+        "average_precision": average_precision,
+        "accuracy": weights @ correct / n,
+        "brier": weights @ losses["brier"] / n,
+        "log_loss": weights @ losses["log_loss"] / n,
+    }
+
+
+def bootstrap_intervals(y_true, scores: dict, predictions: dict = None, n_samples: int = BOOTSTRAP_SAMPLES,
+                        level: float = CI_LEVEL, seed: int = 42) -> dict:
+    """{model: {metric: [low, high]}} percentile intervals from one paired bootstrap of all models.
+
+    Each resample is a vector of per-game counts applied to every model at
+    once; resamples are processed in chunks to bound memory. Resamples
+    with only one class give no AUC and are left out of its interval.
+    """
+    names = list(scores)
+    y_true = np.asarray(y_true, dtype=np.float64)
+    n = len(y_true)
+    S = np.column_stack([np.asarray(scores[name], dtype=np.float64) for name in names])
+    predicted = (np.column_stack([np.asarray(predictions[name]) for name in names]) if predictions is not None
+                 else (S > 0.5))
+    correct = (predicted == y_true[:, None]).astype(np.float64)
+    clipped = np.clip(S, LOG_LOSS_EPS, 1 - LOG_LOSS_EPS)
+    losses = {
+        "brier": (S - y_true[:, None]) ** 2,
+        "log_loss": -(y_true[:, None] * np.log(clipped) + (1 - y_true[:, None]) * np.log(1 - clipped)),
+    }
+
+    # sort every model once; resamples only change the weights
+    order = np.argsort(S, axis=0, kind="stable").T
+    sorted_scores = np.take_along_axis(S, order.T, axis=0).T
+    positions = np.arange(n)
+    starts = np.concatenate([np.ones((len(names), 1), dtype=bool), np.diff(sorted_scores, axis=1) != 0], axis=1)
+    group_first = np.maximum.accumulate(np.where(starts, positions, 0), axis=1)
+    ends = np.concatenate([np.diff(sorted_scores, axis=1) != 0, np.ones((len(names), 1), dtype=bool)], axis=1)
+    group_last = np.minimum.accumulate(np.where(ends, positions, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    y_sorted = y_true[order]
+
+    rng = np.random.default_rng(seed)
+    chunk = max(1, BOOTSTRAP_CHUNK_BYTES // (8 * 8 * max(1, len(names)) * max(1, n)))
+    results = {}
+    for start in range(0, n_samples, chunk):
+        size = min(chunk, n_samples - start)
+        draws = rng.integers(0, n, (size, n))
+        weights = np.bincount((draws + n * np.arange(size)[:, None]).ravel(), minlength=size * n)
+        weights = weights.reshape(size, n).astype(np.float64)
+        for metric, values in _bootstrap_chunk(weights, order, y_sorted, group_first, group_last,
+                                               correct, losses).items():
+            results.setdefault(metric, []).append(values)
+
+    tail = (1 - level) / 2 * 100
+    intervals = {name: {} for name in names}
+    for metric, parts in results.items():
+        values = np.concatenate(parts)
+        low, high = np.nanpercentile(values, [tail, 100 - tail], axis=0)
+        for i, name in enumerate(names):
+            intervals[name][metric] = [float(low[i]), float(high[i])]
+    return intervals
@@ -0,0 +1,202 @@
+"""Point-in-time index over team box scores.
+
+Rows are grouped by (venue, team) and sorted by date, with one running
+total of every stat column across all rows. "Team X's last N home games as
+of date D" is then a binary search for D inside X's home group and the
+difference of two prefix sums, so any number of (team, venue, date)
+queries are answered at once without filtering a DataFrame. The same
+prefix sums serve every window length, and exponentially weighted means are
+computed for every decay rate in one recursive pass over the sorted rows.
+An index over only the latest rows of each group can continue the EWMAs of
+an earlier index exactly, from the values ewm_state() hands over.
+"""
+import numpy as np
+import pandas as pd
+from feature_store import to_epoch_seconds
+
+HOME = 1
+AWAY = 0
+
+
+def _as_epoch_seconds(dates):
+    dates = np.asarray(dates)
+    if np.issubdtype(dates.dtype, np.integer):
+        return dates.astype(np.int64)
+    return to_epoch_seconds(dates)
+
+
+class TeamFeatureIndex:
+    """Rolling sums of a team's last `window` stat rows, for any venue and date."""
+
+    def __init__(self, stats: pd.DataFrame, stat_cols: list, window: int, alphas: tuple = (), ewm_seeds: dict = None):
+        """stats needs gameId, gameDate, teamId, home and stat_cols columns.
+
+        alphas are the decay rates query_ewm() can be asked for. ewm_seeds
+        maps (venue, team ID) to the (alpha, stat) EWMAs of that group's rows
+        before the ones in stats, as returned by ewm_state(); groups without
+        one start their EWMAs at their first row.
+        """
+        self.stat_cols = stat_cols
+        self.window = window
+        self.alphas = tuple(alphas)
+
+        stats = stats.drop_duplicates(["gameId", "teamId", "home"])
+        seconds = _as_epoch_seconds(stats["gameDate"])
+        self._base = seconds.min() if len(seconds) else 0
+        # wide enough that date offsets never spill into the next group
+        self._span = (seconds.max() - self._base + 2) if len(seconds) else 2
+
+        groups = pd.MultiIndex.from_arrays([stats["home"].to_numpy(), stats["teamId"].to_numpy()])
+        group_ids, self._groups = pd.factorize(groups, sort=True)
+
+        order = np.lexsort((seconds, group_ids))
+        self._group_of_row = group_ids[order]
+        self._keys = self._group_of_row * self._span + (seconds[order] - self._base)
+        self._group_starts = np.searchsorted(self._group_of_row, np.arange(len(self._groups)))
+
+        self._seeds = np.zeros((len(self.alphas), len(self._groups), len(stat_cols)))
+        self._seeded = np.zeros(len(self._groups), dtype=bool)
+        for (venue, team_id), seed in (ewm_seeds or {}).items():
+            group = self._groups.get_indexer(pd.MultiIndex.from_tuples([(venue, team_id)]))[0]
+            if group >= 0:
+                self._seeds[:, group] = seed
+                self._seeded[group] = True
+
+        values = stats[stat_cols].fillna(0).to_numpy(np.float64)[order]
+        self._prefix = np.zeros((len(values) + 1, len(stat_cols)))
+        np.cumsum(values, axis=0, out=self._prefix[1:])
+        self._ewm = self._ewm_through(values)
+
+        # (group, gameId) -> row, for leaving a game out of its own window
+        game_ids = stats["gameId"].to_numpy(np.int64)[order]
+        self._row_lookup = pd.MultiIndex.from_arrays([self._group_of_row, game_ids])
+
+    def _ewm_through(self, values):
+        """(alpha, row + 1, stat) EWMA of each group's rows up to and including row, for every alpha at once.
+
+        The recursion runs over the position within the group, so each step
+        advances every group and every alpha together. A group's EWMA starts
+        at its first row, or continues from its seed.
+        """
+        out = np.zeros((len(self.alphas), len(values) + 1, values.shape[1]))
+        if not self.alphas or not len(values):
+            return out
+        alphas = np.array(self.alphas)[:, None, None]
+        position = np.arange(len(values)) - self._group_starts[self._group_of_row]
+        rows_by_position = np.argsort(position, kind="stable")
+        bounds = np.searchsorted(position[rows_by_position], np.arange(position.max() + 2))
+
+        first = rows_by_position[bounds[0]:bounds[1]]
+        out[:, first + 1] = values[first]
+        seeded = first[self._seeded[self._group_of_row[first]]]
+        if len(seeded):
+            seeds = self._seeds[:, self._group_of_row[seeded]]
+            out[:, seeded + 1] = alphas * values[seeded] + (1 - alphas) * seeds
+        for k in range(1, len(bounds) - 1):
+            rows = rows_by_position[bounds[k]:bounds[k + 1]]
+            out[:, rows + 1] = alphas * values[rows] + (1 - alphas) * out[:, rows]
+        return out
+
+    def __len__(self):
+        return len(self._keys)
+
+    def ewm_state(self, keep: int) -> dict:
+        """ewm_seeds for an index over each group's last keep rows: the EWMAs just before those rows.
+
+        Groups whose kept rows go back to their first row pass on their own
+        seed, or are left out if they had none.
+        """
+        stops = np.append(self._group_starts[1:], len(self._keys))
+        seeds = {}
+        for group, ((venue, team_id), start, stop) in enumerate(zip(self._groups, self._group_starts, stops)):
+            first_kept = max(start, stop - keep)
+            if first_kept > start:
+                seeds[(int(venue), int(team_id))] = self._ewm[:, first_kept].copy()
+            elif self._seeded[group]:
+                seeds[(int(venue), int(team_id))] = self._seeds[:, group].copy()
+        return seeds
+
+    def _group_ids(self, team_ids, venues):
+        team_ids = np.asarray(team_ids)
+        venues = np.broadcast_to(venues, team_ids.shape)
+        queries = pd.MultiIndex.from_arrays([venues, team_ids])
+        return self._groups.get_indexer(queries)
+
+    def _locate(self, team_ids, venues, dates, game_ids):
+        """(group, known, start, stop, own): each query's group, its rows up to date and its own game (-1 if none)."""
+        groups = self._group_ids(team_ids, venues)
+        known = groups >= 0
+        g = np.where(known, groups, 0)
+
+        offsets = np.clip(_as_epoch_seconds(dates) - self._base, -1, self._span - 1)
+        start = np.where(known, self._group_starts[g], 0)
+        stop = np.searchsorted(self._keys, g * self._span + offsets, side="right")
+        stop = np.where(known, stop, start)
+
+        own = np.full(len(g), -1)
+        if game_ids is not None:
+            pairs = pd.MultiIndex.from_arrays([g, np.asarray(game_ids, dtype=np.int64)])
+            own = np.where(known, self._row_lookup.get_indexer(pairs), -1)
+        return g, known, start, stop, own
+
+    def _window_sums(self, located, window):
+        _, known, start, stop, own = located
+        lower = np.maximum(start, stop - window)
+        sums = self._prefix[stop] - self._prefix[lower]
+
+        # the game's own row is inside the window, so widen it by one row and subtract it
+        inside = known & (own >= 0) & (own < stop) & (own >= np.maximum(start, stop - window - 1))
+        if inside.any():
+            rows = own[inside]
+            wide = np.maximum(start[inside], stop[inside] - window - 1)
+            sums[inside] = (self._prefix[stop[inside]] - self._prefix[wide]
+                            - (self._prefix[rows + 1] - self._prefix[rows]))
+        return sums
+
+    def _ewm_means(self, located, i):
+        g, known, start, stop, own = located
+        end = stop - (known & (own >= 0) & (own == stop - 1))
+        # before a seeded group's first row its EWMA is the seed
+        before = np.where((known & self._seeded[g])[:, None], self._seeds[i, g], 0.0)
+        return np.where((end > start)[:, None], self._ewm[i, end], before)
+
+    def query(self, team_ids, venues, dates, game_ids=None, window: int = None) -> np.ndarray:
+        """Mean of each stat over the last `window` rows on or before each date.
+
+        Arrays are aligned per query; venues may also be a single HOME or
+        AWAY. If game_ids is given, each query's own game is left out of its
+        window. window defaults to the index's own. Sums are divided by
+        `window` even when fewer rows exist, and teams with no history get
+        zeros.
+        """
+        window = window or self.window
+        return self._window_sums(self._locate(team_ids, venues, dates, game_ids), window) / window
+
+    def query_ewm(self, team_ids, venues, dates, game_ids=None, alpha: float = None) -> np.ndarray:
+        """Exponentially weighted mean of each stat over the rows on or before each date.
+
+        A query's own game is only left out when it is the team's latest row
+        as of date, which it always is for one game per team per day. Teams
+        with no history get zeros.
+        """
+        located = self._locate(team_ids, venues, dates, game_ids)
+        return self._ewm_means(located, self.alphas.index(alpha))
+
+    def query_bank(self, team_ids, venues, dates, game_ids=None, windows=()) -> dict:
+        """{("w", window) or ("ewm", alpha): means} for every window in windows and every alpha of the index.
+
+        The group and date lookups are shared by all of them.
+        """
+        located = self._locate(team_ids, venues, dates, game_ids)
+        bank = {("w", window): self._window_sums(located, window) / window for window in windows}
+        for i, alpha in enumerate(self.alphas):
+            bank[("ewm", alpha)] = self._ewm_means(located, i)
+        return bank
+
+    def query_frame(self, team_ids, venues, dates, game_ids=None, index=None) -> pd.DataFrame:
+        """query() as a DataFrame with one column per stat."""
+        return pd.DataFrame(self.query(team_ids, venues, dates, game_ids), columns=self.stat_cols, index=index)
+
+    def as_of(self, team_id, venue, date) -> pd.Series:
+        """One team's window means as of date."""
+        return self.query_frame([team_id], [venue], [date]).iloc[0]
@@ -0,0 +1,140 @@
+"""Model-ready feature matrices shared by every model in a run.
+
+A FeatureMatrix is one C-contiguous float64 array of a column set over one
+split, plus its standardized counterpart. The scaler is fitted once on the
+training split and reused for the test split. Models take a FeatureMatrix
+in place of a DataFrame. The scaled ones (SVM, KNN, MLP, NB) then fit only
+the pipeline steps after their scaler on the standardized array and adopt
+the shared scaler, so a fitted model still scores raw DataFrames on its own.
+"""
+import os
+import copy
+import json
+import pickle
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+META_FILE = "matrix.json"
+SCALER_FILE = "scaler.pkl"
+
+
+@dataclass
+class FeatureMatrix:
+    columns: list
+    values: np.ndarray
+    standardized: np.ndarray
+    scaler: StandardScaler
+
+    @classmethod
+    def build(cls, values, columns: list, scaler: StandardScaler = None):
+        """Copy values once into a contiguous float64 array; fit the scaler on it unless one is given."""
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        frame = pd.DataFrame(values, columns=columns, copy=False)
+        if scaler is None:
+            scaler = StandardScaler().fit(frame)
+        return cls(list(columns), values, np.ascontiguousarray(scaler.transform(frame)), scaler)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def ndim(self):
+        return 2
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """The raw values as a DataFrame, without copying."""
+        return pd.DataFrame(self.values, columns=self.columns, copy=False)
+
+    def rows(self, start, stop):
+        """Rows start:stop as views sharing the same scaler."""
+        return FeatureMatrix(self.columns, self.values[start:stop], self.standardized[start:stop], self.scaler)
+
+    def save(self, path):
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "values.npy"), self.values)
+        np.save(os.path.join(path, "standardized.npy"), self.standardized)
+        with open(os.path.join(path, SCALER_FILE), "wb") as f:
+            pickle.dump(self.scaler, f)
+        with open(os.path.join(path, META_FILE), "w") as f:
+            json.dump({"columns": self.columns}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """A saved matrix, memory-mapped so processes loading the same path share its pages."""
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(path, META_FILE)) as f:
+            columns = json.load(f)["columns"]
+        with open(os.path.join(path, SCALER_FILE), "rb") as f:
+            scaler = pickle.load(f)
+        values = np.load(os.path.join(path, "values.npy"), mmap_mode=mmap_mode)
+        standardized = np.load(os.path.join(path, "standardized.npy"), mmap_mode=mmap_mode)
+        return cls(columns, values, standardized, scaler)
+
+
+def _same_scaler(a, b) -> bool:
+    return a is b or (np.array_equal(a.mean_, b.mean_) and np.array_equal(a.scale_, b.scale_))
+
+
+def raw_features(X):
+    """X itself, or the raw-value DataFrame of a FeatureMatrix."""
+    return X.frame if isinstance(X, FeatureMatrix) else X
+
+
+def take_rows(X, start, stop):
+    """Rows start:stop of a DataFrame or FeatureMatrix."""
+    return X.rows(start, stop) if isinstance(X, FeatureMatrix) else X.iloc[start:stop]
+
+
+def fit_pipeline(pipeline, X, y=None):
+    """Fit a Pipeline whose first step is a StandardScaler.
+
+    Given a FeatureMatrix, the shared scaler replaces the pipeline's own and
+    only the later steps are fitted, on the already standardized rows.
+    """
+    if not isinstance(X, FeatureMatrix):
+        return pipeline.fit(X, y)
+    pipeline.steps[0] = (pipeline.steps[0][0], X.scaler)
+    pipeline[1:].fit(X.standardized, y)
+    return pipeline
+
+
+def standardize(pipeline, X):
+    """X scaled by a fitted scaler-first Pipeline, reusing a FeatureMatrix's standardized rows when they match."""
+    if isinstance(X, FeatureMatrix) and _same_scaler(pipeline.steps[0][1], X.scaler):
+        return X.standardized
+    return pipeline.steps[0][1].transform(raw_features(X))
+
+
+def pipeline_input(pipeline, X):
+    """(estimator, data) for scoring X with a fitted scaler-first Pipeline.
+
+    A FeatureMatrix standardized with the pipeline's own scaler skips the
+    scaler; anything else goes through the whole pipeline.
+    """
+    if isinstance(X, FeatureMatrix) and _same_scaler(pipeline.steps[0][1], X.scaler):
+        return pipeline[1:], X.standardized
+    return pipeline, raw_features(X)
+
+
+def partial_fit_scaler(pipeline, X_new):
+    """Fold X_new into the running mean and variance of a fitted scaler-first Pipeline.
+
+    The scaler is replaced by an updated copy, since the old one may be
+    shared with other models through a FeatureMatrix. Returns (old, new).
+    """
+    old = pipeline.steps[0][1]
+    new = copy.deepcopy(old).partial_fit(raw_features(X_new))
+    pipeline.steps[0] = (pipeline.steps[0][0], new)
+    return old, new
+
+
+def rescale(standardized, old, new):
+    """Values standardized by the old scaler, re-expressed as if standardized by the new one."""
+    return (standardized * old.scale_ + old.mean_ - new.mean_) / new.scale_
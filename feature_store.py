@@ -0,0 +1,126 @@
+"""Columnar on-disk storage for the feature table.
+
+Every column is stored as its own .npy file inside one directory, so loading
+is a memory map instead of a CSV parse. Dates are int64 epoch seconds, team
+IDs int32, and the model features one float32 matrix in column-major order,
+which makes any contiguous run of rows or feature columns a zero-copy view.
+"""
+import os
+import json
+import numpy as np
+import pandas as pd
+
+KEY_DTYPES = {
+    "gameId": np.int64,
+    "gameDate": np.int64,
+    "hometeamId": np.int32,
+    "awayteamId": np.int32,
+    "result": np.int8,
+}
+FEATURES_FILE = "features.npy"
+META_FILE = "meta.json"
+
+
+def to_epoch_seconds(dates):
+    """Convert date strings (or one string) to int64 seconds since the epoch, reading naive dates as UTC.
+
+    Integer dates are taken to be epoch seconds already.
+    """
+    scalar = isinstance(dates, str)
+    if not scalar and np.issubdtype(np.asarray(dates).dtype, np.integer):
+        return np.asarray(dates, dtype=np.int64)
+    parsed = pd.to_datetime(pd.Series([dates] if scalar else dates), utc=True, format="ISO8601")
+    seconds = ((parsed - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)).to_numpy(np.int64)
+    return seconds[0] if scalar else seconds
+
+
+def from_epoch_seconds(seconds):
+    """Inverse of to_epoch_seconds, as ISO 8601 strings."""
+    return pd.to_datetime(np.asarray(seconds), unit="s", utc=True).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _to_columns(df, feature_cols):
+    """Drop unusable rows and convert df to the stored dtypes."""
+    df = df[list(KEY_DTYPES) + feature_cols].replace([np.inf, -np.inf], np.nan).dropna()
+
+    columns = {name: df[name].to_numpy(dtype) for name, dtype in KEY_DTYPES.items() if name != "gameDate"}
+    columns["gameDate"] = to_epoch_seconds(df["gameDate"])
+    features = np.asfortranarray(df[feature_cols].to_numpy(np.float32))
+    return columns, features
+
+
+def _save(path, columns, features, feature_cols):
+    os.makedirs(path, exist_ok=True)
+    for name, values in columns.items():
+        np.save(os.path.join(path, name + ".npy"), values)
+    np.save(os.path.join(path, FEATURES_FILE), features)
+
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump({"feature_cols": feature_cols, "rows": len(features)}, f)
+
+
+def write_feature_store(df, path, feature_cols):
+    """Write a feature table DataFrame (rows already in date order) to path."""
+    columns, features = _to_columns(df, feature_cols)
+    _save(path, columns, features, feature_cols)
+
+
+def append_feature_store(df, path, feature_cols):
+    """Append the rows of df after the rows already stored at path."""
+    store = FeatureStore(path, mmap=False)
+    if store.feature_cols != feature_cols:
+        raise ValueError(f"Feature store at {path} has columns {store.feature_cols}, not {feature_cols}")
+
+    columns, features = _to_columns(df, feature_cols)
+    columns = {name: np.concatenate([store.columns[name], values]) for name, values in columns.items()}
+    features = np.asfortranarray(np.concatenate([store.features, features]))
+    _save(path, columns, features, feature_cols)
+
+
+def feature_store_exists(path):
+    return os.path.exists(os.path.join(path, META_FILE))
+
+
+class FeatureStore:
+    """Read-only, memory-mapped view of a stored feature table."""
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        mmap_mode = "r" if mmap else None
+
+        with open(os.path.join(path, META_FILE)) as f:
+            self.feature_cols = json.load(f)["feature_cols"]
+
+        self.columns = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode) for name in KEY_DTYPES}
+        self.features = np.load(os.path.join(path, FEATURES_FILE), mmap_mode=mmap_mode)
+
+    def __len__(self):
+        return len(self.features)
+
+    def row_index(self, date):
+        """Index of the first row on or after date (rows are stored in date order)."""
+        return int(np.searchsorted(self.columns["gameDate"], to_epoch_seconds(date), side="left"))
+
+    def feature_matrix(self, feature_cols, start=0, stop=None):
+        """Rows start:stop of feature_cols. A view when the columns are a contiguous run of the store."""
+        idx = [self.feature_cols.index(col) for col in feature_cols]
+        if idx == list(range(idx[0], idx[0] + len(idx))):
+            return self.features[start:stop, idx[0]:idx[0] + len(idx)]
+        return self.features[start:stop, idx]
+
+    def feature_frame(self, feature_cols, start=0, stop=None):
+        """feature_matrix wrapped in a DataFrame without copying it."""
+        return pd.DataFrame(self.feature_matrix(feature_cols, start, stop), columns=feature_cols, copy=False)
+
+    def to_frame(self, start=0, stop=None):
+        """DataFrame over rows start:stop backed by the stored arrays."""
+        data = {name: values[start:stop] for name, values in self.columns.items()}
+        for i, col in enumerate(self.feature_cols):
+            data[col] = self.features[start:stop, i]
+        return pd.DataFrame(data, copy=False)
+
+    def export_csv(self, path):
+        """Write the table as CSV with ISO 8601 dates."""
+        df = self.to_frame()
+        df["gameDate"] = from_epoch_seconds(df["gameDate"])
+        df.to_csv(path, index=False)
@@ -0,0 +1,42 @@
+"""Streaming reader for the raw dataset CSVs.
+
+The Kaggle files are wide (TeamStatistics.csv has dozens of columns, most
+of them unused by the features) and grow every season. read_columns()
+parses only the columns it is asked for, a fixed number of rows at a time,
+straight into narrow dtypes, and converts date columns to int64 epoch
+seconds as each chunk arrives. Unwanted rows are dropped before the next
+chunk is read, so besides the narrow result only one chunk is ever held,
+however much history the file has.
+"""
+import pandas as pd
+from feature_store import to_epoch_seconds
+
+CHUNK_ROWS = 100_000
+
+
+def iter_columns(path, dtypes: dict, date_cols=(), keep=None, columns=None, chunk_rows=CHUNK_ROWS):
+    """The chunks read_columns() is made of, one at a time, for callers that reduce them as they go."""
+    usecols = list(dtypes) + list(date_cols)
+    columns = list(columns) if columns is not None else usecols
+    with pd.read_csv(path, usecols=usecols, dtype={**dtypes, **dict.fromkeys(date_cols, str)},
+                     chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            for col in date_cols:
+                chunk[col] = to_epoch_seconds(chunk[col])
+            if keep is not None:
+                chunk = chunk[keep(chunk)]
+            yield chunk[columns]
+
+
+def read_columns(path, dtypes: dict, date_cols=(), keep=None, columns=None, chunk_rows=CHUNK_ROWS) -> pd.DataFrame:
+    """The dtypes and date_cols columns of the CSV at path.
+
+    keep, if given, maps each parsed chunk to a boolean mask of the rows to
+    keep, and columns limits the result to some of the columns read (the
+    rest can still be used by keep). Dates are int64 epoch seconds.
+    """
+    columns = list(columns) if columns is not None else list(dtypes) + list(date_cols)
+    parts = list(iter_columns(path, dtypes, date_cols, keep, columns, chunk_rows))
+    if not parts:
+        return pd.DataFrame({col: pd.Series(dtype="int64" if col in date_cols else dtypes[col]) for col in columns})
+    return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,134 @@
+"""Opt-in timing and memory spans for the pipeline.
+
+Set NBA_TRACE to a file path (or call enable()) and every span and event
+is appended to it as one JSON object per line. Spans record wall time and
+peak traced allocation (tracemalloc) plus whatever attributes the caller
+attaches. While disabled, span() hands back a shared no-op context and
+event() returns immediately, so leaving the calls in costs next to nothing.
+
+    with span("data_prep.read_games", path=data_path):
+        ...
+"""
+import os
+import json
+import time
+import functools
+import tracemalloc
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _State:
+    path = None
+    memory = True
+    stack = []
+
+
+_state = _State()
+
+
+def enable(path: str, memory: bool = True):
+    """Start appending spans and events to path. memory=False skips tracemalloc, which slows allocation-heavy code."""
+    _state.path = path
+    _state.memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+
+def disable():
+    _state.path = None
+    _state.stack = []
+
+
+def enabled() -> bool:
+    return _state.path is not None
+
+
+def _write(record: dict):
+    line = json.dumps(record, default=lambda value: value.tolist() if hasattr(value, "tolist") else str(value))
+    # opened per record so worker processes can append to the same file
+    with open(_state.path, "a") as f:
+        f.write(line + "\n")
+
+
+class _Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+        self.peak = 0
+
+    def set(self, **attrs):
+        """Attach attributes only known once the block has run."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        if _state.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # the parent keeps its own peak so far before the global peak is reset for this span
+            if _state.stack:
+                _state.stack[-1].peak = max(_state.stack[-1].peak, peak)
+            tracemalloc.reset_peak()
+            self.baseline = current
+        _state.stack.append(self)
+        self.ts = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _state.stack.pop()
+
+        record = {"span": self.name, "ts": self.ts, "seconds": round(seconds, 6), "depth": len(_state.stack)}
+        if _state.memory:
+            self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            record["peak_mb"] = round((self.peak - self.baseline) / 2**20, 3)
+            if _state.stack:
+                _state.stack[-1].peak = max(_state.stack[-1].peak, self.peak)
+        if exc_type is not None:
+            record["error"] = exc_type.__name__
+        record["pid"] = os.getpid()
+        record.update(self.attrs)
+        _write(record)
+        return False
+
+
+def span(name: str, **attrs):
+    """Context manager timing the enclosed block as name, with attrs attached."""
+    if _state.path is None:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+
+def event(name: str, **attrs):
+    """Record a one-off value, e.g. feature importances after a fit."""
+    if _state.path is None:
+        return
+    _write({"event": name, "ts": time.time(), "pid": os.getpid(), **attrs})
+
+
+def traced_method(method):
+    """Wrap a BasePredictor fit/predict/predict_proba in a span named <model>.<method>."""
+    @functools.wraps(method)
+    def wrapper(self, X, *args, **kwargs):
+        if _state.path is None:
+            return method(self, X, *args, **kwargs)
+        features = X.shape[1] if getattr(X, "ndim", 1) == 2 else None
+        with span(f"{self.name}.{method.__name__}", model=self.name, rows=len(X), features=features):
+            return method(self, X, *args, **kwargs)
+    return wrapper
+
+
+if os.environ.get("NBA_TRACE"):
+    enable(os.environ["NBA_TRACE"], memory=os.environ.get("NBA_TRACE_MEMORY", "1") == "1")
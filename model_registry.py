@@ -0,0 +1,127 @@
+"""On-disk registry of fitted models.
+
+Each model is saved as a pickle next to a small JSON record of what it was
+trained on: its feature columns, N_GAMES, a fingerprint of its
+hyperparameters and a hash of the training data. A model only needs
+retraining when any of those no longer match. Records are cheap to read,
+and a pickle is only loaded when that model is asked for.
+
+Records also keep how many store rows the model has seen and when it was
+last fitted on the full history, which is what the nightly update needs to
+decide between a partial update, a full refit or leaving it alone.
+"""
+import os
+import json
+import pickle
+from datetime import datetime, timezone
+from data_prep import N_GAMES
+
+REGISTRY_PATH = "data/models"
+
+
+def model_params(model) -> dict:
+    """Hyperparameters of the wrapper and its estimator, leaving out thread counts which don't change results."""
+    # settings kept on the wrapper itself, such as KNN's k or the SVM mode
+    params = {
+        key: repr(value) for key, value in sorted(vars(model).items())
+        if not key.startswith("_") and key != "model" and isinstance(value, (int, float, str, bool, tuple, type(None)))
+    }
+    if model.model is not None:
+        params.update({
+            key: repr(value) for key, value in sorted(model.model.get_params(deep=True).items())
+            if key != "steps" and not hasattr(value, "get_params") and not key.endswith("n_jobs")
+        })
+    return params
+
+
+def model_config(model, feature_cols: list) -> dict:
+    """What a saved model has to match to be reused, apart from the training data."""
+    return {
+        "class": type(model).__name__,
+        "params": model_params(model),
+        "feature_cols": list(feature_cols),
+        "n_games": N_GAMES,
+    }
+
+
+class ModelRegistry:
+    """Saves fitted BasePredictors and loads them back on demand."""
+
+    def __init__(self, root: str = REGISTRY_PATH):
+        self.root = root
+        self._loaded = {}
+
+    def _model_path(self, name):
+        return os.path.join(self.root, name + ".pkl")
+
+    def _record_path(self, name):
+        return os.path.join(self.root, name + ".json")
+
+    def record(self, name: str):
+        """The saved record for name, or None if it was never saved."""
+        if not os.path.exists(self._record_path(name)):
+            return None
+        with open(self._record_path(name)) as f:
+            return json.load(f)
+
+    def is_current(self, name: str, model, feature_cols: list, data_hash: str) -> bool:
+        """True if the saved name was trained with this config on this data."""
+        record = self.record(name)
+        return (
+            record is not None
+            and os.path.exists(self._model_path(name))
+            and record["config"] == model_config(model, feature_cols)
+            # a model the nightly update kept as is until its scheduled refit also counts
+            and data_hash in (record["data_hash"], record.get("accepted_hash"))
+        )
+
+    def stale(self, models: dict, data_hash: str) -> dict:
+        """The entries of a models dict ({name: (model, feature_cols)}) that need retraining."""
+        return {
+            name: (model, feature_cols)
+            for name, (model, feature_cols) in models.items()
+            if not self.is_current(name, model, feature_cols, data_hash)
+        }
+
+    def save(self, name: str, model, feature_cols: list, data_hash: str, fit_time: float = None, config: dict = None,
+             n_rows: int = None, full_fit_at: str = None, **extra):
+        """Save a fitted model. Pass the config taken before fitting, since fitting can add attributes.
+
+        full_fit_at defaults to now, i.e. a model fitted on the full history;
+        a partially updated model passes on the one from its record. extra
+        is stored in the record as is.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(self._model_path(name), "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        now = datetime.now(timezone.utc).isoformat()
+        record = {
+            "name": name,
+            "config": config if config is not None else model_config(model, feature_cols),
+            "data_hash": data_hash,
+            "trained_at": now,
+            "fit_time": fit_time,
+            "n_rows": n_rows,
+            "full_fit_at": full_fit_at if full_fit_at is not None else now,
+            **extra,
+        }
+        self._write_record(name, record)
+        self._loaded[name] = model
+
+    def _write_record(self, name, record):
+        with open(self._record_path(name), "w") as f:
+            json.dump(record, f, indent=2)
+
+    def accept(self, name: str, data_hash: str):
+        """Keep serving the saved name on data_hash without retraining it (until its scheduled refit)."""
+        record = self.record(name)
+        record["accepted_hash"] = data_hash
+        self._write_record(name, record)
+
+    def load(self, name: str):
+        """The fitted model saved as name, unpickled the first time it is asked for."""
+        if name not in self._loaded:
+            with open(self._model_path(name), "rb") as f:
+                self._loaded[name] = pickle.load(f)
+        return self._loaded[name]
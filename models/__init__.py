@@ -1,17 +1,120 @@
-from .base_model import BasePredictor
-from .simple import SimplePredictor
-from .svm import SVMClassifier
-from .rf import RFClassifier
-from .mlp import MLPClassifier
-from .knn import KNNClassifier
-from .nb import NBClassifier
+"""Prediction models, imported on first use.
+
+MODEL_PATHS maps every model name to the module and class implementing it,
+so get_model("RF") imports models.rf and its sklearn estimator and nothing
+else. The classes can still be imported from here by name (from models
+import RFClassifier), which likewise only loads their own module.
+
+tune.py writes the best hyperparameters it found per model to
+BEST_PARAMS_PATH; tuned_params() reads them back for get_model().
+"""
+import os
+import json
+import inspect
+import warnings
+import importlib
+from .base_model import BasePredictor, NotIncrementalError
+
+# name -> (module, class), in the order models are listed and run
+MODEL_PATHS = {
+    "Simple": (".simple", "SimplePredictor"),
+    "SVM": (".svm", "SVMClassifier"),
+    "RandomForest": (".rf", "RFClassifier"),
+    "KNN": (".knn", "KNNClassifier"),
+    "MLP": (".mlp", "MLPClassifier"),
+    "NB": (".nb", "NBClassifier"),
+    "Stacked": (".stacked", "StackedPredictor"),
+}
+MODEL_ALIASES = {"RF": "RandomForest", "NaiveBayes": "NB"}
+# the stacked model fits the others again on time folds, so it only runs when asked for by name
+MODEL_NAMES = [name for name in MODEL_PATHS if name != "Stacked"]
+BEST_PARAMS_PATH = "data/best_params.json"
+
+_CLASS_MODULES = {class_name: module for module, class_name in MODEL_PATHS.values()}
+
+
+def canonical_name(name: str) -> str:
+    """The MODEL_PATHS name of a model name or alias."""
+    name = MODEL_ALIASES.get(name, name)
+    if name not in MODEL_PATHS:
+        raise ValueError(f"Unknown model {name!r}, choose from {', '.join(list(MODEL_PATHS) + list(MODEL_ALIASES))}")
+    return name
+
+
+def model_class(name: str) -> type:
+    """The BasePredictor subclass registered under name, importing its module now."""
+    module, class_name = MODEL_PATHS[canonical_name(name)]
+    return getattr(importlib.import_module(module, __name__), class_name)
+
+
+def get_model(name: str, **kwargs) -> BasePredictor:
+    """A new unfitted model by name or alias.
+
+    Keyword arguments its class doesn't take are set on its sklearn
+    estimator, by set_params name (e.g. max_depth, or mlp__alpha for a
+    pipeline step).
+    """
+    cls = model_class(name)
+    accepted = inspect.signature(cls.__init__).parameters
+    model = cls(**{key: value for key, value in kwargs.items() if key in accepted})
+    estimator_params = {key: value for key, value in kwargs.items() if key not in accepted}
+    if estimator_params:
+        if model.model is None:
+            raise TypeError(f"{name} has no estimator to set {', '.join(estimator_params)} on")
+        model.model.set_params(**estimator_params)
+    return model
+
+
+def tuned_params(feature_cols: list, path: str = BEST_PARAMS_PATH) -> dict:
+    """{model name: get_model() keyword arguments} of the configs saved by tune.py; empty if there are none.
+
+    Only configs tuned on feature_cols are returned; the others are left
+    out with a warning, since they were tuned for different features.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        best = json.load(f)
+    mismatched = [name for name, entry in best.items() if entry.get("feature_cols") != list(feature_cols)]
+    if mismatched:
+        warnings.warn(f"Ignoring the tuned configs of {', '.join(mismatched)} in {path}: "
+                      f"they were tuned on other features than the ones used here")
+    # JSON has no tuples, which sklearn takes for e.g. hidden_layer_sizes
+    params = {
+        canonical_name(name): {key: tuple(value) if isinstance(value, list) else value
+                               for key, value in entry["params"].items()}
+        for name, entry in best.items() if name not in mismatched
+    }
+    # the stacked model builds its members with their tuned configs too
+    if params and "Stacked" not in params:
+        params["Stacked"] = {"member_params": dict(params)}
+    return params
+
+
+def parse_model_names(names: str) -> list:
+    """Canonical names from a comma-separated list such as "RF,NB"; raises ValueError on an unknown one."""
+    return [canonical_name(name.strip()) for name in names.split(",") if name.strip()]
+
+
+def __getattr__(attr):
+    if attr in _CLASS_MODULES:
+        return getattr(importlib.import_module(_CLASS_MODULES[attr], __name__), attr)
+    raise AttributeError(f"module {__name__!r} has no attribute {attr!r}")
+
 
 __all__ = [
     'BasePredictor',
+    'NotIncrementalError',
     'SimplePredictor',
     'SVMClassifier',
     'RFClassifier',
     'NBClassifier',
     'KNNClassifier',
-    'MLPClassifier'
-]
\ No newline at end of file
+    'MLPClassifier',
+    'StackedPredictor',
+    'MODEL_NAMES',
+    'get_model',
+    'tuned_params',
+    'model_class',
+    'parse_model_names',
+]
@@ -1,15 +1,55 @@
 import numpy as np
 import pandas as pd
 from abc import ABC, abstractmethod
+from instrumentation import traced_method
+
+TRACED_METHODS = ("fit", "refit", "partial_update", "predict", "predict_proba")
+
+
+class NotIncrementalError(Exception):
+    """partial_update() was called on a model whose incremental is False."""
 
 
 class BasePredictor(ABC):
     """Base class for all prediction models."""
 
+    # whether the model can use more than one thread itself (see set_n_threads)
+    parallel = False
+    # whether partial_update() can fold new games into the fitted model; on
+    # models without it, partial_update() raises NotIncrementalError and
+    # they are refitted on the full history instead
+    incremental = False
+
     def __init__(self, name: str):
         self.name = name
         self.model = None
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # every subclass gets instrumentation spans without having to ask for them
+        for method_name in TRACED_METHODS:
+            if method_name in cls.__dict__:
+                setattr(cls, method_name, traced_method(cls.__dict__[method_name]))
+
+    def refit(self, X_train: pd.DataFrame, y_train: pd.Series):
+        """Fit again after new rows were appended to the training data.
+
+        A full fit, unless the model can start from its previous one.
+        """
+        self.fit(X_train, y_train)
+
+    def partial_update(self, X_new: pd.DataFrame, y_new: pd.Series):
+        """Fold newly played games into the fitted model without going over the full history again.
+
+        Only models with incremental = True support it; the rest raise
+        NotIncrementalError and wait for a full refit.
+        """
+        raise NotIncrementalError(f"{self.name} can't be updated incrementally, refit it on the full history")
+
+    def set_n_threads(self, n_threads: int):
+        """Limit the threads the model uses internally. No-op for single-threaded models."""
+        pass
+
     @abstractmethod
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
         pass
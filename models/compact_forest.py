@@ -0,0 +1,187 @@
+"""Flat-array export of a fitted sklearn random forest, for fast inference.
+
+sklearn keeps each tree as a 64-byte struct per node plus a float64 class
+distribution per node, and predict_proba walks the trees one at a time.
+CompactForest stores only what inference needs, for every tree at once:
+
+    feature     int16 per split node
+    threshold   float32 per split node, rounded down so float32 inputs
+                take exactly the same branch as in sklearn
+    children    int32 pair per split node; ~i (negative) points at leaf i
+    leaf_value  probability of the positive class per leaf
+    roots       int32 per tree, in the same encoding as children
+
+Evaluation walks all (row, tree) pairs down one level per step with numpy,
+so its cost is set by the depth of the trees rather than their number.
+With the default float64 leaves and no pruning, probabilities match the
+sklearn forest up to floating-point summation order (~1e-15).
+"""
+import numpy as np
+from sklearn.base import BaseEstimator
+
+# rows evaluated at once, to bound the (rows x trees) working arrays
+BATCH_ROWS = 4096
+ARRAYS = ("feature_", "threshold_", "children_", "leaf_value_", "roots_", "classes_")
+
+
+def _round_down_float32(threshold):
+    """Largest float32 <= threshold, so that x32 <= result exactly when x32 <= threshold."""
+    rounded = threshold.astype(np.float32)
+    too_big = rounded.astype(np.float64) > threshold
+    rounded[too_big] = np.nextafter(rounded[too_big], np.float32(-np.inf))
+    return rounded
+
+
+def _kept_nodes(tree, max_depth, min_samples_leaf):
+    """(nodes, is_leaf) of the nodes that survive pruning, walking the tree one level at a time."""
+    natural_leaf = tree.children_left == -1
+    nodes, leaves = [], []
+    frontier = np.array([0])
+    depth = 0
+    while len(frontier):
+        leaf = natural_leaf[frontier]
+        if max_depth is not None and depth >= max_depth:
+            leaf = np.ones(len(frontier), dtype=bool)
+        elif min_samples_leaf is not None:
+            # collapse splits that leave either side with too few training rows
+            small = np.minimum(tree.n_node_samples[np.where(leaf, 0, tree.children_left[frontier])],
+                               tree.n_node_samples[np.where(leaf, 0, tree.children_right[frontier])])
+            leaf = leaf | (small < min_samples_leaf)
+        nodes.append(frontier)
+        leaves.append(leaf)
+        split = frontier[~leaf]
+        frontier = np.concatenate([tree.children_left[split], tree.children_right[split]])
+        depth += 1
+    return np.concatenate(nodes), np.concatenate(leaves)
+
+
+class CompactForest(BaseEstimator):
+    """Read-only copy of a fitted RandomForestClassifier with the predict/predict_proba interface.
+
+    max_depth cuts every tree at that depth and min_samples_leaf collapses
+    splits with fewer training rows on either side; both turn the cut node
+    into a leaf holding its class distribution. leaf_dtype=np.float32 halves
+    the leaf storage at a cost of ~1e-7 in the probabilities.
+    """
+
+    def __init__(self, max_depth: int = None, min_samples_leaf: int = None, leaf_dtype=np.float64):
+        self.max_depth = max_depth
+        self.min_samples_leaf = min_samples_leaf
+        self.leaf_dtype = leaf_dtype
+
+    @classmethod
+    def from_forest(cls, forest, max_depth: int = None, min_samples_leaf: int = None, leaf_dtype=np.float64):
+        if len(forest.classes_) != 2:
+            raise ValueError("CompactForest only supports binary classifiers")
+        compact = cls(max_depth, min_samples_leaf, leaf_dtype)
+
+        features, thresholds, children, leaf_values, roots = [], [], [], [], []
+        n_splits = n_leaves = 0
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            nodes, is_leaf = _kept_nodes(tree, max_depth, min_samples_leaf)
+
+            # renumber the kept nodes: splits and leaves each continue the forest-wide numbering
+            index = np.zeros(tree.node_count, dtype=np.int64)
+            index[nodes[~is_leaf]] = n_splits + np.arange((~is_leaf).sum())
+            index[nodes[is_leaf]] = ~(n_leaves + np.arange(is_leaf.sum()))
+
+            splits, leaves = nodes[~is_leaf], nodes[is_leaf]
+            features.append(tree.feature[splits])
+            thresholds.append(tree.threshold[splits])
+            children.append(np.stack([index[tree.children_left[splits]], index[tree.children_right[splits]]], axis=1))
+            value = tree.value[leaves, 0, :]
+            leaf_values.append(value[:, 1] / value.sum(axis=1))
+            roots.append(index[0])
+
+            n_splits += len(splits)
+            n_leaves += len(leaves)
+
+        n_features = forest.n_features_in_
+        compact.feature_ = np.concatenate(features).astype(np.int16 if n_features < 2**15 else np.int32)
+        compact.threshold_ = _round_down_float32(np.concatenate(thresholds))
+        compact.children_ = np.concatenate(children).astype(np.int32).reshape(-1, 2)
+        compact.leaf_value_ = np.concatenate(leaf_values).astype(leaf_dtype)
+        compact.roots_ = np.array(roots, dtype=np.int32)
+        compact.classes_ = forest.classes_
+        compact.n_features_in_ = n_features
+        if hasattr(forest, "feature_names_in_"):
+            compact.feature_names_in_ = np.asarray(forest.feature_names_in_, dtype=str)
+        return compact
+
+    @property
+    def n_trees(self):
+        return len(self.roots_)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the node arrays."""
+        return sum(getattr(self, name).nbytes for name in ARRAYS)
+
+    def _positive_proba(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X))
+        for start in range(0, len(X), BATCH_ROWS):
+            out[start:start + BATCH_ROWS] = self._batch(X[start:start + BATCH_ROWS])
+        return out
+
+    def _batch(self, X):
+        n_rows, n_trees = len(X), self.n_trees
+        flat_X = np.ascontiguousarray(X).ravel()
+        flat_children = self.children_.ravel()
+        node = np.tile(self.roots_, n_rows)
+
+        # (row, tree) pairs still at a split move down one level per step; only
+        # pairs that reach a leaf are written back
+        pair = np.flatnonzero(node >= 0).astype(np.int32)
+        at = node[pair]
+        row_start = (pair // n_trees) * np.int32(X.shape[1])
+        while len(pair):
+            right = flat_X.take(row_start + self.feature_.take(at)) > self.threshold_.take(at)
+            at = flat_children.take(2 * at + right)
+            done = at < 0
+            if done.any():
+                node[pair[done]] = at[done]
+                waiting = ~done
+                pair, at, row_start = pair[waiting], at[waiting], row_start[waiting]
+
+        return self.leaf_value_.take(~node).reshape(n_rows, n_trees).sum(axis=1, dtype=np.float64) / n_trees
+
+    def predict_proba_one(self, x) -> float:
+        """Positive-class probability of a single row, without any batch bookkeeping."""
+        x = np.asarray(x, dtype=np.float32).ravel()
+        node = self.roots_.copy()
+        active = np.flatnonzero(node >= 0)
+        while len(active):
+            at = node[active]
+            node[active] = self.children_[at, (x[self.feature_[at]] > self.threshold_[at]).view(np.int8)]
+            active = active[node[active] >= 0]
+        return float(self.leaf_value_[~node].sum(dtype=np.float64) / len(node))
+
+    def predict_proba(self, X) -> np.ndarray:
+        positive = self._positive_proba(X)
+        return np.column_stack([1 - positive, positive])
+
+    def predict(self, X) -> np.ndarray:
+        # like sklearn, a tie goes to the first class
+        return self.classes_[(self._positive_proba(X) > 0.5).astype(int)]
+
+    def save(self, path):
+        """Write the node arrays to one uncompressed .npz file."""
+        # -1 stands for no pruning, since npz holds arrays only
+        params = {name: -1 if getattr(self, name) is None else getattr(self, name) for name in ("max_depth", "min_samples_leaf")}
+        names = {"feature_names_in_": self.feature_names_in_} if hasattr(self, "feature_names_in_") else {}
+        np.savez(path, n_features_in_=self.n_features_in_, **params, **names,
+                 **{name: getattr(self, name) for name in ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            params = {name: None if int(data[name]) < 0 else int(data[name]) for name in ("max_depth", "min_samples_leaf")}
+            compact = cls(**params, leaf_dtype=data["leaf_value_"].dtype.type)
+            for name in ARRAYS:
+                setattr(compact, name, data[name])
+            compact.n_features_in_ = int(data["n_features_in_"])
+            if "feature_names_in_" in data:
+                compact.feature_names_in_ = data["feature_names_in_"]
+        return compact
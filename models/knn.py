@@ -1,29 +1,195 @@
+import hashlib
 import pandas as pd
 import numpy as np
+from sklearn.base import BaseEstimator
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neighbors import NearestNeighbors
+from sklearn.metrics import accuracy_score, roc_auc_score
+from feature_matrix import FeatureMatrix, fit_pipeline, standardize, partial_fit_scaler, rescale, raw_features
 from .base_model import BasePredictor
 
 
+class _NNDescentIndex(BaseEstimator):
+    """Approximate neighbor index on pynndescent (installed with umap), with the NearestNeighbors interface."""
+
+    def __init__(self, n_neighbors: int = 5, random_state: int = 42):
+        self.n_neighbors = n_neighbors
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        from pynndescent import NNDescent
+        self.index_ = NNDescent(np.asarray(X, dtype=np.float32), random_state=self.random_state)
+        self.index_.prepare()
+        return self
+
+    def kneighbors(self, X=None, n_neighbors=None):
+        """Like NearestNeighbors, X=None queries the training rows without matching each to itself."""
+        k = n_neighbors or self.n_neighbors
+        if X is None:
+            indices, distances = self.index_.neighbor_graph
+            if indices.shape[1] <= k:
+                indices, distances = self.index_.query(self.index_._raw_data, k=k + 1)
+            return distances[:, 1:k + 1], indices[:, 1:k + 1]
+
+        indices, distances = self.index_.query(np.asarray(X, dtype=np.float32), k=k)
+        return distances, indices
+
+    def training_rows(self):
+        return self.index_._raw_data
+
+
 class KNNClassifier(BasePredictor):
-    """K-Nearest Neighbors binary classifier."""
+    """K-Nearest Neighbors binary classifier.
+
+    The neighbor graph of a query set is computed once up to max_k and
+    cached, so predictions for any k <= max_k, uniform or distance-weighted,
+    are slices of the same arrays. k_sweep() scores every k on the training
+    history from one leave-one-out graph.
+
+    partial_update() re-expresses the indexed rows in the updated scaler's
+    units, appends the new ones and rebuilds the index, which gives the same
+    neighbors as a full refit.
+    """
+
+    incremental = True
 
     DEFAULT_K = 5
+    WEIGHTS = ("uniform", "distance")
+    ALGORITHMS = ("auto", "brute", "kd_tree", "ball_tree", "approx")
 
-    def __init__(self, n_neighbors: int = None):
+    # below this many rows brute force beats building a tree;
+    # above APPROX_MIN_ROWS an approximate index is used if pynndescent is installed
+    BRUTE_MAX_ROWS = 10_000
+    APPROX_MIN_ROWS = 2_000_000
+
+    def __init__(self, n_neighbors: int = None, max_k: int = None, weights: str = "uniform", algorithm: str = "auto"):
         super().__init__(name="KNN")
+        if weights not in self.WEIGHTS:
+            raise ValueError(f"weights must be one of {self.WEIGHTS}, got {weights!r}")
+        if algorithm not in self.ALGORITHMS:
+            raise ValueError(f"algorithm must be one of {self.ALGORITHMS}, got {algorithm!r}")
+
         self.n_neighbors = n_neighbors if n_neighbors is not None else self.DEFAULT_K
+        self.max_k = max(max_k if max_k is not None else self.n_neighbors, self.n_neighbors)
+        self.weights = weights
+        self.algorithm = algorithm
+        self.model = None
+
+        self._y = None
+        self._graph_key = None
+        self._graph = None
+
+    def __getstate__(self):
+        # the cached graph belongs to whatever was scored last, not to the fitted model
+        state = self.__dict__.copy()
+        state["_graph_key"] = None
+        state["_graph"] = None
+        return state
+
+    def choose_algorithm(self, n_rows: int) -> str:
+        """The index to build for n_rows training rows when algorithm="auto"."""
+        if self.algorithm != "auto":
+            return self.algorithm
+        if n_rows <= self.BRUTE_MAX_ROWS:
+            return "brute"
+        if n_rows >= self.APPROX_MIN_ROWS:
+            try:
+                import pynndescent  # noqa: F401
+                return "approx"
+            except ImportError:
+                pass
+        # the features are low-dimensional, where a k-d tree stays fast
+        return "kd_tree"
+
+    def _build_index(self, n_rows: int):
+        algorithm = self.choose_algorithm(n_rows)
+        if algorithm == "approx":
+            return _NNDescentIndex(n_neighbors=self.max_k)
+        return NearestNeighbors(n_neighbors=self.max_k, algorithm=algorithm)
+
+    def _training_rows(self):
+        """The standardized rows the index was built on."""
+        index = self.model.named_steps["index"]
+        return index.training_rows() if isinstance(index, _NNDescentIndex) else index._fit_X
+
+    def _reset_graph(self):
+        self._graph_key = None
+        self._graph = None
+
+    def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
         self.model = Pipeline([
             ("scaler", StandardScaler()),
-            ("knn", KNeighborsClassifier(n_neighbors=self.n_neighbors))
+            ("index", self._build_index(len(X_train)))
         ])
+        fit_pipeline(self.model, X_train)
+        self._y = np.asarray(y_train, dtype=np.float64)
+        self._reset_graph()
 
-    def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
-        self.model.fit(X_train, y_train)
+    def partial_update(self, X_new: pd.DataFrame, y_new: pd.Series):
+        rows = self._training_rows()
+        old, new = partial_fit_scaler(self.model, X_new)
+
+        rows = np.vstack([rescale(rows, old, new), new.transform(raw_features(X_new))])
+        self.model.steps[1] = ("index", self._build_index(len(rows)).fit(rows))
+        self._y = np.concatenate([self._y, np.asarray(y_new, dtype=np.float64)])
+        self._reset_graph()
+
+    def neighbor_graph(self, X: pd.DataFrame):
+        """(distances, indices) of each row's max_k nearest training rows, cached for the last X seen."""
+        values = np.ascontiguousarray(X.values if isinstance(X, FeatureMatrix) else X, dtype=np.float64)
+        key = hashlib.sha1(values.tobytes()).hexdigest()
+        if key != self._graph_key:
+            self._graph = self.model.named_steps["index"].kneighbors(standardize(self.model, X), n_neighbors=self.max_k)
+            self._graph_key = key
+        return self._graph
+
+    def _proba_from_graph(self, distances, indices, k, weights):
+        labels = self._y[indices[:, :k]]
+        if weights == "uniform":
+            return labels.mean(axis=1)
+
+        # like sklearn, an exact match takes all of the weight
+        with np.errstate(divide="ignore"):
+            w = 1.0 / distances[:, :k]
+        exact = np.isinf(w)
+        w = np.where(exact.any(axis=1, keepdims=True), exact.astype(np.float64), w)
+        return (w * labels).sum(axis=1) / w.sum(axis=1)
+
+    def _check_k(self, k, weights):
+        k = k if k is not None else self.n_neighbors
+        weights = weights if weights is not None else self.weights
+        if k > self.max_k:
+            raise ValueError(f"k={k} is larger than max_k={self.max_k} the graph was built for")
+        return k, weights
+
+    def predict(self, X: pd.DataFrame, k: int = None, weights: str = None) -> np.ndarray:
+        # ties go to the away team, as KNeighborsClassifier picks the first class
+        return (self.predict_proba(X, k, weights) > 0.5).astype(int)
+
+    def predict_proba(self, X: pd.DataFrame, k: int = None, weights: str = None) -> np.ndarray:
+        k, weights = self._check_k(k, weights)
+        distances, indices = self.neighbor_graph(X)
+        return self._proba_from_graph(distances, indices, k, weights)
+
+    def k_sweep(self, ks: list = None) -> pd.DataFrame:
+        """Leave-one-out accuracy and AUC on the training rows for every k and weighting.
 
-    def predict(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict(X)
+        Uses one max_k neighbor graph of the training set in which no row is
+        its own neighbor.
+        """
+        ks = ks if ks is not None else list(range(1, self.max_k + 1))
+        distances, indices = self.model.named_steps["index"].kneighbors(None, n_neighbors=self.max_k)
 
-    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict_proba(X)[:, 1]
\ No newline at end of file
+        rows = []
+        for weights in self.WEIGHTS:
+            for k in ks:
+                self._check_k(k, weights)
+                proba = self._proba_from_graph(distances, indices, k, weights)
+                rows.append({
+                    "k": k,
+                    "weights": weights,
+                    "accuracy": accuracy_score(self._y, proba > 0.5),
+                    "auc": roc_auc_score(self._y, proba),
+                })
+        return pd.DataFrame(rows)
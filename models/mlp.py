@@ -1,17 +1,26 @@
+import warnings
 import pandas as pd
 import numpy as np
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.neural_network import MLPClassifier as SklearnMLPClassifier
+from sklearn.exceptions import ConvergenceWarning
+from feature_matrix import fit_pipeline, pipeline_input, partial_fit_scaler, raw_features
 from .base_model import BasePredictor
 
 
 class MLPClassifier(BasePredictor):
     """Multi-layer Perceptron (neural network) binary classifier."""
 
+    incremental = True
+
     DEFAULT_HIDDEN_LAYERS = (100, 50)
     DEFAULT_RANDOM_STATE = 42
     DEFAULT_MAX_ITER = 500
+    # epochs a refit runs on top of the previous weights
+    WARM_START_MAX_ITER = 50
+    # passes over the new rows in partial_update
+    PARTIAL_UPDATE_EPOCHS = 1
 
     def __init__(self, hidden_layer_sizes: tuple = None, random_state: int = None, max_iter: int = None):
         super().__init__(name="MLP")
@@ -25,10 +34,40 @@ class MLPClassifier(BasePredictor):
         ])
 
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
-        self.model.fit(X_train, y_train)
+        fit_pipeline(self.model, X_train, y_train)
+
+    def refit(self, X_train: pd.DataFrame, y_train: pd.Series):
+        mlp = self.model.named_steps["mlp"]
+        if not hasattr(mlp, "coefs_"):
+            self.fit(X_train, y_train)
+            return
+
+        params = mlp.get_params()
+        mlp.set_params(warm_start=True, max_iter=self.WARM_START_MAX_ITER)
+        try:
+            # stopping short of convergence is the point of a warm start
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", ConvergenceWarning)
+                fit_pipeline(self.model, X_train, y_train)
+        finally:
+            mlp.set_params(warm_start=params["warm_start"], max_iter=params["max_iter"])
+
+    def partial_update(self, X_new: pd.DataFrame, y_new: pd.Series):
+        old, new = partial_fit_scaler(self.model, X_new)
+        mlp = self.model.named_steps["mlp"]
+
+        # the first layer absorbs the change of scaler, so the network's outputs are unchanged by it
+        mlp.intercepts_[0] = mlp.intercepts_[0] + ((new.mean_ - old.mean_) / old.scale_) @ mlp.coefs_[0]
+        mlp.coefs_[0] = mlp.coefs_[0] * (new.scale_ / old.scale_)[:, None]
+
+        X_new = new.transform(raw_features(X_new))
+        for _ in range(self.PARTIAL_UPDATE_EPOCHS):
+            mlp.partial_fit(X_new, y_new)
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict(X)
+        estimator, X = pipeline_input(self.model, X)
+        return estimator.predict(X)
 
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict_proba(X)[:, 1]
\ No newline at end of file
+        estimator, X = pipeline_input(self.model, X)
+        return estimator.predict_proba(X)[:, 1]
\ No newline at end of file
@@ -3,11 +3,18 @@ import numpy as np
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from sklearn.naive_bayes import GaussianNB
+from feature_matrix import fit_pipeline, pipeline_input, partial_fit_scaler, rescale, raw_features
 from .base_model import BasePredictor
 
 
 class NBClassifier(BasePredictor):
-    """Naive Bayes (Gaussian) binary classifier."""
+    """Naive Bayes (Gaussian) binary classifier.
+
+    partial_update() is exact up to GaussianNB's variance smoothing: the
+    scaler and the per-class means and variances are all running statistics.
+    """
+
+    incremental = True
 
     def __init__(self):
         super().__init__(name="NaiveBayes")
@@ -17,10 +24,21 @@ class NBClassifier(BasePredictor):
         ])
 
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
-        self.model.fit(X_train, y_train)
+        fit_pipeline(self.model, X_train, y_train)
+
+    def partial_update(self, X_new: pd.DataFrame, y_new: pd.Series):
+        old, new = partial_fit_scaler(self.model, X_new)
+        nb = self.model.named_steps["nb"]
+
+        # move the class Gaussians into the updated scaler's units before adding the new rows
+        nb.theta_ = rescale(nb.theta_, old, new)
+        nb.var_ = (nb.var_ - nb.epsilon_) * (old.scale_ / new.scale_) ** 2 + nb.epsilon_
+        nb.partial_fit(new.transform(raw_features(X_new)), y_new)
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict(X)
+        estimator, X = pipeline_input(self.model, X)
+        return estimator.predict(X)
 
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict_proba(X)[:, 1]
\ No newline at end of file
+        estimator, X = pipeline_input(self.model, X)
+        return estimator.predict_proba(X)[:, 1]
\ No newline at end of file
@@ -1,15 +1,25 @@
+import copy
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+import instrumentation
+from feature_matrix import raw_features
 from .base_model import BasePredictor
+from .compact_forest import CompactForest
 
 
 class RFClassifier(BasePredictor):
-    """Random Forest binary classifier."""
+    """Random Forest binary classifier.
+
+    compact() gives a copy for inference only, with the fitted trees in flat
+    arrays (see CompactForest).
+    """
 
     DEFAULT_N_ESTIMATORS = 200
     DEFAULT_RANDOM_STATE = 42
 
+    parallel = True
+
     def __init__(self, n_estimators: int = None, random_state: int = None, n_jobs: int = -1):
         super().__init__(name="RandomForest")
         self.model = RandomForestClassifier(
@@ -18,13 +28,26 @@ class RFClassifier(BasePredictor):
             n_jobs=n_jobs
         )
 
+    def set_n_threads(self, n_threads: int):
+        if isinstance(self.model, RandomForestClassifier):
+            self.model.set_params(n_jobs=n_threads)
+
+    def compact(self, max_depth: int = None, min_samples_leaf: int = None, leaf_dtype=np.float64) -> "RFClassifier":
+        """A copy of the fitted model that predicts with a CompactForest of its trees."""
+        compact = copy.copy(self)
+        compact.model = CompactForest.from_forest(self.model, max_depth, min_samples_leaf, leaf_dtype)
+        return compact
+
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
-        self.model.fit(X_train, y_train)
-        print(self.model.feature_importances_)
+        self.model.fit(raw_features(X_train), y_train)
+        # averaging importances over every tree isn't free, so only when tracing
+        if instrumentation.enabled():
+            instrumentation.event("RandomForest.feature_importances", model=self.name,
+                                  features=list(X_train.columns), importances=self.model.feature_importances_)
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict(X)
+        return self.model.predict(raw_features(X))
 
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
-        probs = self.model.predict_proba(X)
+        probs = self.model.predict_proba(raw_features(X))
         return probs[:, 1]
\ No newline at end of file
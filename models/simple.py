@@ -1,19 +1,26 @@
 import pandas as pd
 import numpy as np
+import instrumentation
 from .base_model import BasePredictor
 
 
 class SimplePredictor(BasePredictor):
     """Simple baseline predictor. Always predicts the home team will win."""
 
+    incremental = True
+
     def __init__(self):
         super().__init__(name="Simple")
 
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
         pass
 
+    def partial_update(self, X_new: pd.DataFrame, y_new: pd.Series):
+        pass
+
     def predict(self, X: pd.DataFrame) -> np.ndarray:
-        print(X)
+        if instrumentation.enabled():
+            instrumentation.event("Simple.predict_input", model=self.name, rows=len(X), columns=list(X.columns))
         return np.full(len(X), 1)
     
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
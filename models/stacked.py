@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from feature_matrix import FeatureMatrix, raw_features
+from oof_cache import OOFCache, OOF_CACHE_PATH, N_FOLDS, table_hash
+from .base_model import BasePredictor
+from . import canonical_name, get_model
+
+# probabilities are clipped this far from 0 and 1 before taking logits
+LOGIT_EPS = 1e-6
+
+
+def _logit(p):
+    p = np.clip(p, LOGIT_EPS, 1 - LOGIT_EPS)
+    return np.log(p / (1 - p))
+
+
+class StackedPredictor(BasePredictor):
+    """Logistic regression over the logits of other models' probabilities.
+
+    The meta-model is fitted on the members' out-of-fold probabilities from
+    the OOF cache, so only members whose config or training data changed
+    are fitted again; adding a member or changing the meta-model's C costs
+    one meta-fit. New games are scored by the members fitted on the full
+    history (kept in the same cache entries), all from one shared
+    standardized matrix.
+
+    member_params maps member names to their get_model() keyword
+    arguments, e.g. tuned_params(). They are part of each member's config,
+    so they key its OOF cache entry too.
+    """
+
+    DEFAULT_MEMBERS = ("NB", "KNN", "RandomForest", "MLP")
+
+    parallel = True
+
+    def __init__(self, members: tuple = DEFAULT_MEMBERS, C: float = 1.0, n_folds: int = N_FOLDS,
+                 cache_dir: str = OOF_CACHE_PATH, member_params: dict = None):
+        super().__init__(name="Stacked")
+        self.members = tuple(canonical_name(member) for member in members)
+        member_params = {canonical_name(name): params for name, params in (member_params or {}).items()}
+        # kept as sorted (member, ((key, value), ...)) pairs, so the registry's config fingerprint sees them
+        self.member_params = tuple((name, tuple(sorted(member_params[name].items())))
+                                   for name in self.members if member_params.get(name))
+        self.n_folds = n_folds
+        self.cache_dir = cache_dir
+        self._n_threads = 1
+        self.fitted_members = {}
+        self.scaler = None
+        self.model = LogisticRegression(C=C)
+
+    def set_n_threads(self, n_threads: int):
+        self._n_threads = n_threads
+        for member in self.fitted_members.values():
+            member.set_n_threads(n_threads)
+
+    def _new_member(self, name):
+        member = get_model(name, **dict(dict(self.member_params).get(name, ())))
+        member.set_n_threads(self._n_threads)
+        return member
+
+    def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
+        if not isinstance(X_train, FeatureMatrix):
+            X_train = FeatureMatrix.build(X_train, list(X_train.columns))
+        y_train = pd.Series(np.asarray(y_train), copy=False)
+
+        cache = OOFCache(self.cache_dir)
+        data_hash = table_hash(X_train, y_train)
+        oof = np.empty((len(X_train), len(self.members)))
+        self.fitted_members = {}
+        for i, name in enumerate(self.members):
+            oof[:, i], member = cache.member(lambda: self._new_member(name), X_train, y_train, self.n_folds, data_hash)
+            member.set_n_threads(self._n_threads)
+            self.fitted_members[name] = member
+        self.scaler = X_train.scaler
+
+        # the oldest rows are never out of fold
+        scored = ~np.isnan(oof).any(axis=1)
+        self.model.fit(_logit(oof[scored]), y_train[scored])
+
+    def member_probas(self, X: pd.DataFrame) -> np.ndarray:
+        """(rows, members) positive-class probabilities, standardizing X once for every member."""
+        if not len(X):
+            return np.empty((0, len(self.members)))
+        if not isinstance(X, FeatureMatrix):
+            frame = raw_features(X)
+            X = FeatureMatrix.build(frame, list(frame.columns), self.scaler)
+        probas = np.empty((len(X), len(self.members)))
+        for i, name in enumerate(self.members):
+            probas[:, i] = self.fitted_members[name].predict_proba(X)
+        return probas
+
+    def predict(self, X: pd.DataFrame) -> np.ndarray:
+        if not len(X):
+            return np.empty(0, dtype=self.model.classes_.dtype)
+        return self.model.predict(_logit(self.member_probas(X)))
+
+    def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
+        if not len(X):
+            return np.empty(0)
+        return self.model.predict_proba(_logit(self.member_probas(X)))[:, 1]
@@ -2,30 +2,80 @@ import pandas as pd
 import numpy as np
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
-from sklearn.svm import SVC
+from sklearn.svm import SVC, LinearSVC
+from sklearn.kernel_approximation import Nystroem
+from sklearn.linear_model import LogisticRegression
+from feature_matrix import fit_pipeline, pipeline_input, take_rows
 from .base_model import BasePredictor
 
 
 class SVMClassifier(BasePredictor):
-    """Support Vector Machine binary classifier."""
+    """Support Vector Machine binary classifier.
 
-    #DEFAULT_RANDOM_STATE = 42
+    mode="exact" is an RBF-kernel SVC with its built-in Platt scaling, which
+    scales roughly quadratically with the number of rows. mode="approx" maps
+    the scaled features through a Nystroem approximation of the same kernel
+    and fits a linear SVM on them, so fitting is linear in the number of rows
+    and scoring costs the same for every row. Its probabilities come from one
+    Platt calibration on the most recent CALIBRATION_FRACTION of the training
+    rows, which the linear SVM does not see.
+    """
 
-    def __init__(self, random_state: int = None):
+    MODES = ("exact", "approx")
+    DEFAULT_RANDOM_STATE = 42
+    DEFAULT_N_COMPONENTS = 300
+    CALIBRATION_FRACTION = 0.1
+
+    def __init__(self, random_state: int = None, mode: str = "exact", n_components: int = None):
         super().__init__(name="SVM")
-        self.model = Pipeline([
-            ("scaler", StandardScaler()),
-            ("svm", SVC(
-                probability=True,
-                random_state=42
-            ))
-        ])
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}, got {mode!r}")
+
+        self.mode = mode
+        random_state = random_state if random_state is not None else self.DEFAULT_RANDOM_STATE
+        self.calibrator = None
+
+        if mode == "exact":
+            self.model = Pipeline([
+                ("scaler", StandardScaler()),
+                ("svm", SVC(
+                    probability=True,
+                    random_state=random_state
+                ))
+            ])
+        else:
+            # Nystroem's default gamma of 1 / n_features matches SVC's gamma="scale" on standardized features
+            self.model = Pipeline([
+                ("scaler", StandardScaler()),
+                ("kernel", Nystroem(
+                    kernel="rbf",
+                    n_components=n_components if n_components is not None else self.DEFAULT_N_COMPONENTS,
+                    random_state=random_state
+                )),
+                ("svm", LinearSVC(random_state=random_state))
+            ])
 
     def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
-        self.model.fit(X_train, y_train)
+        if self.mode == "exact":
+            fit_pipeline(self.model, X_train, y_train)
+            return
+
+        # rows are in date order, so the held-out slice is the most recent games
+        split = int(len(X_train) * (1 - self.CALIBRATION_FRACTION))
+        fit_pipeline(self.model, take_rows(X_train, 0, split), y_train.iloc[:split])
+
+        estimator, X_cal = pipeline_input(self.model, take_rows(X_train, split, len(X_train)))
+        scores = estimator.decision_function(X_cal).reshape(-1, 1)
+        self.calibrator = LogisticRegression().fit(scores, y_train.iloc[split:])
 
     def predict(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict(X)
+        estimator, X = pipeline_input(self.model, X)
+        return estimator.predict(X)
 
     def predict_proba(self, X: pd.DataFrame) -> np.ndarray:
-        return self.model.predict_proba(X)[:, 1]
\ No newline at end of file
+        estimator, X = pipeline_input(self.model, X)
+        if self.mode == "exact":
+            return estimator.predict_proba(X)[:, 1]
+
+        scores = estimator.decision_function(X).reshape(-1, 1)
+        return self.calibrator.predict_proba(scores)[:, 1]
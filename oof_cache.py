@@ -0,0 +1,125 @@
+"""On-disk cache of out-of-fold model predictions, for stacking.
+
+A member's out-of-fold (OOF) probabilities come from time-ordered folds
+over the date-ordered training rows: the rows are cut into n_folds + 1
+blocks, and fold k is fitted on blocks 0..k-1 and scores block k, so no
+game is ever scored by a model that saw later games. The first block has
+no OOF prediction and is left as NaN.
+
+Entries are keyed by the member's config (as in the model registry) and a
+hash of the feature table it was given, so they are reused across runs
+and processes until either changes. Each entry also keeps the member
+fitted on all rows, which is what a stacked model scores new games with.
+"""
+import os
+import json
+import time
+import pickle
+import hashlib
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+from feature_matrix import FeatureMatrix, raw_features
+from model_registry import model_config
+
+OOF_CACHE_PATH = "data/oof"
+N_FOLDS = 5
+
+
+def time_folds(n_rows: int, n_folds: int = N_FOLDS) -> list:
+    """(train, valid) row slices of n_folds expanding-window folds."""
+    bounds = np.linspace(0, n_rows, n_folds + 2).round().astype(int)
+    return [(slice(0, int(start)), slice(int(start), int(stop))) for start, stop in zip(bounds[1:-1], bounds[2:])]
+
+
+def table_hash(X, y) -> str:
+    """sha256 of the columns and values of a feature table and its labels."""
+    frame = raw_features(X)
+    digest = hashlib.sha256()
+    digest.update(json.dumps([str(col) for col in frame.columns]).encode())
+    values = X.values if isinstance(X, FeatureMatrix) else frame.to_numpy(dtype=np.float64)
+    digest.update(memoryview(np.ascontiguousarray(values)))
+    digest.update(memoryview(np.ascontiguousarray(np.asarray(y, dtype=np.int64))))
+    return digest.hexdigest()
+
+
+def oof_key(config: dict, data_hash: str, n_folds: int) -> str:
+    payload = json.dumps({"config": config, "data_hash": data_hash, "n_folds": n_folds}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:20]
+
+
+def out_of_fold(make_model, X: FeatureMatrix, y: pd.Series, n_folds: int = N_FOLDS) -> np.ndarray:
+    """OOF positive-class probabilities of new models from make_model() over time_folds of X.
+
+    Each fold gets its own scaler fitted on its training rows, like a model
+    trained at that point in time would have.
+    """
+    oof = np.full(len(X), np.nan)
+    for train, valid in time_folds(len(X), n_folds):
+        X_train = FeatureMatrix.build(X.values[train], X.columns)
+        X_valid = FeatureMatrix.build(X.values[valid], X.columns, X_train.scaler)
+        model = make_model()
+        model.fit(X_train, y.iloc[train])
+        oof[valid] = model.predict_proba(X_valid)
+    return oof
+
+
+class OOFCache:
+    """OOF probabilities and full-history fits of BasePredictors, stored per config and feature table."""
+
+    def __init__(self, root: str = OOF_CACHE_PATH):
+        self.root = root
+
+    def _path(self, key, ext):
+        return os.path.join(self.root, key + ext)
+
+    def record(self, key: str):
+        """The saved record for key, or None if there is no complete entry."""
+        if not all(os.path.exists(self._path(key, ext)) for ext in (".json", ".npy", ".pkl")):
+            return None
+        with open(self._path(key, ".json")) as f:
+            return json.load(f)
+
+    def load(self, key: str):
+        """(oof, fitted model) saved under key."""
+        with open(self._path(key, ".pkl"), "rb") as f:
+            model = pickle.load(f)
+        return np.load(self._path(key, ".npy")), model
+
+    def save(self, key: str, oof: np.ndarray, model, record: dict):
+        # written under temporary names and moved into place, so processes filling
+        # the cache at the same time never see half an entry
+        os.makedirs(self.root, exist_ok=True)
+        suffix = f".{os.getpid()}.tmp"
+        with open(self._path(key, ".npy" + suffix), "wb") as f:
+            np.save(f, oof, allow_pickle=False)
+        with open(self._path(key, ".pkl" + suffix), "wb") as f:
+            pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+        with open(self._path(key, ".json" + suffix), "w") as f:
+            json.dump(record, f, indent=2)
+        # the record goes last, since it marks the entry as complete
+        for ext in (".npy", ".pkl", ".json"):
+            os.replace(self._path(key, ext + suffix), self._path(key, ext))
+
+    def member(self, make_model, X: FeatureMatrix, y: pd.Series, n_folds: int = N_FOLDS, data_hash: str = None):
+        """(oof, model fitted on all of X) for the model make_model() builds, computed only on a cache miss."""
+        model = make_model()
+        config = model_config(model, X.columns)
+        data_hash = data_hash if data_hash is not None else table_hash(X, y)
+        key = oof_key(config, data_hash, n_folds)
+        if self.record(key) is not None:
+            return self.load(key)
+
+        start = time.perf_counter()
+        oof = out_of_fold(make_model, X, y, n_folds)
+        model.fit(X, y)
+        self.save(key, oof, model, {
+            "name": model.name,
+            "config": config,
+            "data_hash": data_hash,
+            "n_folds": n_folds,
+            "rows": len(X),
+            "fit_time": time.perf_counter() - start,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        return oof, model
@@ -0,0 +1,234 @@
+"""Roster strength features from the per-player box scores, streamed.
+
+PlayerStatistics.csv has a row per player per game and is many times the
+size of TeamStatistics.csv, so it is never loaded whole. One pass reads it
+in chunks of a few narrow columns, turns every row into a 33-byte record
+(date, game, player, team, side, Game Score) and spills the records to
+one temporary file per BUCKET_DAYS of dates. The buckets are then replayed
+in date order, whatever order the file was in, so besides the chunk being
+parsed only one bucket of records is ever in memory.
+
+Replaying keeps a bounded state: each player's last PLAYER_WINDOW Game
+Scores and each team's roster strength after its latest game. A team's
+roster strength after a game is the sum of the top ROSTER_TOP_N rolling
+Game Score averages among the players who played in it, and a game's
+feature is the strength its teams had going into it: that of the players
+available in their previous game, which is known before tip-off.
+
+The state is small and saved next to the feature table, so the nightly
+update only streams the new rows.
+"""
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+from ingest import iter_columns, CHUNK_ROWS
+
+PLAYER_WINDOW = 10
+ROSTER_TOP_N = 8
+BUCKET_DAYS = 365
+
+# the only columns read from PlayerStatistics.csv
+PLAYER_STATS_DTYPES = {
+    "personId": np.int64, "gameId": np.int64, "home": np.int8, "numMinutes": np.float32,
+    "points": np.float32, "assists": np.float32, "blocks": np.float32, "steals": np.float32,
+    "fieldGoalsAttempted": np.float32, "fieldGoalsMade": np.float32, "freeThrowsAttempted": np.float32,
+    "freeThrowsMade": np.float32, "reboundsDefensive": np.float32, "reboundsOffensive": np.float32,
+    "foulsPersonal": np.float32, "turnovers": np.float32,
+}
+# Hollinger's Game Score: points plus weighted counting stats
+GAME_SCORE_WEIGHTS = {
+    "points": 1.0, "fieldGoalsMade": 0.4, "fieldGoalsAttempted": -0.7, "freeThrowsAttempted": -0.4,
+    "freeThrowsMade": 0.4, "reboundsOffensive": 0.7, "reboundsDefensive": 0.3, "steals": 1.0,
+    "assists": 0.7, "blocks": 0.7, "foulsPersonal": -0.4, "turnovers": -1.0,
+}
+
+RECORD_DTYPE = np.dtype([("date", "<i8"), ("game", "<i8"), ("player", "<i8"), ("team", "<i4"),
+                         ("home", "i1"), ("score", "<f4")])
+
+
+def game_score(chunk: pd.DataFrame) -> np.ndarray:
+    score = np.zeros(len(chunk), dtype=np.float32)
+    for col, weight in GAME_SCORE_WEIGHTS.items():
+        score += np.float32(weight) * chunk[col].fillna(0).to_numpy(np.float32)
+    return score
+
+
+def _group_starts(keys) -> np.ndarray:
+    """Index of the first row of the run of equal keys each row belongs to."""
+    n = len(keys)
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = keys[1:] != keys[:-1]
+    return np.maximum.accumulate(np.where(starts, np.arange(n), 0))
+
+
+class RosterStrength:
+    """Per-player rolling Game Scores and per-team roster strength, updated one bucket of records at a time."""
+
+    def __init__(self, window: int = PLAYER_WINDOW, top_n: int = ROSTER_TOP_N):
+        self.window = window
+        self.top_n = top_n
+        self.player_ids = pd.Index(np.empty(0, dtype=np.int64))
+        # each player's last window Game Scores, newest last, NaN before their first games
+        self.recent = np.empty((0, window), dtype=np.float32)
+        self.team_strength = {}
+        self.high_water = None
+
+    def __len__(self):
+        return len(self.player_ids)
+
+    def _positions(self, player_ids) -> np.ndarray:
+        """Row of every player in recent, adding rows for players not seen before."""
+        positions = self.player_ids.get_indexer(player_ids)
+        new = np.unique(player_ids[positions < 0])
+        if len(new):
+            self.player_ids = self.player_ids.append(pd.Index(new))
+            self.recent = np.vstack([self.recent, np.full((len(new), self.window), np.nan, dtype=np.float32)])
+            positions = self.player_ids.get_indexer(player_ids)
+        return positions
+
+    def _rolling_scores(self, positions, scores) -> np.ndarray:
+        """Each game's player's average Game Score over their last window games up to and including it.
+
+        positions are the players' rows of recent, sorted, with each
+        player's games in date order. Those rows are moved on past the games.
+        """
+        players, first, counts = np.unique(positions, return_index=True, return_counts=True)
+        history = self.recent[players]
+        n_history = (~np.isnan(history)).sum(axis=1)
+
+        # each player's history followed by their new games, as one flat sequence
+        totals = n_history + counts
+        ends = np.cumsum(totals)
+        starts = ends - totals
+        values = np.empty(ends[-1], dtype=np.float64)
+        held = np.repeat(np.arange(len(players)), n_history)
+        held_rank = np.arange(len(held)) - (np.cumsum(n_history) - n_history)[held]
+        values[starts[held] + held_rank] = history[~np.isnan(history)]
+        group = np.repeat(np.arange(len(players)), counts)
+        at = starts[group] + n_history[group] + np.arange(len(positions)) - first[group]
+        values[at] = scores
+
+        cumulative = np.concatenate([[0.0], np.cumsum(values)])
+        length = np.minimum(at - starts[group] + 1, self.window)
+        rolling = (cumulative[at + 1] - cumulative[at + 1 - length]) / length
+
+        # keep the last window values of every player, right-aligned
+        keep = ends[:, None] - self.window + np.arange(self.window)
+        self.recent[players] = np.where(keep >= starts[:, None], values[np.maximum(keep, 0)], np.nan)
+        return rolling
+
+    def update(self, records) -> pd.DataFrame:
+        """Roster strength going into every team-game in records, as (gameId, home, roster_strength) rows.
+
+        Records must be newer than anything already folded in.
+        """
+        if not len(records):
+            return pd.DataFrame({"gameId": np.empty(0, np.int64), "home": np.empty(0, np.int8),
+                                 "roster_strength": np.empty(0, np.float64)})
+        positions = self._positions(records["player"])
+        order = np.lexsort((records["game"], records["date"], positions))
+        records = records[order]
+        rolling = self._rolling_scores(positions[order], records["score"])
+
+        # strength after each team-game: the top_n rolling averages of its players
+        team_game = records["game"] * 2 + records["home"]
+        order = np.lexsort((-rolling, team_game))
+        team_game, rolling, records = team_game[order], rolling[order], records[order]
+        rank = np.arange(len(team_game)) - _group_starts(team_game)
+        first = np.flatnonzero(rank == 0)
+        strength_after = np.add.reduceat(np.where(rank < self.top_n, rolling, 0.0), first)
+        games = records[first]
+
+        # going into a game, a team has the strength it had after its previous one
+        order = np.lexsort((games["game"], games["date"], games["team"]))
+        games, strength_after = games[order], strength_after[order]
+        teams = games["team"]
+        strength_before = np.empty(len(games))
+        strength_before[1:] = strength_after[:-1]
+        new_team = np.ones(len(games), dtype=bool)
+        new_team[1:] = teams[1:] != teams[:-1]
+        strength_before[new_team] = [self.team_strength.get(int(team), np.nan) for team in teams[new_team]]
+
+        last = np.append(new_team[1:], True)
+        self.team_strength.update(zip(teams[last].tolist(), strength_after[last].tolist()))
+        self.high_water = max(int(games["date"].max()), self.high_water or 0)
+        return pd.DataFrame({"gameId": games["game"], "home": games["home"], "roster_strength": strength_before})
+
+    def current(self, team_ids) -> np.ndarray:
+        """Each team's roster strength going into its next game, NaN for teams never seen."""
+        return np.array([self.team_strength.get(int(team), np.nan) for team in team_ids], dtype=np.float64)
+
+    def save(self, path):
+        teams = np.array(list(self.team_strength), dtype=np.int64)
+        np.savez(path, player_ids=self.player_ids.to_numpy(np.int64), recent=self.recent, teams=teams,
+                 team_strength=np.array([self.team_strength[team] for team in teams.tolist()], dtype=np.float64),
+                 high_water=-1 if self.high_water is None else self.high_water,
+                 window=self.window, top_n=self.top_n)
+
+    @classmethod
+    def load(cls, path):
+        """The state saved at path, or None if there is none or it was kept with other settings."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if int(data["window"]) != PLAYER_WINDOW or int(data["top_n"]) != ROSTER_TOP_N:
+                return None
+            state = cls()
+            state.player_ids = pd.Index(data["player_ids"])
+            state.recent = data["recent"]
+            state.team_strength = dict(zip(data["teams"].tolist(), data["team_strength"].tolist()))
+            state.high_water = None if int(data["high_water"]) < 0 else int(data["high_water"])
+        return state
+
+
+def stream_roster_strength(path, games: pd.DataFrame, state: RosterStrength = None, chunk_rows: int = CHUNK_ROWS):
+    """Roster strength going into every game in games that has player box scores at path.
+
+    games holds gameId, gameDate, hometeamId and awayteamId for every game
+    (playoffs included) whose box scores should be folded in, and no game
+    state has already seen. Returns (per-game frame of gameId,
+    home_roster_strength and away_roster_strength, the updated state,
+    {"rows", "seconds", "rows_per_sec"} of the pass over the file).
+    """
+    state = state if state is not None else RosterStrength()
+    lookup = pd.Index(games["gameId"].to_numpy(np.int64))
+    game_dates = games["gameDate"].to_numpy(np.int64)
+    game_teams = np.stack([games["awayteamId"].to_numpy(np.int32), games["hometeamId"].to_numpy(np.int32)], axis=1)
+
+    start = time.perf_counter()
+    rows = 0
+    with tempfile.TemporaryDirectory(prefix="player_stats_") as spill_dir:
+        buckets = set()
+        for chunk in iter_columns(path, PLAYER_STATS_DTYPES, chunk_rows=chunk_rows):
+            rows += len(chunk)
+            at = lookup.get_indexer(chunk["gameId"].to_numpy(np.int64))
+            home = chunk["home"].to_numpy(np.int8)
+            keep = (at >= 0) & (chunk["numMinutes"].to_numpy() > 0) & np.isin(home, (0, 1))
+            records = np.empty(keep.sum(), dtype=RECORD_DTYPE)
+            records["date"] = game_dates[at[keep]]
+            records["game"] = chunk["gameId"].to_numpy(np.int64)[keep]
+            records["player"] = chunk["personId"].to_numpy(np.int64)[keep]
+            records["home"] = home[keep]
+            records["team"] = game_teams[at[keep], home[keep]]
+            records["score"] = game_score(chunk[keep])
+
+            bucket = records["date"] // (BUCKET_DAYS * 24 * 60 * 60)
+            for key in np.unique(bucket):
+                with open(os.path.join(spill_dir, f"{key}.bin"), "ab") as f:
+                    records[bucket == key].tofile(f)
+                buckets.add(int(key))
+
+        parts = [state.update(np.fromfile(os.path.join(spill_dir, f"{key}.bin"), dtype=RECORD_DTYPE))
+                 for key in sorted(buckets)]
+    seconds = time.perf_counter() - start
+
+    strength = pd.concat(parts, ignore_index=True) if parts else state.update(np.empty(0, dtype=RECORD_DTYPE))
+    strength = strength.pivot(index="gameId", columns="home", values="roster_strength")
+    features = pd.DataFrame({
+        "gameId": strength.index.to_numpy(np.int64),
+        "home_roster_strength": strength.get(1, pd.Series(np.nan, index=strength.index)).to_numpy(),
+        "away_roster_strength": strength.get(0, pd.Series(np.nan, index=strength.index)).to_numpy(),
+    })
+    return features, state, {"rows": rows, "seconds": seconds, "rows_per_sec": rows / seconds if seconds else 0.0}
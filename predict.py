@@ -1,43 +1,88 @@
+import time
+import argparse
 import numpy as np
-from models import (
-    SimplePredictor,
-    SVMClassifier,
-    RFClassifier,
-    KNNClassifier,
-    MLPClassifier,
-    NBClassifier   
-)
+from models import MODEL_NAMES, BEST_PARAMS_PATH, get_model, parse_model_names, tuned_params
 from data_prep import RecommenderDataPrep, MODEL_FEATURE_COLS
+from training import fit_and_score
+from model_registry import ModelRegistry, model_config
+
+PREDICTIONS_PATH = "out/predictions.csv"
+
+
+def default_models(names: list = None, params: dict = None) -> dict:
+    """The models that are saved and used for predictions, as {name: (model, feature_cols)}.
+
+    names limits them to some of MODEL_NAMES; only those models' modules are
+    imported. params maps model names to get_model() keyword arguments, such
+    as tuned_params().
+    """
+    params = params or {}
+    return {name: (get_model(name, **params.get(name, {})), MODEL_FEATURE_COLS) for name in (names or MODEL_NAMES)}
+
+
+def predict_schedule(data_prep, registry, models, start=None, end=None):
+    """Home win probability from every model for each scheduled game, one column per model."""
+    schedule, features = data_prep.get_schedule_data(start, end)
+
+    results = schedule.copy()
+    start_time = time.perf_counter()
+    for name, (_, feature_cols) in models.items():
+        # teams without history have no features; their probabilities are left empty
+        valid = features[feature_cols].notna().all(axis=1).to_numpy()
+        probas = np.full(len(schedule), np.nan, dtype=np.float32)
+        # an empty date range, or one where no team has history, leaves the whole column empty
+        if valid.any():
+            probas[valid] = registry.load(name).predict_proba(features.loc[valid, feature_cols])
+        results[name] = probas
+    print(f"Scored {len(schedule)} games with {len(models)} models in {time.perf_counter() - start_time:.3f}s")
+
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Predict home win probabilities for scheduled games.")
+    parser.add_argument("--start", help="first game date to predict (YYYY-MM-DD), default: start of schedule")
+    parser.add_argument("--end", help="last game date to predict (YYYY-MM-DD), default: end of schedule")
+    parser.add_argument("--out", default=PREDICTIONS_PATH, help="where to write the predictions CSV")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES),
+                        help="comma-separated models to score with, e.g. RF,NB")
+    parser.add_argument("--tuned", action="store_true",
+                        help="build the models with the hyperparameters tune.py saved in " + BEST_PARAMS_PATH)
+    args = parser.parse_args()
+    try:
+        args.models = parse_model_names(args.models)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
 
 def main():
+    args = parse_args()
+
     print("Loading and preparing data...")
     data_prep = RecommenderDataPrep(False)
     data_prep.load_and_prepare(False)
     
-    models = {
-        "Simple": (SimplePredictor(), MODEL_FEATURE_COLS),
-        "SVM": (SVMClassifier(), MODEL_FEATURE_COLS),
-        "RandomForest": (RFClassifier(), MODEL_FEATURE_COLS),
-        "KNN": (KNNClassifier(), MODEL_FEATURE_COLS),
-        "MLP": (MLPClassifier(), MODEL_FEATURE_COLS),
-        "NB": (NBClassifier(), MODEL_FEATURE_COLS),
-    }
-
-    for name, (model, feature_cols) in models.items():
-        print(f"Training {name}...")
-        X_train, y_train = data_prep.get_training_data(feature_cols)
-        model.fit(X_train, y_train)
-
-    predictions = {}
-    probas = {}
-
-    for name, (model, feature_cols) in models.items():
-        print(f"Generating recommendations for {name}...")
-        X_test = data_prep.get_test_data(feature_cols)
-        predictions[name] = model.predict(X_test)
-        probas[name] = model.predict_proba(X_test)
-
-    # Todo
+    models = default_models(args.models, tuned_params(MODEL_FEATURE_COLS) if args.tuned else None)
+
+    # only models whose data or config changed since they were saved get retrained
+    registry = ModelRegistry()
+    data_hash = data_prep.training_data_hash()
+    stale = registry.stale(models, data_hash)
+
+    if stale:
+        print(f"Training {', '.join(stale)}...")
+        configs = {name: model_config(model, feature_cols) for name, (model, feature_cols) in stale.items()}
+        runs = fit_and_score(stale, data_prep)
+        for name, run in runs.items():
+            registry.save(name, run.model, models[name][1], data_hash, fit_time=run.fit_time, config=configs[name],
+                          n_rows=data_prep.train_rows.stop)
+    else:
+        print("All saved models are up to date")
+
+    results = predict_schedule(data_prep, registry, models, args.start, args.end)
+    results.to_csv(args.out, index=False, float_format="%.4f")
+    print(f"Wrote predictions to {args.out}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+import os
+import pytest
+import data_prep
+from benchmarks.synthetic import generate
+
+
+@pytest.fixture(scope="session")
+def dataset(tmp_path_factory):
+    path = tmp_path_factory.mktemp("dataset")
+    generate(str(path), scale=1, n_seasons=8)
+    return path
+
+
+def use_work_dir(monkeypatch, path):
+    os.makedirs(path, exist_ok=True)
+    monkeypatch.setattr(data_prep, "FEATURE_STORE_PATH", str(path / "store"))
+    monkeypatch.setattr(data_prep, "ROLLING_STATE_PATH", str(path / "rolling_state.csv"))
+    monkeypatch.setattr(data_prep, "ROLLING_STATE_META_PATH", str(path / "rolling_state.json"))
+    monkeypatch.setattr(data_prep, "ROLLING_EWM_PATH", str(path / "rolling_ewm.npz"))
+    monkeypatch.setattr(data_prep, "PLAYER_STATE_PATH", str(path / "player_state.npz"))
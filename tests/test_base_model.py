@@ -0,0 +1,13 @@
+"""BasePredictor.partial_update on models that can't update incrementally."""
+import numpy as np
+import pandas as pd
+import pytest
+from models import MODEL_NAMES, NotIncrementalError, get_model
+
+
+@pytest.mark.parametrize("name", [name for name in MODEL_NAMES if not get_model(name).incremental])
+def test_partial_update_raises_not_incremental(name):
+    model = get_model(name)
+    X = pd.DataFrame(np.zeros((2, 2)), columns=["a", "b"])
+    with pytest.raises(NotIncrementalError):
+        model.partial_update(X, pd.Series([0, 1]))
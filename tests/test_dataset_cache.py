@@ -0,0 +1,59 @@
+"""When DatasetCache downloads again."""
+import json
+from datetime import datetime, timezone, timedelta
+import pytest
+from dataset_cache import DatasetCache, DATASET_FILES
+
+
+class RecordingCache(DatasetCache):
+    """DatasetCache that counts downloads instead of calling kagglehub."""
+
+    downloads = 0
+
+    def download(self, files=None):
+        self.downloads += 1
+        self.write_manifest(files)
+
+
+@pytest.fixture
+def root(tmp_path):
+    for name in DATASET_FILES:
+        (tmp_path / name).write_text("gameId\n1\n")
+    return tmp_path
+
+
+def age_manifest(cache, hours):
+    manifest = cache.read_manifest()
+    manifest["created"] = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+    with open(cache.manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+
+def test_fresh_cache_is_not_downloaded(root):
+    cache = RecordingCache(str(root), offline=False)
+    cache.write_manifest()
+    cache.resolve()
+    assert cache.downloads == 0
+
+
+def test_refresh_downloads(root):
+    cache = RecordingCache(str(root), offline=False)
+    cache.write_manifest()
+    cache.resolve(refresh=True)
+    assert cache.downloads == 1
+
+
+def test_refresh_is_ignored_offline(root):
+    cache = RecordingCache(str(root), offline=True)
+    cache.resolve(refresh=True)
+    assert cache.downloads == 0
+
+
+def test_manifest_older_than_max_age_is_stale(root):
+    cache = RecordingCache(str(root), offline=False, max_age_hours=24)
+    cache.write_manifest()
+    age_manifest(cache, 23)
+    assert cache.is_fresh(DATASET_FILES)
+    age_manifest(cache, 25)
+    cache.resolve()
+    assert cache.downloads == 1
@@ -0,0 +1,38 @@
+"""An incremental feature table build matches a full rebuild exactly."""
+import os
+import filecmp
+import pandas as pd
+from data_prep import RecommenderDataPrep
+from dataset_cache import GAMES_FILE, TEAM_STATS_FILE
+from conftest import use_work_dir
+
+CUTS = ["2020-01-15", "2025-12-01"]
+
+
+def write_until(dataset, out, cut):
+    """The games and team box scores of dataset on or before cut, written to out."""
+    os.makedirs(out, exist_ok=True)
+    for name in (GAMES_FILE, TEAM_STATS_FILE):
+        frame = pd.read_csv(dataset / name)
+        frame[pd.to_datetime(frame["gameDate"]) < pd.Timestamp(cut) + pd.Timedelta(days=1)].to_csv(out / name, index=False)
+    return out
+
+
+def test_incremental_matches_full_rebuild(dataset, tmp_path, monkeypatch):
+    prep = RecommenderDataPrep(False)
+
+    use_work_dir(monkeypatch, tmp_path / "full")
+    prep.build_feature_table(str(dataset))
+    full_store = tmp_path / "full" / "store"
+
+    use_work_dir(monkeypatch, tmp_path / "incremental")
+    prep.build_feature_table(str(write_until(dataset, tmp_path / "first", CUTS[0])))
+    for i, cut in enumerate(CUTS[1:]):
+        prep.update_feature_table(str(write_until(dataset, tmp_path / f"cut{i}", cut)))
+    prep.update_feature_table(str(dataset))
+    incremental_store = tmp_path / "incremental" / "store"
+
+    files = sorted(os.listdir(full_store))
+    assert files == sorted(os.listdir(incremental_store))
+    _, mismatch, errors = filecmp.cmpfiles(full_store, incremental_store, files, shallow=False)
+    assert not mismatch and not errors
@@ -0,0 +1,41 @@
+"""predict_schedule with nothing to score."""
+import numpy as np
+import pandas as pd
+import pytest
+from data_prep import MODEL_FEATURE_COLS, SCHEDULE_COLS
+from models import get_model
+from predict import predict_schedule
+
+
+class ScheduleStub:
+    def __init__(self, schedule, features):
+        self.schedule, self.features = schedule, features
+
+    def get_schedule_data(self, start=None, end=None):
+        return self.schedule, self.features
+
+
+class Registry:
+    def __init__(self, models):
+        self.models = models
+
+    def load(self, name):
+        return self.models[name]
+
+
+@pytest.fixture(scope="module")
+def registry():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.random((200, len(MODEL_FEATURE_COLS))), columns=MODEL_FEATURE_COLS)
+    model = get_model("NB")
+    model.fit(X, pd.Series(rng.integers(0, 2, 200)))
+    return Registry({"NB": model})
+
+
+@pytest.mark.parametrize("rows", [0, 3])
+def test_no_scorable_games_leaves_empty_column(registry, rows):
+    schedule = pd.DataFrame({col: np.arange(rows) for col in SCHEDULE_COLS})
+    features = pd.DataFrame(np.nan, index=range(rows), columns=MODEL_FEATURE_COLS, dtype=np.float32)
+    results = predict_schedule(ScheduleStub(schedule, features), registry, {"NB": (None, MODEL_FEATURE_COLS)})
+    assert len(results) == rows
+    assert results["NB"].isna().all()
@@ -0,0 +1,100 @@
+"""get_rolling_stats (the prefix-sum index) against the per-game reference loop."""
+import numpy as np
+import pandas as pd
+import pytest
+from data_prep import RecommenderDataPrep, N_GAMES, STAT_COLS, ROLLING_STATE_COLS
+from feature_index import HOME, AWAY
+
+DAY = 24 * 60 * 60
+START = 1_700_000_000
+TEAMS = [1, 2, 3, 4, 5, 6]
+# joins late, so it has fewer than N_GAMES games for most of the sample
+LATE_TEAM = 7
+# never plays, so it has no history at all
+NEW_TEAM = 8
+
+
+def synthetic_sample(n_days=30, seed=0):
+    """(games, team_stats) with one round of matchups a day and integer box scores."""
+    rng = np.random.default_rng(seed)
+    games, stats = [], []
+    game_id = 1000
+    for day in range(n_days):
+        teams = TEAMS + ([LATE_TEAM] if day >= n_days - 6 else [])
+        teams = list(rng.permutation(teams))
+        date = START + day * DAY
+        for home, away in zip(teams[0::2], teams[1::2]):
+            game_id += 1
+            games.append({"gameId": game_id, "gameDate": date, "hometeamId": home, "awayteamId": away})
+            for team, venue in ((home, HOME), (away, AWAY)):
+                stats.append({"gameId": game_id, "gameDate": date, "teamId": team, "home": venue,
+                              **{col: float(rng.integers(0, 50)) for col in STAT_COLS}})
+    games = pd.DataFrame(games)
+    # games whose teams have no history: an unseen team, and a day before anything was played
+    games = pd.concat([games, pd.DataFrame([
+        {"gameId": 1, "gameDate": START + n_days * DAY, "hometeamId": NEW_TEAM, "awayteamId": NEW_TEAM},
+        {"gameId": 2, "gameDate": START - DAY, "hometeamId": TEAMS[0], "awayteamId": TEAMS[1]},
+    ])], ignore_index=True)
+    return games, pd.DataFrame(stats)[ROLLING_STATE_COLS]
+
+
+@pytest.fixture(scope="module")
+def sample():
+    return synthetic_sample()
+
+
+@pytest.fixture(scope="module")
+def prep():
+    return RecommenderDataPrep(False)
+
+
+def reference(prep, games, stats, is_home):
+    venue = HOME if is_home else AWAY
+    venue_stats = stats[stats["home"] == venue].sort_values("gameDate", ascending=False, kind="mergesort")
+    return prep.get_rolling_stats_loop(games, venue_stats, is_home)
+
+
+@pytest.mark.parametrize("is_home", [True, False])
+def test_matches_reference_loop(prep, sample, is_home):
+    games, stats = sample
+    fast = prep.get_rolling_stats(games, stats, is_home)
+    slow = reference(prep, games, stats, is_home)
+    pd.testing.assert_frame_equal(fast, slow.astype(np.float64), check_exact=True)
+
+
+@pytest.mark.parametrize("is_home", [True, False])
+def test_excludes_current_game(prep, sample, is_home):
+    games, stats = sample
+    team_col = "hometeamId" if is_home else "awayteamId"
+    venue = HOME if is_home else AWAY
+    game = games.iloc[0]
+    own = stats[(stats["gameId"] == game["gameId"]) & (stats["home"] == venue)]
+    assert len(own) == 1 and own["teamId"].iloc[0] == game[team_col]
+
+    # the game is its team's first, so leaving it out leaves nothing
+    result = prep.get_rolling_stats(games.iloc[[0]], stats, is_home)
+    assert (result.to_numpy() == 0).all()
+
+
+def test_divides_by_n_games_with_short_history(prep, sample):
+    games, stats = sample
+    late = stats[(stats["teamId"] == LATE_TEAM) & (stats["home"] == HOME)].sort_values("gameDate")
+    assert 0 < len(late) < N_GAMES
+    # a query after the team's last home game sees all of them, still divided by N_GAMES
+    query = pd.DataFrame({"gameId": [0], "gameDate": [late["gameDate"].max() + DAY],
+                          "hometeamId": [LATE_TEAM], "awayteamId": [TEAMS[0]]})
+    result = prep.get_rolling_stats(query, stats, True)
+    expected = late[STAT_COLS].sum().to_numpy(np.float64) / N_GAMES
+    np.testing.assert_array_equal(result.iloc[0].to_numpy(), expected)
+    pd.testing.assert_frame_equal(result, reference(prep, query, stats, True).astype(np.float64), check_exact=True)
+
+
+@pytest.mark.parametrize("is_home", [True, False])
+def test_no_history_is_all_zeros(prep, sample, is_home):
+    games, stats = sample
+    no_history = games[games["gameId"].isin([1, 2])]
+    result = prep.get_rolling_stats(no_history, stats, is_home)
+    assert list(result.columns) == STAT_COLS
+    assert (result.to_numpy() == 0).all()
+    pd.testing.assert_frame_equal(result, reference(prep, no_history, stats, is_home).astype(np.float64),
+                                  check_exact=True)
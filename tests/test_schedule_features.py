@@ -0,0 +1,26 @@
+"""Schedule features for games already played match the ones stored for them."""
+import numpy as np
+import pandas as pd
+import pytest
+from data_prep import RecommenderDataPrep
+from dataset_cache import DatasetCache, GAMES_FILE
+from feature_store import FeatureStore
+from conftest import use_work_dir
+import data_prep
+
+
+@pytest.mark.parametrize("player_features", [False, True])
+def test_played_games_match_stored_features(dataset, tmp_path, monkeypatch, player_features):
+    use_work_dir(monkeypatch, tmp_path)
+    prep = RecommenderDataPrep(False, DatasetCache(str(dataset), offline=True), player_features=player_features)
+    prep.build_feature_table(str(dataset))
+    prep.store = FeatureStore(data_prep.FEATURE_STORE_PATH)
+
+    games = pd.read_csv(dataset / GAMES_FILE)
+    prep.game_schedule = games[pd.to_datetime(games["gameDate"]).dt.year == 2024].head(200)
+    schedule, features = prep.get_schedule_data()
+
+    rows = pd.Index(prep.store.columns["gameId"]).get_indexer(schedule["gameId"])
+    assert (rows >= 0).all()
+    stored = prep.store.feature_matrix(prep.store_feature_cols)[rows]
+    np.testing.assert_array_equal(features[prep.store_feature_cols].to_numpy(), stored)
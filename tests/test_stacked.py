@@ -0,0 +1,41 @@
+"""StackedPredictor member hyperparameters and empty inputs."""
+import numpy as np
+import pandas as pd
+import pytest
+from data_prep import MODEL_FEATURE_COLS
+from model_registry import model_config
+from models import get_model
+
+MEMBERS = ("NB", "KNN")
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(600, len(MODEL_FEATURE_COLS))), columns=MODEL_FEATURE_COLS)
+    y = pd.Series((X.iloc[:, 0] + rng.normal(size=600) > 0).astype(int))
+    return X, y
+
+
+def test_member_params_reach_members_and_config(data, tmp_path):
+    X, y = data
+    params = {"NaiveBayes": {"nb__var_smoothing": 1e-3}}
+    model = get_model("Stacked", members=MEMBERS, member_params=params, cache_dir=str(tmp_path))
+    default = get_model("Stacked", members=MEMBERS, cache_dir=str(tmp_path))
+    assert model_config(model, MODEL_FEATURE_COLS) != model_config(default, MODEL_FEATURE_COLS)
+
+    model.fit(X, y)
+    assert model.fitted_members["NB"].model.get_params()["nb__var_smoothing"] == 1e-3
+    # one cache entry per member; the default NB is a different config, so it gets its own
+    default.fit(X, y)
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+
+def test_empty_input(data, tmp_path):
+    X, y = data
+    model = get_model("Stacked", members=MEMBERS, cache_dir=str(tmp_path))
+    model.fit(X, y)
+    empty = X.iloc[:0]
+    assert model.member_probas(empty).shape == (0, len(MEMBERS))
+    assert model.predict_proba(empty).shape == (0,)
+    assert model.predict(empty).shape == (0,)
@@ -0,0 +1,39 @@
+"""Resuming a search and loading its best configs."""
+import json
+import pytest
+from data_prep import MODEL_FEATURE_COLS, feature_family
+from models import tuned_params
+from tune import completed_trials, save_best, _append
+
+
+def trial(params, budget, log_loss=0.69):
+    return {"params": params, "budget": budget, "rung": 0, "log_loss": log_loss, "auc": 0.6, "accuracy": 0.6}
+
+
+def test_completed_trials_skips_partial_last_line(tmp_path):
+    path = tmp_path / "trials.jsonl"
+    _append(path, trial({"n_neighbors": 5}, 1000))
+    with open(path, "a") as f:
+        f.write(json.dumps(trial({"n_neighbors": 15}, 1000))[:25])
+
+    done = completed_trials(path)
+    assert list(done) == [('{"n_neighbors": 5}', 1000)]
+
+    # the next record is readable again
+    _append(path, trial({"n_neighbors": 15}, 1000))
+    assert len(completed_trials(path)) == 2
+
+
+def test_tuned_params_only_for_matching_features(tmp_path):
+    path = str(tmp_path / "best.json")
+    save_best("NB", trial({"nb__var_smoothing": 1e-3}, 1000), MODEL_FEATURE_COLS, path)
+    save_best("KNN", trial({"n_neighbors": [5]}, 1000), feature_family("ewm0.2"), path)
+
+    with pytest.warns(UserWarning, match="KNN"):
+        params = tuned_params(MODEL_FEATURE_COLS, path)
+    assert params["NB"] == {"nb__var_smoothing": 1e-3}
+    assert "KNN" not in params
+    assert params["Stacked"] == {"member_params": {"NB": {"nb__var_smoothing": 1e-3}}}
+
+    with pytest.warns(UserWarning, match="NB"):
+        assert tuned_params(feature_family("ewm0.2"), path)["KNN"] == {"n_neighbors": (5,)}
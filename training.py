@@ -0,0 +1,115 @@
+"""Process-pool scheduler for fitting and scoring several models at once.
+
+Each column set's shared FeatureMatrix (raw and standardized) is built once
+in the parent. Workers memory-map a saved copy of it, so every process
+shares the same read-only pages instead of being sent a pickled copy or
+building and scaling its own. Cores are budgeted up front: one thread per model,
+with whatever is left over going to models that parallelize internally
+(the random forest), so the pool never oversubscribes the machine.
+"""
+import os
+import time
+import tempfile
+from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from feature_store import FeatureStore
+from feature_matrix import FeatureMatrix
+from data_prep import TARGET_COL
+
+
+@dataclass
+class ModelRun:
+    """A fitted model with its timings and, when there was a test split, its scores."""
+    model: object
+    fit_time: float
+    predict_time: float = 0.0
+    predictions: np.ndarray = None
+    probas: np.ndarray = None
+
+
+def thread_budget(models: dict, n_cores: int) -> dict:
+    """Threads per model name, summing to at most n_cores when there are enough cores."""
+    budget = {name: 1 for name in models}
+    parallel = [name for name, (model, _) in models.items() if model.parallel]
+
+    spare = n_cores - len(models)
+    for i, name in enumerate(parallel):
+        budget[name] += max(0, spare) // len(parallel) + (1 if i < max(0, spare) % len(parallel) else 0)
+    return budget
+
+
+def _fit_and_score(model, train, test, store_path, train_rows, n_threads):
+    """Worker task: fit model on the train FeatureMatrix and score the test one.
+
+    train and test are FeatureMatrix objects or paths of saved ones; test
+    is None when there is nothing to score.
+    """
+    store = FeatureStore(store_path)
+    model.set_n_threads(n_threads)
+
+    with threadpool_limits(limits=n_threads):
+        X_train = FeatureMatrix.load(train) if isinstance(train, str) else train
+        y_train = pd.Series(store.columns[TARGET_COL][train_rows], name=TARGET_COL, copy=False)
+
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        run = ModelRun(model=model, fit_time=time.perf_counter() - start)
+
+        if test is not None:
+            X_test = FeatureMatrix.load(test) if isinstance(test, str) else test
+            start = time.perf_counter()
+            run.predictions = model.predict(X_test)
+            run.probas = model.predict_proba(X_test)
+            run.predict_time = time.perf_counter() - start
+
+    return run
+
+
+def fit_and_score(models: dict, data_prep, max_workers: int = None) -> dict:
+    """Fit every (model, feature_cols) in models and score the test split, in parallel.
+
+    Returns a ModelRun per model name, in the order of models. With
+    max_workers=1 everything runs in this process.
+    """
+    n_cores = os.cpu_count() or 1
+    max_workers = max_workers if max_workers is not None else min(len(models), n_cores)
+    budget = thread_budget(models, n_cores)
+
+    # one matrix per distinct column set, however many models use it
+    matrices = {}
+    for _, feature_cols in models.values():
+        key = tuple(feature_cols)
+        if key not in matrices:
+            matrices[key] = (data_prep.get_feature_matrix(feature_cols, "train"),
+                             data_prep.get_feature_matrix(feature_cols, "test") if data_prep.evaluate else None)
+
+    def task_args(name, inputs):
+        model, feature_cols = models[name]
+        train, test = inputs[tuple(feature_cols)]
+        return model, train, test, data_prep.store.path, data_prep.train_rows, budget[name]
+
+    runs = {}
+    if max_workers == 1:
+        for name in models:
+            runs[name] = _fit_and_score(*task_args(name, matrices))
+            print(f"Trained {name} in {runs[name].fit_time:.2f}s")
+    else:
+        with tempfile.TemporaryDirectory(prefix="feature_matrix_") as tmp:
+            paths = {}
+            for i, (key, (train, test)) in enumerate(matrices.items()):
+                train.save(os.path.join(tmp, f"{i}_train"))
+                if test is not None:
+                    test.save(os.path.join(tmp, f"{i}_test"))
+                paths[key] = (os.path.join(tmp, f"{i}_train"), os.path.join(tmp, f"{i}_test") if test is not None else None)
+
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = {pool.submit(_fit_and_score, *task_args(name, paths)): name for name in models}
+                for future in as_completed(futures):
+                    name = futures[future]
+                    runs[name] = future.result()
+                    print(f"Trained {name} in {runs[name].fit_time:.2f}s")
+
+    return {name: runs[name] for name in models}
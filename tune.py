@@ -0,0 +1,290 @@
+"""Hyperparameter search for the models, by successive halving over season folds.
+
+Every config is scored by its mean log loss on the last --cv-seasons
+seasons before the test season, each predicted by a model trained on the
+games before it (the backtest's walk-forward folds). Configs start on a
+small training budget, the most recent --min-rows games before each fold,
+and only the best 1/--eta of them move on to eta times the budget, until
+the survivors are trained on the full history. Most of a grid is thrown
+out after a few cheap fits.
+
+The scaled fold matrices of each (season, budget) are built once, saved
+under the cache directory and memory-mapped by every trial and worker
+process. Every finished trial is appended to a JSONL file named after the
+search, so a rerun picks up where an interrupted one stopped. The best
+config of each model is written to data/best_params.json, which predict,
+update_models, evaluate_predictor and backtest load with --tuned.
+
+    python tune.py --models RF,KNN
+    python tune.py --models MLP --trials 20 --eta 3 --workers 4
+"""
+import os
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import itertools
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from models import BEST_PARAMS_PATH, get_model, parse_model_names, canonical_name
+from data_prep import FEATURE_STORE_PATH, TARGET_COL, TRAIN_CUTOFF, N_GAMES, FEATURE_FAMILIES, feature_family
+from feature_store import FeatureStore
+from feature_matrix import FeatureMatrix
+from backtest import folds, fold_metrics, thread_budget, _append
+
+TUNING_DIR = "out/tuning"
+CV_SEASONS = 3
+MIN_ROWS = 2_000
+ETA = 3
+
+# Values tried per model. Constructor arguments are passed to it; other names
+# are set on the wrapped sklearn estimator (see get_model). The SVM is only
+# searched in its linear-time mode, since the exact kernel SVM can't fit the
+# full history once per config.
+SEARCH_SPACES = {
+    "SVM": {
+        "mode": ["approx"],
+        "n_components": [100, 300, 600],
+        "svm__C": [0.01, 0.1, 1.0, 10.0],
+    },
+    "RandomForest": {
+        "n_estimators": [100, 200, 400],
+        "max_depth": [None, 8, 12, 16],
+        "min_samples_leaf": [1, 5, 20],
+        "max_features": ["sqrt", 0.5],
+    },
+    "KNN": {
+        "n_neighbors": [5, 15, 25, 51, 101, 201],
+        "weights": ["uniform", "distance"],
+    },
+    "MLP": {
+        "hidden_layer_sizes": [(32,), (100, 50), (64, 32, 16)],
+        "mlp__alpha": [1e-4, 1e-3, 1e-2, 1e-1],
+        "mlp__learning_rate_init": [1e-3, 3e-3],
+    },
+    "NB": {
+        "nb__var_smoothing": [1e-11, 1e-9, 1e-7, 1e-5, 1e-3],
+    },
+}
+
+
+def configs(space: dict, n_trials: int = None, seed: int = 42) -> list:
+    """Every combination of the values in space, or a random n_trials of them."""
+    grid = [dict(zip(space, values)) for values in itertools.product(*space.values())]
+    if n_trials is not None and n_trials < len(grid):
+        grid = random.Random(seed).sample(grid, n_trials)
+    return grid
+
+
+def budgets(max_rows: int, min_rows: int = MIN_ROWS, eta: int = ETA) -> list:
+    """Training rows per rung: min_rows growing eta-fold, ending with all of max_rows."""
+    out = []
+    rows = min_rows
+    while rows < max_rows:
+        out.append(rows)
+        rows *= eta
+    return out + [max_rows]
+
+
+def config_key(params: dict) -> str:
+    # JSON turns tuples into lists, so a config read back from the trials file has the same key
+    return json.dumps(params, sort_keys=True)
+
+
+def search_id(name, feature_cols, fold_list, space, min_rows, eta) -> str:
+    """Name of a search: the same model, folds, space and budgets resume the same trials file."""
+    payload = json.dumps({
+        "model": name, "feature_cols": feature_cols, "n_games": N_GAMES, "min_rows": min_rows, "eta": eta,
+        "folds": [[season, train.start, train.stop, test.start, test.stop] for season, train, test in fold_list],
+        "space": {key: [repr(value) for value in values] for key, values in space.items()},
+    }, sort_keys=True)
+    return f"{name}_{hashlib.sha256(payload.encode()).hexdigest()[:12]}"
+
+
+def fold_matrices(store, fold_list, feature_cols, budget, cache_dir) -> list:
+    """Saved (train, test) FeatureMatrix paths per fold, training on the last budget rows before each season.
+
+    Each fold's scaler is fitted on its own training rows. Matrices already
+    in cache_dir are reused.
+    """
+    y = store.columns[TARGET_COL]
+    paths = []
+    for season, train_rows, test_rows in fold_list:
+        train_rows = slice(max(train_rows.start, train_rows.stop - budget), train_rows.stop)
+        base = os.path.join(cache_dir, f"{season}_{train_rows.stop - train_rows.start}")
+        train_path, test_path = base + "_train", base + "_test"
+        if not os.path.exists(os.path.join(test_path, "y.npy")):
+            X_train = FeatureMatrix.build(store.feature_matrix(feature_cols, train_rows.start, train_rows.stop),
+                                          feature_cols)
+            X_test = FeatureMatrix.build(store.feature_matrix(feature_cols, test_rows.start, test_rows.stop),
+                                         feature_cols, X_train.scaler)
+            for path, X, rows in ((train_path, X_train, train_rows), (test_path, X_test, test_rows)):
+                X.save(path)
+                # written last, so its presence means the fold is complete
+                np.save(os.path.join(path, "y.npy"), np.asarray(y[rows]))
+        paths.append((season, train_path, test_path))
+    return paths
+
+
+def _run_trial(name, params, fold_paths, n_threads):
+    """Worker task: fit one config on every fold and score it on the fold's season."""
+    seasons = []
+    start = time.perf_counter()
+    with threadpool_limits(limits=n_threads):
+        for season, train_path, test_path in fold_paths:
+            model = get_model(name, **params)
+            model.set_n_threads(n_threads)
+            X_train, X_test = FeatureMatrix.load(train_path), FeatureMatrix.load(test_path)
+            y_train = pd.Series(np.load(os.path.join(train_path, "y.npy")), name=TARGET_COL)
+            model.fit(X_train, y_train)
+            probas = np.asarray(model.predict_proba(X_test), dtype=np.float64)
+            seasons.append({"season": season, **fold_metrics(np.load(os.path.join(test_path, "y.npy")), probas)})
+
+    aucs = [fold["auc"] for fold in seasons if fold["auc"] is not None]
+    return {
+        "params": params,
+        "log_loss": float(np.mean([fold["log_loss"] for fold in seasons])),
+        "auc": float(np.mean(aucs)) if aucs else None,
+        "accuracy": float(np.mean([fold["accuracy"] for fold in seasons])),
+        "folds": seasons,
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+
+
+def completed_trials(path) -> dict:
+    """{(config key, budget): record} of the trials already in path.
+
+    A run killed while appending leaves a partial last line; it is skipped
+    (that trial simply runs again) and ended, so the next record starts on
+    a line of its own.
+    """
+    if not os.path.exists(path):
+        return {}
+    done = {}
+    with open(path) as f:
+        text = f.read()
+    for line in text.splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        done[(config_key(record["params"]), record["budget"])] = record
+    if text and not text.endswith("\n"):
+        with open(path, "a") as f:
+            f.write("\n")
+    return done
+
+
+def successive_halving(name, store, fold_list, feature_cols, space, n_trials=None, min_rows=MIN_ROWS, eta=ETA,
+                       max_workers=None, out_dir=TUNING_DIR) -> dict:
+    """Search space for model name and return the best trial record of the last rung."""
+    search = search_id(name, feature_cols, fold_list, space, min_rows, eta)
+    trials_path = os.path.join(out_dir, search + ".jsonl")
+    cache_dir = os.path.join(out_dir, "cache", search)
+    os.makedirs(cache_dir, exist_ok=True)
+    done = completed_trials(trials_path)
+    if done:
+        print(f"{name}: resuming from {len(done)} trials in {trials_path}")
+
+    n_cores = os.cpu_count() or 1
+    candidates = configs(space, n_trials)
+    max_rows = max(train.stop - train.start for _, train, _ in fold_list)
+    rungs = budgets(max_rows, min_rows, eta)
+
+    for rung, budget in enumerate(rungs):
+        fold_paths = fold_matrices(store, fold_list, feature_cols, budget, cache_dir)
+        pending = [params for params in candidates if (config_key(params), budget) not in done]
+        workers = max(1, min(len(pending), max_workers or n_cores))
+        n_threads = thread_budget(workers)
+        print(f"{name} rung {rung}: {len(candidates)} configs on {budget} rows, {len(pending)} to run")
+
+        def record(result):
+            result.update(rung=rung, budget=budget)
+            _append(trials_path, result)
+            done[(config_key(result["params"]), budget)] = result
+            print(f"  log loss {result['log_loss']:.4f}  {result['params']}  ({result['seconds']:.1f}s)")
+
+        if workers == 1:
+            for params in pending:
+                record(_run_trial(name, params, fold_paths, n_threads))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_run_trial, name, params, fold_paths, n_threads) for params in pending]
+                for future in as_completed(futures):
+                    record(future.result())
+
+        ranked = sorted(candidates, key=lambda params: done[(config_key(params), budget)]["log_loss"])
+        if rung < len(rungs) - 1:
+            candidates = ranked[:max(1, math.ceil(len(ranked) / eta))]
+
+    return done[(config_key(ranked[0]), rungs[-1])]
+
+
+def save_best(name, trial, feature_cols, path=BEST_PARAMS_PATH):
+    """Record trial as the best config of name in path, keeping the other models' entries."""
+    best = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            best = json.load(f)
+    best[name] = {
+        "params": trial["params"],
+        "log_loss": trial["log_loss"],
+        "auc": trial["auc"],
+        "accuracy": trial["accuracy"],
+        "feature_cols": feature_cols,
+        "tuned_at": datetime.now(timezone.utc).isoformat(),
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(best, f, indent=2)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Tune the models' hyperparameters by successive halving.")
+    parser.add_argument("--models", default=",".join(SEARCH_SPACES), help="comma-separated models to tune")
+    parser.add_argument("--features", default=f"w{N_GAMES}", choices=FEATURE_FAMILIES,
+                        help="feature family the models use")
+    parser.add_argument("--cv-seasons", type=int, default=CV_SEASONS,
+                        help="validate on this many seasons before the test season")
+    parser.add_argument("--trials", type=int, help="random configs to start from (default: the whole grid)")
+    parser.add_argument("--min-rows", type=int, default=MIN_ROWS, help="training rows per fold in the first rung")
+    parser.add_argument("--eta", type=int, default=ETA, help="keep 1/eta of the configs and grow the budget eta-fold per rung")
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    parser.add_argument("--out", default=BEST_PARAMS_PATH, help="JSON file the best configs are written to")
+    args = parser.parse_args()
+    try:
+        args.models = parse_model_names(args.models)
+    except ValueError as e:
+        parser.error(str(e))
+    missing = [name for name in args.models if name not in SEARCH_SPACES]
+    if missing:
+        parser.error(f"no search space for {', '.join(missing)}")
+    return args
+
+
+def main():
+    args = parse_args()
+    store = FeatureStore(FEATURE_STORE_PATH)
+    feature_cols = feature_family(args.features)
+
+    # validate on the seasons just before the test season, which tuning never sees
+    test_season = pd.Timestamp(TRAIN_CUTOFF).year
+    fold_list = folds(store, range(test_season - args.cv_seasons, test_season))
+    if not fold_list:
+        raise SystemExit("No season before the test season has both training history and games")
+
+    for name in args.models:
+        best = successive_halving(canonical_name(name), store, fold_list, feature_cols, SEARCH_SPACES[name],
+                                  args.trials, args.min_rows, args.eta, args.workers)
+        save_best(name, best, feature_cols, args.out)
+        print(f"{name}: best log loss {best['log_loss']:.4f} with {best['params']}")
+    print(f"\nBest configs in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
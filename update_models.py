@@ -0,0 +1,178 @@
+"""Nightly update of the saved models.
+
+Downloads the latest dataset (unless NBA_OFFLINE=1 or --no-refresh),
+extends the feature table with the newest games, then brings each saved
+model up to date the cheapest way its registry record allows:
+
+    current  nothing was played since it was saved
+    update   an incremental model folds the new games in with partial_update()
+    refit    full refit, when the record is missing, the config changed, the
+             rows it was trained on changed, or its last full fit is older
+             than --refit-every days
+    defer    a model that can't update incrementally keeps serving as it is
+             until its scheduled refit
+
+With --drift every partially updated model is also refitted from scratch
+and both are scored on the scheduled games. How far apart they are goes to
+out/drift.json, to set the full-retrain policy from, and --max-drift saves
+the full refit instead whenever the mean drift is above it.
+
+    python update_models.py
+    python update_models.py --drift --max-drift 0.02
+    python update_models.py --player-features
+"""
+import os
+import json
+import time
+import argparse
+from datetime import datetime, timezone, timedelta
+import numpy as np
+import pandas as pd
+from data_prep import RecommenderDataPrep, TARGET_COL, MODEL_FEATURE_COLS
+from training import fit_and_score
+from model_registry import ModelRegistry, model_config
+from predict import default_models
+from models import MODEL_NAMES, BEST_PARAMS_PATH, parse_model_names, tuned_params
+
+REFIT_EVERY_DAYS = 7
+DRIFT_PATH = "out/drift.json"
+# drift is measured on this many of the latest games when nothing is scheduled
+DRIFT_ROWS = 1000
+
+
+def plan_update(record, model, feature_cols, data_prep, refit_every: int, now: datetime) -> str:
+    """What the nightly update does with one saved model: current, update, refit or defer."""
+    n_rows = data_prep.train_rows.stop
+    if record is None or record.get("n_rows") is None or record["config"] != model_config(model, feature_cols):
+        return "refit"
+    # a partial update is only valid if the rows the model saw are still the first rows of the store
+    if record["n_rows"] > n_rows or data_prep.training_data_hash(slice(0, record["n_rows"])) != record["data_hash"]:
+        return "refit"
+    if record["n_rows"] == n_rows:
+        return "current"
+    if now - datetime.fromisoformat(record["full_fit_at"]) >= timedelta(days=refit_every):
+        return "refit"
+    return "update" if model.incremental else "defer"
+
+
+def prediction_drift(updated: np.ndarray, full: np.ndarray) -> dict:
+    """How far a partially updated model's probabilities are from a full refit's."""
+    diff = np.abs(updated - full)
+    return {
+        "rows": len(diff),
+        "mean_abs": float(diff.mean()),
+        "max_abs": float(diff.max()),
+        "flipped": float(((updated > 0.5) != (full > 0.5)).mean()),
+    }
+
+
+def drift_features(data_prep, feature_cols):
+    """The scheduled games' features, or the latest DRIFT_ROWS games when none are scheduled."""
+    _, features = data_prep.get_schedule_data()
+    features = features.loc[features.notna().all(axis=1), feature_cols]
+    if len(features):
+        return features
+    rows = data_prep.train_rows
+    return data_prep.get_feature_frame(feature_cols, slice(max(rows.start, rows.stop - DRIFT_ROWS), rows.stop))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Bring the saved models up to date with the latest games.")
+    parser.add_argument("--refit-every", type=int, default=REFIT_EVERY_DAYS,
+                        help="days after which a model is refitted on the full history however it was updated")
+    parser.add_argument("--drift", action="store_true", help="compare partially updated models to full refits")
+    parser.add_argument("--max-drift", type=float,
+                        help="with --drift, save the full refit when the mean absolute drift is above this")
+    parser.add_argument("--drift-out", default=DRIFT_PATH, help="where to write the drift report")
+    parser.add_argument("--models", default=",".join(MODEL_NAMES), help="comma-separated models to update")
+    parser.add_argument("--tuned", action="store_true",
+                        help="build the models with the hyperparameters tune.py saved in " + BEST_PARAMS_PATH)
+    parser.add_argument("--no-refresh", action="store_true",
+                        help="use the cached dataset instead of downloading the latest one")
+    parser.add_argument("--player-features", action="store_true",
+                        help="also store the roster strength columns from the player box scores")
+    args = parser.parse_args()
+    try:
+        args.models = parse_model_names(args.models)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def main():
+    args = parse_args()
+
+    print("Updating feature table...")
+    data_prep = RecommenderDataPrep(False, player_features=args.player_features)
+    data_prep.load_and_prepare(True, incremental=True, refresh=not args.no_refresh)
+
+    registry = ModelRegistry()
+    params = tuned_params(MODEL_FEATURE_COLS) if args.tuned else None
+    models = default_models(args.models, params)
+    data_hash = data_prep.training_data_hash()
+    n_rows = data_prep.train_rows.stop
+    now = datetime.now(timezone.utc)
+
+    actions = {
+        name: plan_update(registry.record(name), model, feature_cols, data_prep, args.refit_every, now)
+        for name, (model, feature_cols) in models.items()
+    }
+    for name, action in actions.items():
+        print(f"{name}: {action}")
+
+    updated = {}
+    for name in [name for name, action in actions.items() if action == "update"]:
+        feature_cols = models[name][1]
+        record = registry.record(name)
+        rows = slice(record["n_rows"], n_rows)
+        X_new = data_prep.get_feature_frame(feature_cols, rows)
+        y_new = pd.Series(data_prep.store.columns[TARGET_COL][rows], name=TARGET_COL)
+
+        model = registry.load(name)
+        start = time.perf_counter()
+        model.partial_update(X_new, y_new)
+        update_time = time.perf_counter() - start
+        registry.save(name, model, feature_cols, data_hash, fit_time=update_time, config=record["config"],
+                      n_rows=n_rows, full_fit_at=record["full_fit_at"], updated_rows=len(X_new))
+        updated[name] = model
+        print(f"Updated {name} with {len(X_new)} games in {update_time:.3f}s")
+
+    for name in [name for name, action in actions.items() if action == "defer"]:
+        registry.accept(name, data_hash)
+
+    # drift needs a fresh full refit of every updated model as well
+    refit = {name: models[name] for name, action in actions.items() if action == "refit"}
+    compare = default_models(list(updated), params) if args.drift and updated else {}
+    to_fit = {**refit, **{f"{name}:full": entry for name, entry in compare.items()}}
+    if to_fit:
+        print(f"Refitting {', '.join(to_fit)}...")
+        configs = {name: model_config(model, feature_cols) for name, (model, feature_cols) in to_fit.items()}
+        runs = fit_and_score(to_fit, data_prep)
+        for name in refit:
+            registry.save(name, runs[name].model, models[name][1], data_hash, fit_time=runs[name].fit_time,
+                          config=configs[name], n_rows=n_rows)
+
+    if compare:
+        report = {"created": now.isoformat(), "n_rows": n_rows, "models": {}}
+        for name, (_, feature_cols) in compare.items():
+            X = drift_features(data_prep, feature_cols)
+            full = runs[f"{name}:full"]
+            drift = prediction_drift(np.asarray(updated[name].predict_proba(X), dtype=np.float64),
+                                     np.asarray(full.model.predict_proba(X), dtype=np.float64))
+            drift["replaced"] = args.max_drift is not None and drift["mean_abs"] > args.max_drift
+            report["models"][name] = drift
+            print(f"{name} drift vs full refit: mean {drift['mean_abs']:.4f}, max {drift['max_abs']:.4f}, "
+                  f"flipped {drift['flipped']:.2%} of {drift['rows']} games")
+
+            if drift["replaced"]:
+                registry.save(name, full.model, feature_cols, data_hash, fit_time=full.fit_time,
+                              config=configs[f"{name}:full"], n_rows=n_rows)
+                print(f"Replaced {name} with its full refit")
+
+        os.makedirs(os.path.dirname(args.drift_out) or ".", exist_ok=True)
+        with open(args.drift_out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()